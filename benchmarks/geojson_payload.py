@@ -0,0 +1,34 @@
+"""
+Benchmark of returning a large GeoJSON object (100k point features) from a callback, i.e. the Dash serialization of the
+plain dict vs. a pre-serialized payload created (once) with geojson_to_payload. The payload is embedded as is with
+orjson 3.9+ installed, and as a string otherwise. Run with "python benchmarks/geojson_payload.py".
+"""
+import timeit
+
+import numpy as np
+from dash._utils import to_json
+
+import dash_leaflet.express as dlx
+
+
+def random_points(n=100_000, seed=42):
+    rng = np.random.default_rng(seed)
+    lat, lon, value = rng.uniform(50, 60, n), rng.uniform(0, 20, n), rng.uniform(0, 100, n)
+    return dict(type="FeatureCollection", features=[
+        dict(type="Feature", geometry=dict(type="Point", coordinates=[float(lon[i]), float(lat[i])]),
+             properties=dict(id=i, value=float(value[i]))) for i in range(n)])
+
+
+def measure(label, func, number=5):
+    seconds = min(timeit.repeat(func, number=1, repeat=number))
+    print(f"{label:<40} {seconds * 1000:8.1f} ms")
+    return seconds
+
+
+geojson = random_points()
+payload = dlx.geojson_to_payload(geojson)
+# Dash serializes the whole callback response, i.e. the output values wrapped in a few (small) dicts
+measure("to_json(dict) [per callback]", lambda: to_json({"response": {"geojson": {"data": geojson}}}))
+measure("geojson_to_payload(dict) [once]", lambda: dlx.geojson_to_payload(geojson))
+measure("to_json(payload) [per callback]", lambda: to_json({"response": {"geojson": {"data": payload}}}))
+print(f"{'size (dict / payload)':<40} {len(to_json(geojson)) / 1e6:.1f} MB / {len(to_json(payload)) / 1e6:.1f} MB")
@@ -0,0 +1,44 @@
+"""
+Benchmark of dash_leaflet.express.SpatialIndex, i.e. the latency of viewport (bounds) queries over 10M points compared
+to a full NumPy scan. Run with "python benchmarks/spatial_index.py".
+"""
+import time
+
+import numpy as np
+
+from dash_leaflet.express import SpatialIndex
+
+
+def _timeit(func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main(n=10_000_000, seed=42):
+    rng = np.random.default_rng(seed)
+    lat, lon = rng.normal(50, 10, n).clip(-85, 85), (rng.normal(10, 60, n) + 180) % 360 - 180
+    start = time.perf_counter()
+    index = SpatialIndex(lat, lon)
+    print(f"Build index over {n:,} points: {time.perf_counter() - start:.2f} s")
+    viewports = {
+        "city (zoom ~12)": [[55.6, 12.5], [55.75, 12.7]],
+        "country (zoom ~6)": [[54.5, 8.0], [57.8, 13.0]],
+        "continent (zoom ~4)": [[35.0, -10.0], [60.0, 30.0]],
+        "antimeridian": [[40.0, 170.0], [60.0, 190.0]],
+    }
+    for name, bounds in viewports.items():
+        (south, west), (north, east) = bounds
+        scan_ms, expected = _timeit(lambda: np.nonzero((lat >= south) & (lat <= north) &
+                                                       (((lon >= west) & (lon <= east)) |
+                                                        ((lon + 360 >= west) & (lon + 360 <= east))))[0], repeat=3)
+        query_ms, result = _timeit(lambda: index.query(bounds))
+        capped_ms, _ = _timeit(lambda: index.query(bounds, max_count=10_000))
+        assert np.array_equal(result, expected)
+        print(f"{name:<20} {result.size:>10,} points | scan {scan_ms:8.2f} ms | index {query_ms:8.2f} ms | "
+              f"index (max_count=10k) {capped_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of street label rendering (StreetLabelProvider) on a synthetic city grid of labelled streets. The map is
+panned continuously (via the viewport property), and the render statistics reported by the provider are aggregated
+into labels/sec, with the glyph atlas enabled and disabled. Run with "python benchmarks/street_labels.py" and open the
+app in a browser.
+"""
+import numpy as np
+from dash import Dash, Input, Output, State, dcc, html
+
+import dash_leaflet as dl
+import dash_leaflet.express as dlx
+
+CENTER = [55.68, 12.57]
+
+
+def city_grid(n=200, spacing=0.0015, seed=42):
+    """Create a grid of n x n blocks, with one labelled LineString per street segment."""
+    rng = np.random.default_rng(seed)
+    names = [f"{prefix} {suffix}" for prefix in ["Nørre", "Vester", "Øster", "Sønder", "Gammel", "Ny", "Store", "Lille"]
+             for suffix in ["Allé", "Gade", "Vej", "Boulevard", "Stræde", "Torv", "Plads", "Voldgade"]]
+    lat0, lon0 = CENTER[0] - n * spacing / 2, CENTER[1] - n * spacing / 2
+    features = []
+    for i in range(n):
+        for j in range(n):
+            lat, lon = lat0 + i * spacing, lon0 + j * spacing
+            for coords in [[[lon, lat], [lon + spacing, lat]], [[lon, lat], [lon, lat + spacing]]]:
+                features.append(dict(type="Feature", geometry=dict(type="LineString", coordinates=coords),
+                                     properties=dict(name=names[rng.integers(len(names))])))
+    return dict(type="FeatureCollection", features=features)
+
+
+labels = dlx.geojson_to_label_buffer(city_grid())
+app = Dash()
+app.layout = html.Div([
+    dl.Map([
+        dl.TileLayer(),
+        dl.StreetLabelProvider(id="labels", data=labels, reportRenderStats=True),
+    ], id="map", center=CENTER, zoom=17, style={"height": "80vh"}),
+    dcc.Checklist(id="atlas", options=[{"label": "Glyph atlas", "value": "atlas"}], value=[]),
+    dcc.Interval(id="pan", interval=100),
+    dcc.Store(id="stats", data=[]),
+    html.Pre(id="log"),
+])
+
+
+@app.callback(Output("labels", "glyphAtlas"), Output("stats", "data", allow_duplicate=True),
+              Input("atlas", "value"), prevent_initial_call=True)
+def toggle_atlas(value):
+    return "atlas" in value, []
+
+
+@app.callback(Output("map", "viewport"), Input("pan", "n_intervals"))
+def pan(n_intervals):
+    # Pan along a circle, i.e. new streets (and labels) keep coming into view
+    angle = (n_intervals or 0) / 20
+    return dict(center=[CENTER[0] + 0.01 * np.sin(angle), CENTER[1] + 0.01 * np.cos(angle)], transition="panTo")
+
+
+@app.callback(Output("stats", "data"), Output("log", "children"), Input("labels", "renderStats"),
+              State("stats", "data"), prevent_initial_call=True)
+def collect(render_stats, stats):
+    stats = (stats + [render_stats])[-100:]
+    n_labels, ms = sum(s["labels"] for s in stats), sum(s["ms"] for s in stats)
+    return stats, (f"{len(stats)} renders | {n_labels / len(stats):.0f} labels/render | "
+                   f"{ms / len(stats):.1f} ms/render | {n_labels / max(ms, 1e-9) * 1000:,.0f} labels/sec")
+
+
+if __name__ == "__main__":
+    app.run(debug=False)
@@ -13,12 +13,15 @@ from .FeatureGroup import FeatureGroup
 from .FullScreenControl import FullScreenControl
 from .GeoJSON import GeoJSON
 from .GestureHandling import GestureHandling
+from .Heatmap import Heatmap
+from .HexbinLayer import HexbinLayer
 from .ImageOverlay import ImageOverlay
 from .LayerGroup import LayerGroup
 from .LayersControl import LayersControl
 from .LocateControl import LocateControl
 from .MapContainer import MapContainer
 from .Marker import Marker
+from .MarkerLayer import MarkerLayer
 from .MeasureControl import MeasureControl
 from .MousePosition import MousePosition
 from .Overlay import Overlay
@@ -31,6 +34,7 @@ from .Rectangle import Rectangle
 from .SVGOverlay import SVGOverlay
 from .ScaleControl import ScaleControl
 from .StreetLabelProvider import StreetLabelProvider
+from .TileCache import TileCache
 from .TileLayer import TileLayer
 from .Tooltip import Tooltip
 from .VideoOverlay import VideoOverlay
@@ -53,12 +57,15 @@ __all__ = [
     "FullScreenControl",
     "GeoJSON",
     "GestureHandling",
+    "Heatmap",
+    "HexbinLayer",
     "ImageOverlay",
     "LayerGroup",
     "LayersControl",
     "LocateControl",
     "MapContainer",
     "Marker",
+    "MarkerLayer",
     "MeasureControl",
     "MousePosition",
     "Overlay",
@@ -71,6 +78,7 @@ __all__ = [
     "SVGOverlay",
     "ScaleControl",
     "StreetLabelProvider",
+    "TileCache",
     "TileLayer",
     "Tooltip",
     "VideoOverlay",
@@ -1,9 +1,24 @@
 import logging
+import hashlib
+import io
+import json
+import math
+import os
+import pickle
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
 
 import dash_leaflet as dl
 import base64
+import functools
 
 
+# The import (and the protobuf version check) is done only once
+@functools.lru_cache(maxsize=None)
 def _try_import_geobuf():
     install_txt = "e.g. via pip by running 'pip install dash-leaflet[geobuf]' or 'pip install dash-leaflet[all]'."
     try:
@@ -18,6 +33,178 @@ def _try_import_geobuf():
     return geobuf
 
 
+def _try_import_numpy():
+    try:
+        import numpy
+    except ImportError as ex:
+        logging.error("Unable to import [numpy]. Please install it, e.g. via pip by running 'pip install numpy'.")
+        raise ex
+    return numpy
+
+
+def _route_path(app, path):
+    # Routes are registered under the routes prefix of the Dash app (e.g. as set via url_base_pathname), if any.
+    prefix = getattr(getattr(app, "config", None), "routes_pathname_prefix", None) or "/"
+    return prefix.rstrip("/") + path
+
+
+def _relative_path(app, path):
+    # The path as requested by the browser, i.e. including the requests prefix of the Dash app (if any).
+    return app.get_relative_path(path) if hasattr(app, "get_relative_path") else path
+
+
+# region Encoder cache
+
+class EncoderCache:
+    """
+    Bounded memoization of the (GeoJSON) encoders of dash_leaflet.express, e.g. geojson_to_geobuf. Results are keyed by
+    a hash of the (JSON serialized) input and the encoder options, or by an explicit cache_key passed to the encoder,
+    and the max_entries most recently used results are kept in memory. If a cache_dir is given, results are also
+    persisted (pickled) on disk with LRU eviction once the cache exceeds max_size bytes, and thus shared across
+    processes, e.g. gunicorn workers. The cache used by the encoders is encoder_cache, which can be replaced. Mutable
+    results (e.g. of geojson_to_topojson) are kept pickled, and each call returns a copy.
+    """
+
+    def __init__(self, max_entries=16, cache_dir=None, max_size=2 ** 30):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self.hits, self.misses, self.disk_hits = 0, 0, 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, encoder, args, kwargs, cache_key=None):
+        """Return the key of an encoder call, i.e. the hash of its input and options (or the explicit cache_key)."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{encoder.__name__}:{getattr(dl, '__version__', '')}".encode())
+        # With an explicit key, the input is not hashed (only the options)
+        value = [cache_key, list(args[1:]), kwargs] if cache_key is not None else [list(args), kwargs]
+        try:
+            import orjson
+            options = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            digest.update(orjson.dumps(value, option=options))
+        except ImportError:
+            digest.update(json.dumps(value, sort_keys=True, separators=(",", ":")).encode())
+        return digest.hexdigest()
+
+    def get(self, key, compute):
+        """Return the result for the given key, computing (and caching) it via compute on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._thaw(entry)
+        entry = self._read(key)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            entry = self._freeze(compute())
+            self._write(key, entry)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return self._thaw(entry)
+
+    @staticmethod
+    def _freeze(result):
+        # Mutable results are pickled (unpickling is faster than a deep copy), immutable ones (e.g. strings) kept as is.
+        if isinstance(result, (dict, list)):
+            return True, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        return False, result
+
+    @staticmethod
+    def _thaw(entry):
+        frozen, value = entry
+        return pickle.loads(value) if frozen else value
+
+    def clear(self):
+        """Remove all results from the cache (in memory and on disk)."""
+        with self._lock:
+            self._entries.clear()
+        for entry in self._scan():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _scan(self):
+        if self._cache_dir is None:
+            return []
+        return [entry for entry in os.scandir(self._cache_dir) if entry.is_file() and entry.name.endswith(".pickle")]
+
+    def _read(self, key):
+        if self._cache_dir is None:
+            return None
+        path = os.path.join(self._cache_dir, f"{key}.pickle")
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            # The modification time marks the last use (across processes), for LRU eviction
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None  # not cached, or evicted in the meantime
+        return entry
+
+    def _write(self, key, entry):
+        if self._cache_dir is None:
+            return
+        path = os.path.join(self._cache_dir, f"{key}.pickle")
+        # Write atomically, so that concurrent readers (or other processes) never see partial results.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        # The directory is the index shared by all processes, so the least recently used results are evicted from it.
+        entries = []
+        for entry in self._scan():
+            try:
+                entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except OSError:
+                pass
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if size <= self._max_size or entry_path == path:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            size -= entry_size
+
+
+encoder_cache = EncoderCache()
+
+
+def _memoize(content_hash=True):
+    """
+    Memoize an encoder via the encoder_cache. The encoder gains a cache_key argument, i.e. an explicit key (e.g. a
+    dataset name) that replaces the content hash of the input. If content_hash is False (for encoders that cost about
+    as much as hashing the input), results are only memoized by explicit key.
+    """
+
+    def decorator(encoder):
+        @functools.wraps(encoder)
+        def wrapper(*args, cache_key=None, **kwargs):
+            if cache_key is None and not content_hash:
+                return encoder(*args, **kwargs)
+            key = encoder_cache.key(encoder, args, kwargs, cache_key)
+            return encoder_cache.get(key, lambda: encoder(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+# endregion
+
+
 def categorical_colorbar(*args, categories, colorscale, **kwargs):
     indices = list(range(len(categories) + 1))
     return dl.Colorbar(*args, min=0, max=len(categories), classes=indices, colorscale=colorscale, tooltip=False,
@@ -35,6 +222,1207 @@ def dicts_to_geojson(dicts, lat="lat", lon="lon"):
     return geojson
 
 
+def apply_geojson_delta(geojson, delta):
+    """
+    Apply a geojsonDelta of the EditControl (i.e. the added, changed, and removed features) to a GeoJSON object.
+    Features are matched by their leafletId property.
+    """
+    features = {f["properties"]["leafletId"]: f for f in (geojson or {}).get("features", [])}
+    for feature in delta.get("added", []) + delta.get("changed", []):
+        features[feature["properties"]["leafletId"]] = feature
+    for leaflet_id in delta.get("removed", []):
+        features.pop(leaflet_id, None)
+    return {"type": "FeatureCollection", "features": list(features.values())}
+
+
+@_memoize()
 def geojson_to_geobuf(geojson):
     geobuf = _try_import_geobuf()
     return base64.b64encode(geobuf.encode(geojson)).decode()
+
+
+@_memoize()
+def geojson_to_label_buffer(geojson, label_property="name"):
+    """
+    Encode the (LineString/MultiLineString) features of a GeoJSON object as a binary label source, i.e. the data
+    property of the StreetLabelProvider. Features without a label are skipped.
+    """
+    np = _try_import_numpy()
+    lines, labels = [], []
+    for feature in geojson["features"]:
+        label = (feature.get("properties") or {}).get(label_property)
+        geometry = feature.get("geometry") or {}
+        if not label or geometry.get("type") not in ["LineString", "MultiLineString"]:
+            continue
+        parts = [geometry["coordinates"]] if geometry["type"] == "LineString" else geometry["coordinates"]
+        for part in parts:
+            lines.append(np.asarray(part, dtype=np.float32)[:, :2])
+            labels.append(str(label))
+    offsets = np.zeros(len(lines) + 1, dtype=np.uint32)
+    np.cumsum([len(line) for line in lines], out=offsets[1:])
+    coordinates = np.concatenate(lines) if lines else np.zeros((0, 2), dtype=np.float32)
+    return dict(coordinates=base64.b64encode(coordinates.tobytes()).decode(),
+                offsets=base64.b64encode(offsets.tobytes()).decode(), labels=labels)
+
+
+# region Cluster index
+
+def _lng_x(lng):
+    return lng / 360 + 0.5
+
+
+def _lat_y(np, lat):
+    sin = np.sin(lat * math.pi / 180)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = 0.5 - 0.25 * np.log((1 + sin) / (1 - sin)) / math.pi
+    return np.clip(y, 0, 1)
+
+
+def _aggregate_map(properties, aggregates):
+    result = {}
+    for name, spec in aggregates.items():
+        op, prop = spec["op"], spec.get("property")
+        value = None if prop is None else properties.get(prop)
+        if op == "sum":
+            result[name] = 0 if value is None else float(value)
+        elif op == "mean":
+            result[f"_{name}_sum"] = 0 if value is None else float(value)
+            result[f"_{name}_n"] = 0 if value is None else 1
+            result[name] = None if value is None else float(value)
+        elif op in ["min", "max"]:
+            result[name] = None if value is None else float(value)
+        elif op == "count":
+            result[name] = 1 if (prop is None or value is not None) else 0
+        elif op == "countBy":
+            result[name] = {} if value is None else {str(value): 1}
+        else:
+            raise ValueError(f"Unsupported cluster aggregation [{op}] for [{name}].")
+    return result
+
+
+def _aggregate_reduce(accumulated, properties, aggregates):
+    for name, spec in aggregates.items():
+        op = spec["op"]
+        a, b = accumulated[name], properties[name]
+        if op in ["sum", "count"]:
+            accumulated[name] = a + b
+        elif op == "mean":
+            accumulated[f"_{name}_sum"] += properties[f"_{name}_sum"]
+            accumulated[f"_{name}_n"] += properties[f"_{name}_n"]
+            n = accumulated[f"_{name}_n"]
+            accumulated[name] = accumulated[f"_{name}_sum"] / n if n > 0 else None
+        elif op in ["min", "max"]:
+            accumulated[name] = b if a is None else (a if b is None else (min(a, b) if op == "min" else max(a, b)))
+        elif op == "countBy":
+            counts = dict(a)
+            for key, count in b.items():
+                counts[key] = counts.get(key, 0) + count
+            accumulated[name] = counts
+
+
+def _supercluster_neighbors(np, x, y, fx, fy, r, max_candidates=256, chunk_size=2 ** 22):
+    # Neighbors (within r, in ascending order) of all points as CSR arrays, found by joining the points of adjacent
+    # grid cells (of size r). Returns None if there are too many candidates per point (e.g. many duplicate points), as
+    # most of them would never be visited by the (greedy) clustering.
+    n = len(x)
+    cx, cy = np.floor_divide(fx, r).astype(np.int64), np.floor_divide(fy, r).astype(np.int64)
+    qx, qy = np.floor_divide(x, r).astype(np.int64), np.floor_divide(y, r).astype(np.int64)
+    x0, y0 = min(cx.min(), qx.min()) - 1, min(cy.min(), qy.min()) - 1
+    width = max(cy.max(), qy.max()) - y0 + 2
+    keys = (cx - x0) * width + (cy - y0)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    query_keys = (qx - x0) * width + (qy - y0)
+    # Sorted queries are (much) faster to look up
+    query_order = np.argsort(query_keys, kind="stable")
+    sorted_queries = query_keys[query_order]
+    ranges = []
+    for offset in [dx * width + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)]:
+        lo, hi = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.int64)
+        lo[query_order] = np.searchsorted(sorted_keys, sorted_queries + offset, "left")
+        hi[query_order] = np.searchsorted(sorted_keys, sorted_queries + offset, "right")
+        ranges.append((lo, hi))
+    counts = sum(hi - lo for lo, hi in ranges)
+    if counts.sum() > max_candidates * n:
+        return None
+    # Process the points in chunks of about chunk_size candidates, to bound the memory use.
+    bounds = np.searchsorted(np.cumsum(counts), np.arange(chunk_size, counts.sum(), chunk_size), "left")
+    pairs = []
+    for start, end in zip([0] + (bounds + 1).tolist(), (bounds + 1).tolist() + [n]):
+        i, k = [], []
+        for lo, hi in ranges:
+            lo, hi = lo[start:end], hi[start:end]
+            m = hi - lo
+            first = np.repeat(lo - np.concatenate([[0], np.cumsum(m)[:-1]]), m)
+            i.append(np.repeat(np.arange(start, end), m))
+            k.append(order[first + np.arange(m.sum())])
+        i, k = np.concatenate(i), np.concatenate(k)
+        keep = (fx[k] - x[i]) ** 2 + (fy[k] - y[i]) ** 2 <= r * r
+        i, k = i[keep], k[keep]
+        pairs.append(k[np.lexsort((k, i))])
+        counts[start:end] = np.bincount(i - start, minlength=end - start)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr.tolist(), np.concatenate(pairs).tolist()
+
+
+def _supercluster_level(np, level, zoom, r, min_points, features, aggregates, cluster_props):
+    # Port of Supercluster._cluster (https://github.com/mapbox/supercluster), operating on a column layout.
+    x, y, zooms, ids, parents, nums, props = level
+    n_points = len(features)
+    # The index (KDBush) stores coordinates as float32, i.e. neighbor lookups are based on rounded values.
+    fx = np.asarray(x, dtype=np.float32).astype(np.float64)
+    fy = np.asarray(y, dtype=np.float32).astype(np.float64)
+    csr = _supercluster_neighbors(np, np.asarray(x), np.asarray(y), fx, fy, r) if len(x) > 0 else ([0], [])
+    # Points without neighbors (other than themselves) are left unclustered.
+    isolated = (np.diff(csr[0]) <= 1).tolist() if csr is not None else [False] * len(x)
+    fx, fy = fx.tolist(), fy.tolist()
+    cells = {}
+    r2 = r * r
+
+    def within(point, qx, qy):
+        if csr is not None:
+            return csr[1][csr[0][point]:csr[0][point + 1]]
+        # Lazy lookup, i.e. only for the points that are visited.
+        if not cells:
+            for k in range(len(fx)):
+                cells.setdefault((int(fx[k] // r), int(fy[k] // r)), []).append(k)
+        cx, cy = int(qx // r), int(qy // r)
+        candidates = []
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                candidates.extend(cells.get((i, j), []))
+        candidates.sort()
+        return [k for k in candidates if (fx[k] - qx) ** 2 + (fy[k] - qy) ** 2 <= r2]
+
+    def map_props(i, clone=False):
+        if nums[i] > 1:
+            return dict(cluster_props[props[i]]) if clone else cluster_props[props[i]]
+        return _aggregate_map(features[ids[i]].get("properties") or {}, aggregates)
+
+    rows = []
+    push = rows.append
+
+    for i in range(len(x)):
+        # If we've already visited the point at this zoom level, skip it.
+        if zooms[i] <= zoom:
+            continue
+        zooms[i] = zoom
+        if isolated[i]:
+            push((x[i], y[i], zooms[i], ids[i], parents[i], nums[i], props[i]))
+            continue
+        neighbors = within(i, x[i], y[i])
+        num_origin = nums[i]
+        num = num_origin + sum(nums[k] for k in neighbors if zooms[k] > zoom)
+        # If there were neighbors to merge, and there are enough points to form a cluster.
+        if num > num_origin and num >= min_points:
+            wx, wy = x[i] * num_origin, y[i] * num_origin
+            cluster_properties, cluster_prop_index = None, -1
+            # Encode both zoom and point index on which the cluster originated, offset by the number of features.
+            cluster_id = (i << 5) + (zoom + 1) + n_points
+            for k in neighbors:
+                if zooms[k] <= zoom:
+                    continue
+                zooms[k] = zoom
+                wx += x[k] * nums[k]
+                wy += y[k] * nums[k]
+                parents[k] = cluster_id
+                if aggregates:
+                    if cluster_properties is None:
+                        cluster_properties = map_props(i, clone=True)
+                        cluster_prop_index = len(cluster_props)
+                        cluster_props.append(cluster_properties)
+                    _aggregate_reduce(cluster_properties, map_props(k), aggregates)
+            parents[i] = cluster_id
+            push((wx / num, wy / num, math.inf, cluster_id, -1, num, cluster_prop_index))
+        # Otherwise, leave the points unclustered.
+        else:
+            push((x[i], y[i], zooms[i], ids[i], parents[i], nums[i], props[i]))
+            if num > 1:
+                for k in neighbors:
+                    if zooms[k] <= zoom:
+                        continue
+                    zooms[k] = zoom
+                    push((x[k], y[k], zooms[k], ids[k], parents[k], nums[k], props[k]))
+    # Columns of the next level
+    return tuple(list(column) for column in zip(*rows)) if rows else ([], [], [], [], [], [], [])
+
+
+def _kdbush_buffer(np, x, y, node_size):
+    # Serialize a static KDBush index (https://github.com/mourner/kdbush, v4 format) with float32 coordinates.
+    n = len(x)
+    node_size = min(max(node_size, 2), 65535)
+    ids = np.arange(n, dtype=np.uint16 if n < 65536 else np.uint32)
+    coords = np.empty((n, 2), dtype=np.float32)
+    coords[:, 0], coords[:, 1] = x, y
+    stack = [(0, n - 1, 0)]
+    while stack:
+        left, right, axis = stack.pop()
+        if right - left <= node_size:
+            continue
+        m = (left + right) >> 1
+        order = np.argpartition(coords[left:right + 1, axis], m - left)
+        ids[left:right + 1] = ids[left:right + 1][order]
+        coords[left:right + 1] = coords[left:right + 1][order]
+        stack.append((left, m - 1, 1 - axis))
+        stack.append((m + 1, right, 1 - axis))
+    ids_bytes = ids.tobytes()
+    header = struct.pack("<BBHI", 0xDB, (1 << 4) + 7, node_size, n)  # version 1, Float32Array
+    return header + ids_bytes + bytes((8 - len(ids_bytes) % 8) % 8) + coords.tobytes()
+
+
+def _coordinates_hash(np, features):
+    # Position dependent (32 bit) hash of the float32 lng/lat words of the features, missing geometries hashed as
+    # 0xFFFFFFFF words. Mirrored by _coordinatesHash in GeoJSON.ts, to verify that an index matches the data.
+    coords = np.full((len(features), 2), np.nan, dtype=np.float32)
+    for i, feature in enumerate(features):
+        if feature.get("geometry"):
+            coords[i] = feature["geometry"]["coordinates"][:2]
+    words = coords.view(np.uint32).astype(np.uint64)
+    words[np.isnan(coords)] = 0xFFFFFFFF
+    words = words.ravel()
+    weights = ((2 * np.arange(len(words), dtype=np.uint64) + 1) * 0x9E3779B1) & 0xFFFFFFFF
+    return int(np.sum((words ^ (words >> 15)) * weights, dtype=np.uint64) & 0xFFFFFFFF)
+
+
+def _pad(buffer):
+    return buffer + bytes((8 - len(buffer) % 8) % 8)
+
+
+def _build_supercluster_index(geojson, radius, extent, min_zoom, max_zoom, min_points, node_size, aggregates):
+    # Layout: magic, header length (uint32), JSON header, padding, and per zoom level a blob holding a KDBush index
+    # followed by the id/parent/count(/property index) columns. Parent ids of -1 are stored as 0xFFFFFFFF.
+    np = _try_import_numpy()
+    features = geojson["features"]
+    # Initial level, i.e. the points. Features without geometry are skipped (but keep their index).
+    indices = [i for i, f in enumerate(features) if f.get("geometry")]
+    coords = np.array([features[i]["geometry"]["coordinates"][:2] for i in indices], dtype=np.float64).reshape(-1, 2)
+    x = _lng_x(coords[:, 0]).astype(np.float32).astype(np.float64).tolist()
+    y = _lat_y(np, coords[:, 1]).astype(np.float32).astype(np.float64).tolist()
+    n = len(indices)
+    levels = {max_zoom + 1: (x, y, [math.inf] * n, indices, [-1] * n, [1] * n, [0] * n)}
+    # Cluster points on max zoom, then cluster the results on previous zoom, etc.
+    cluster_props = []
+    for z in range(max_zoom, min_zoom - 1, -1):
+        r = radius / (extent * 2 ** z)
+        levels[z] = _supercluster_level(np, levels[z + 1], z, r, min_points, features, aggregates, cluster_props)
+    # Serialize the levels. The coordinates are only stored in the KDBush index, the other columns as (u)int32.
+    blobs, trees, offset = [], [], 0
+    for z in sorted(levels):
+        x, y, _, ids, parents, nums, props = levels[z]
+        columns = [np.array(ids, dtype=np.uint32), np.array(parents, dtype=np.int64).astype(np.uint32),
+                   np.array(nums, dtype=np.uint32)] + ([np.array(props, dtype=np.int32)] if aggregates else [])
+        tree = _pad(_kdbush_buffer(np, x, y, node_size))
+        blob = _pad(tree + b"".join(column.tobytes() for column in columns))
+        trees.append(dict(zoom=z, numItems=len(x), offset=offset, treeLength=len(tree)))
+        blobs.append(blob)
+        offset += len(blob)
+    options = dict(radius=radius, extent=extent, minZoom=min_zoom, maxZoom=max_zoom, minPoints=min_points,
+                   nodeSize=node_size)
+    header = dict(version=1, options=options, numPoints=len(features), coordinatesHash=_coordinates_hash(np, features),
+                  clusterProps=cluster_props, trees=trees, aggregates=bool(aggregates))
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    prefix = _pad(b"DLSC" + struct.pack("<I", len(header_bytes)) + header_bytes)
+    return base64.b64encode(prefix + b"".join(blobs)).decode()
+
+
+@_memoize()
+def geojson_to_supercluster_index(geojson, radius=40, extent=512, min_zoom=0, max_zoom=16, min_points=2,
+                                  node_size=64, aggregates=None):
+    """
+    Build a (Supercluster compatible) cluster index server side, for use with the superClusterIndex property of the
+    GeoJSON component. The index is cached (via the encoder_cache), i.e. it is only built once per dataset/options.
+    Note that building the index takes about 2 s per 50k points, and that the index (holding the clusters of all zoom
+    levels) is typically about twice the size of the GeoJSON, which is still needed for the leaves. It thus pays off
+    mainly for static datasets served many times, when clustering is slow on the client (e.g. on mobile devices). The
+    index holds a hash of the coordinates; if it doesn't match the data, the clusters are built on the client instead.
+    """
+    return _build_supercluster_index(geojson, radius, extent, min_zoom, max_zoom, min_points, node_size, aggregates)
+
+# endregion
+
+
+# region Point in polygon
+
+_earth_radius = 6371000  # same as L.CRS.Earth.R
+
+
+def _mask_ring(np, ring, lat, lon):
+    # Crossing number (ray casting) test, vectorized over the points, i.e. looping only over the edges.
+    inside = np.zeros(lat.shape, dtype=bool)
+    x, y = ring[:, 0], ring[:, 1]
+    for i in range(len(ring) - 1):
+        x1, y1, x2, y2 = x[i], y[i], x[i + 1], y[i + 1]
+        crossing = (y1 > lat) != (y2 > lat)
+        if y1 != y2:
+            crossing &= lon < (x2 - x1) * (lat - y1) / (y2 - y1) + x1
+        inside ^= crossing
+    return inside
+
+
+def _mask_polygon(np, rings, lat, lon):
+    mask = np.zeros(lat.shape, dtype=bool)
+    outer = np.asarray(rings[0], dtype=np.float64)[:, :2]
+    # Only test the points within the bounding box.
+    (west, south), (east, north) = outer.min(axis=0), outer.max(axis=0)
+    candidates = np.nonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))[0]
+    if candidates.size == 0:
+        return mask
+    c_lat, c_lon = lat[candidates], lon[candidates]
+    inside = _mask_ring(np, outer, c_lat, c_lon)
+    for hole in rings[1:]:
+        inside &= ~_mask_ring(np, np.asarray(hole, dtype=np.float64)[:, :2], c_lat, c_lon)
+    mask[candidates] = inside
+    return mask
+
+
+def _mask_circle(np, center, radius, lat, lon):
+    mask = np.zeros(lat.shape, dtype=bool)
+    c_lon, c_lat = center[:2]
+    # Only test the points within the bounding box.
+    d_lat = math.degrees(radius / _earth_radius)
+    cos_lat = math.cos(math.radians(min(abs(c_lat) + d_lat, 90)))
+    d_lon = 180 if cos_lat < 1e-9 else min(d_lat / cos_lat, 180)
+    d = np.abs((lon - c_lon + 180) % 360 - 180)
+    candidates = np.nonzero((np.abs(lat - c_lat) <= d_lat) & (d <= d_lon))[0]
+    if candidates.size == 0:
+        return mask
+    # Haversine distance.
+    lat1, lat2 = math.radians(c_lat), np.radians(lat[candidates])
+    h = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(np.radians(d[candidates]) / 2) ** 2
+    mask[candidates] = 2 * _earth_radius * np.arcsin(np.sqrt(np.minimum(h, 1))) <= radius
+    return mask
+
+
+def geojson_to_mask(geojson, lat, lon):
+    """
+    Return a boolean mask of the points (NumPy coordinate arrays) that fall within any of the shapes, i.e. polygons,
+    rectangles, and circles, of a GeoJSON object, e.g. the geojson property of the EditControl. Circles are represented
+    as points with a "mRadius" property (in meters). Other features (markers, lines) are ignored.
+    """
+    np = _try_import_numpy()
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    mask = np.zeros(lat.shape, dtype=bool)
+    for feature in geojson.get("features", []):
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        if geometry.get("type") == "Polygon":
+            mask |= _mask_polygon(np, geometry["coordinates"], lat, lon)
+        elif geometry.get("type") == "MultiPolygon":
+            for rings in geometry["coordinates"]:
+                mask |= _mask_polygon(np, rings, lat, lon)
+        elif geometry.get("type") == "Point" and properties.get("mRadius") is not None:
+            mask |= _mask_circle(np, geometry["coordinates"], properties["mRadius"], lat, lon)
+    return mask
+
+# endregion
+
+
+# region Spatial index
+
+class SpatialIndex:
+    """
+    Grid index over point coordinates (NumPy arrays) for fast bounding box queries, e.g. filtering a large table by
+    the bounds property of the MapContainer. Build it once (e.g. at module level) and share it across callbacks.
+    """
+
+    def __init__(self, lat, lon, points_per_cell=16, max_cells=2 ** 22):
+        np = _try_import_numpy()
+        self._np = np
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        lon = (lon + 180) % 360 - 180
+        self.size = len(lat)
+        self._features = None
+        # Fit the grid to the data extent, aiming at a fixed (average) number of points per cell.
+        self._lat0, self._lon0 = (lat.min(), lon.min()) if self.size else (0.0, 0.0)
+        lat_extent, lon_extent = (max(lat.max() - self._lat0, 1e-9), max(lon.max() - self._lon0, 1e-9)) \
+            if self.size else (1.0, 1.0)
+        n_cells = int(min(max(self.size // points_per_cell, 1), max_cells))
+        self._ny = max(int(round(math.sqrt(n_cells * lat_extent / lon_extent))), 1)
+        self._nx = max(n_cells // self._ny, 1)
+        self._dy, self._dx = lat_extent / self._ny, lon_extent / self._nx
+        # Sort the points by cell (row major), so that the points of a row of cells are contiguous.
+        cells = self._row(lat) * self._nx + self._col(lon)
+        index_dtype = np.int32 if self.size < 2 ** 31 else np.int64
+        self._order = np.argsort(cells, kind="stable").astype(index_dtype)
+        self._lat, self._lon = lat[self._order], lon[self._order]
+        self._starts = np.zeros(self._nx * self._ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self._nx * self._ny), out=self._starts[1:])
+
+    @classmethod
+    def from_geojson(cls, geojson, **kwargs):
+        """
+        Build an index over the (point) features of a GeoJSON object. Queries return GeoJSON subsets.
+        """
+        features = geojson["features"]
+        coords = [f["geometry"]["coordinates"] for f in features]
+        index = cls([c[1] for c in coords], [c[0] for c in coords], **kwargs)
+        index._features = features
+        return index
+
+    def _row(self, lat):
+        return self._np.clip(((lat - self._lat0) / self._dy).astype(self._np.int64), 0, self._ny - 1)
+
+    def _col(self, lon):
+        return self._np.clip(((lon - self._lon0) / self._dx).astype(self._np.int64), 0, self._nx - 1)
+
+    def _query_range(self, south, west, north, east):
+        np = self._np
+        if east < self._lon0 or west > self._lon0 + self._dx * self._nx:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.arange(self._row(np.float64(south)), self._row(np.float64(north)) + 1)
+        col0, col1 = self._col(np.float64(west)), self._col(np.float64(east))
+        # Gather the candidates, i.e. one contiguous slice per row of cells.
+        starts = self._starts[rows * self._nx + col0]
+        lengths = self._starts[rows * self._nx + col1 + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        candidates = offsets + np.arange(offsets.size)
+        lat, lon = self._lat[candidates], self._lon[candidates]
+        return candidates[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)]
+
+    def query(self, bounds, max_count=None, sample="stride", seed=None):
+        """
+        Return the (sorted) indices of the points within the bounds, given as [[south, west], [north, east]] (i.e. as
+        emitted by the MapContainer). Bounds crossing the antimeridian are supported. If max_count is set, at most
+        max_count indices are returned, sampled either evenly across the grid ("stride") or at random ("random").
+        """
+        np = self._np
+        (south, west), (north, east) = bounds
+        if self.size == 0 or south > north:
+            return np.zeros(0, dtype=np.int64)
+        # Split the longitude range on the antimeridian (Leaflet bounds are not wrapped).
+        if east - west >= 360:
+            ranges = [(-180.0, 180.0)]
+        else:
+            west = (west + 180) % 360 - 180
+            east = west + (east - bounds[0][1])
+            ranges = [(west, east)] if east <= 180 else [(west, 180.0), (-180.0, east - 360)]
+        result = np.concatenate([self._query_range(south, w, north, e) for w, e in ranges])
+        # Limit the number of points.
+        if max_count is not None and result.size > max_count:
+            if sample == "random":
+                result = np.random.default_rng(seed).choice(result, max_count, replace=False)
+            elif sample == "stride":
+                result = result[np.linspace(0, result.size - 1, max_count).astype(np.int64)]
+            else:
+                raise ValueError(f"Unsupported sampling method [{sample}].")
+        return np.sort(self._order[result])
+
+    def query_geojson(self, bounds, **kwargs):
+        """
+        Return a GeoJSON object holding the features within the bounds (the index must be created via from_geojson).
+        """
+        if self._features is None:
+            raise ValueError("The index was not created from GeoJSON, use query instead.")
+        features = self._features
+        return {"type": "FeatureCollection", "features": [features[i] for i in self.query(bounds, **kwargs).tolist()]}
+
+# endregion
+
+
+# region Raster tiles
+
+_TILE_SIZE = 256
+
+
+def _parse_color(color):
+    """Parse a CSS hex (#rgb, #rrggbb, #rrggbbaa) or rgb()/rgba() color into an RGBA tuple."""
+    color = color.strip().lower()
+    if color.startswith("#"):
+        value = color[1:]
+        if len(value) in (3, 4):
+            value = "".join(c * 2 for c in value)
+        if len(value) == 6:
+            value += "ff"
+        if len(value) == 8:
+            return tuple(int(value[i:i + 2], 16) for i in range(0, 8, 2))
+    elif color.startswith("rgb"):
+        values = [v.strip() for v in color[color.index("(") + 1:color.rindex(")")].split(",")]
+        alpha = round(float(values[3]) * 255) if len(values) == 4 else 255
+        return tuple(int(float(v)) for v in values[:3]) + (alpha,)
+    raise ValueError(f"Unsupported color [{color}], use a hex or rgb()/rgba() color.")
+
+
+def colorcet_colorscale(name, n=None):
+    """
+    Return a colorcet colormap (e.g. "fire", or "CET_L3") as a list of hex colors, which can be passed as colorscale
+    to both the Colorbar and the RasterTiles, thereby ensuring that the two match. If n is set, n colors are sampled.
+    """
+    import colorcet
+    palettes = {key.lower(): value for key, value in colorcet.palette.items()}
+    if name.lower() not in palettes:
+        raise ValueError(f"Unknown colorcet colormap [{name}].")
+    colors = list(palettes[name.lower()])
+    if n is not None:
+        colors = [colors[round(i * (len(colors) - 1) / max(n - 1, 1))] for i in range(n)]
+    return colors
+
+
+def _colorscale_lut(np, colorscale, n=256):
+    """Interpolate a colorscale (a list of colors, or a colorcet name) into an n x 4 (RGBA) lookup table."""
+    colors = colorcet_colorscale(colorscale) if isinstance(colorscale, str) else colorscale
+    rgba = np.array([_parse_color(c) for c in colors], dtype=np.float64)
+    stops, positions = np.linspace(0, 1, len(rgba)), np.linspace(0, 1, n)
+    return np.stack([np.interp(positions, stops, rgba[:, i]) for i in range(4)], axis=1).round().astype(np.uint8)
+
+
+def _encode_png(rgba):
+    """Encode an (h, w, 4) uint8 array as PNG (no Pillow needed)."""
+    height, width, _ = rgba.shape
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    # Each scanline is prefixed by its filter type (0, i.e. none).
+    raw = bytearray(height * (width * 4 + 1))
+    stride = width * 4 + 1
+    for row in range(height):
+        raw[row * stride + 1:(row + 1) * stride] = rgba[row].tobytes()
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(bytes(raw), 1)) + \
+        chunk(b"IEND", b"")
+
+
+def _encode_webp(rgba):
+    try:
+        from PIL import Image
+    except ImportError as ex:
+        logging.error("Unable to import [pillow], which is required for WebP tiles. Please install it, e.g. via pip "
+                      "by running 'pip install pillow'.")
+        raise ex
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, mode="RGBA").save(buffer, format="WEBP", lossless=True)
+    return buffer.getvalue()
+
+
+class _RasterLayer:
+    """A registered array, along with its colormap and (lazily computed) overview pyramid."""
+
+    def __init__(self, np, data, bounds, colorscale, vmin, vmax):
+        self.levels = [np.asarray(data, dtype=np.float32)]
+        (self.south, self.west), (self.north, self.east) = bounds
+        self.lut = _colorscale_lut(np, colorscale)
+        self.vmin = float(np.nanmin(self.levels[0])) if vmin is None else vmin
+        self.vmax = float(np.nanmax(self.levels[0])) if vmax is None else vmax
+        self._lock = threading.Lock()
+
+    def level(self, np, k):
+        with self._lock:
+            return self._level(np, k)
+
+    def _level(self, np, k):
+        # Each overview level halves the resolution (by averaging blocks of 2 x 2 cells, ignoring NaNs).
+        while len(self.levels) <= k:
+            data = self.levels[-1]
+            ny, nx = data.shape
+            if ny < 2 and nx < 2:
+                break
+            padded = np.full((ny + ny % 2, nx + nx % 2), np.nan, dtype=np.float32)
+            padded[:ny, :nx] = data
+            blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+            counts = (~np.isnan(blocks)).sum(axis=(1, 3))
+            sums = np.nansum(blocks, axis=(1, 3))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.levels.append(np.where(counts > 0, sums / counts, np.nan).astype(np.float32))
+        return self.levels[min(k, len(self.levels) - 1)]
+
+
+class RasterTiles:
+    """
+    Tile server rendering (z/x/y) PNG/WebP tiles on demand from NumPy arrays, for use with the TileLayer. Arrays are
+    resampled (nearest neighbour) from overview pyramids matching the zoom level, colored via a colorscale shared with
+    the Colorbar, and the rendered tiles are kept in an LRU cache. The route is mounted on the Flask server of the app.
+    """
+
+    def __init__(self, app, prefix="/raster-tiles", cache_size=1024):
+        self._np = _try_import_numpy()
+        self._app = app
+        self._prefix = prefix.rstrip("/")
+        self._layers = {}
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits, self.misses = 0, 0
+        server = getattr(app, "server", app)
+        server.add_url_rule(_route_path(app, f"{self._prefix}/<name>/<int:z>/<int:x>/<int:y>.<fmt>"),
+                            endpoint=f"raster_tiles{self._prefix.replace('/', '_')}", view_func=self._serve)
+
+    def add(self, name, data, bounds=None, lat=None, lon=None, colorscale="fire", vmin=None, vmax=None, fmt="png"):
+        """
+        Register a 2D array (rows from north to south) and return the url template for the TileLayer. The array is
+        georeferenced either by its bounds, [[south, west], [north, east]], or by the (regularly spaced) lat/lon
+        coordinates of the cell centers, e.g. from xarray. Values outside [vmin, vmax] are clipped, NaNs transparent.
+        """
+        np = self._np
+        data = np.asarray(data)
+        if lat is not None and lon is not None:
+            lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+            # Rows must run from north to south, columns from west to east.
+            if lat[0] < lat[-1]:
+                data, lat = data[::-1], lat[::-1]
+            if lon[0] > lon[-1]:
+                data, lon = data[:, ::-1], lon[::-1]
+            dlat = (lat[0] - lat[-1]) / max(len(lat) - 1, 1)
+            dlon = (lon[-1] - lon[0]) / max(len(lon) - 1, 1)
+            bounds = [[lat[-1] - dlat / 2, lon[0] - dlon / 2], [lat[0] + dlat / 2, lon[-1] + dlon / 2]]
+        if bounds is None:
+            raise ValueError("Either bounds or lat/lon must be specified.")
+        with self._lock:
+            self._layers[name] = _RasterLayer(np, data, bounds, colorscale, vmin, vmax)
+            # Drop any tiles cached for a previous array of the same name.
+            for key in [key for key in self._cache if key[0] == name]:
+                del self._cache[key]
+        return self.url(name, fmt)
+
+    def url(self, name, fmt="png"):
+        """Return the url template of the tiles of a registered array."""
+        return _relative_path(self._app, f"{self._prefix}/{name}/{{z}}/{{x}}/{{y}}.{fmt}")
+
+    def render(self, name, z, x, y):
+        """Render a tile as an (256, 256, 4) RGBA array."""
+        np = self._np
+        layer = self._layers[name]
+        n = 2 ** z
+        # Coordinates of the pixel centers (Web Mercator).
+        pixels = np.arange(_TILE_SIZE) + 0.5
+        lon = (x + pixels / _TILE_SIZE) / n * 360 - 180
+        lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + pixels / _TILE_SIZE) / n))))
+        # Pick the overview level whose cell size best matches the pixel size.
+        ny, nx = layer.levels[0].shape
+        ratio = (360 / (_TILE_SIZE * n)) / ((layer.east - layer.west) / nx)
+        data = layer.level(np, max(int(math.floor(math.log2(ratio))), 0) if ratio > 1 else 0)
+        ny, nx = data.shape
+        rows = np.floor((layer.north - lat) / (layer.north - layer.south) * ny).astype(np.int64)
+        cols = np.floor((lon - layer.west) / (layer.east - layer.west) * nx).astype(np.int64)
+        valid_rows, valid_cols = (rows >= 0) & (rows < ny), (cols >= 0) & (cols < nx)
+        values = data[np.clip(rows, 0, ny - 1)[:, None], np.clip(cols, 0, nx - 1)[None, :]]
+        # Map the values to colors, NaNs and pixels outside the array are transparent.
+        span = (layer.vmax - layer.vmin) or 1.0
+        with np.errstate(invalid="ignore"):
+            index = np.clip((values - layer.vmin) / span * (len(layer.lut) - 1), 0, len(layer.lut) - 1)
+        valid = valid_rows[:, None] & valid_cols[None, :] & ~np.isnan(values)
+        rgba = layer.lut[np.where(valid, index, 0).astype(np.intp)]
+        rgba[~valid] = 0
+        return rgba
+
+    def tile(self, name, z, x, y, fmt="png"):
+        """Return the encoded (PNG or WebP) tile, via the LRU cache."""
+        if fmt not in ("png", "webp"):
+            raise ValueError(f"Unsupported tile format [{fmt}].")
+        key = (name, z, x, y, fmt)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        rgba = self.render(name, z, x, y)
+        content = _encode_png(rgba) if fmt == "png" else _encode_webp(rgba)
+        with self._lock:
+            self._cache[key] = content
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return content
+
+    def _serve(self, name, z, x, y, fmt):
+        from flask import Response, abort
+        if name not in self._layers or fmt not in ("png", "webp") or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            abort(404)
+        return Response(self.tile(name, z, x, y, fmt), mimetype=f"image/{fmt}",
+                        headers={"Cache-Control": "public, max-age=3600"})
+
+# endregion
+
+
+# region Tile proxy
+
+_TILE_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+# Allowed values of the url template placeholders, i.e. the tile coordinates, the subdomain, the retina suffix, and
+# (for other options, e.g. an extension) dot separated words. Anything else could redirect the upstream request.
+_TILE_PLACEHOLDERS = {"z": r"-?\d+", "x": r"-?\d+", "y": r"-?\d+", "s": r"[\w-]+", "r": r"(@2x)?"}
+_TILE_PLACEHOLDER_DEFAULT = r"[\w-]*(\.[\w-]+)*"
+
+
+class TileProxy:
+    """
+    Caching proxy for tile (and WMS) servers, mounted on the Flask server of the app. Tiles are cached on disk (with
+    LRU eviction once the cache exceeds max_size bytes), concurrent requests for the same tile are coalesced into a
+    single upstream request, and upstream connections are reused via a connection pool. Use the url method to route
+    the url of a TileLayer/WMSTileLayer through the proxy. Note that each process keeps its own index of the cache
+    (restored from the cache_dir on start), i.e. with multiple (e.g. gunicorn) workers sharing a cache_dir, max_size
+    is enforced per worker, and the cache may grow to (at most) the number of workers times max_size.
+    """
+
+    def __init__(self, app, cache_dir=".tile-cache", max_size=2 ** 30, prefix="/tile-proxy", pool_size=16, timeout=10,
+                 headers=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._app = app
+        self._prefix = prefix.rstrip("/")
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._timeout = timeout
+        self._upstreams = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits, self.misses, self.coalesced = 0, 0, 0
+        # Reuse upstream connections across requests (and threads).
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update(headers or {"User-Agent": "dash-leaflet-tile-proxy"})
+        # Restore the index (name -> size, extension) of the tiles cached by previous runs, oldest first.
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = sorted((entry for entry in os.scandir(cache_dir) if entry.is_file() and "." in entry.name and
+                          not entry.name.endswith(".tmp")), key=lambda entry: entry.stat().st_mtime)
+        self._index = OrderedDict((entry.name.rsplit(".", 1)[0], (entry.stat().st_size, entry.name.rsplit(".", 1)[1]))
+                                  for entry in entries)
+        self._size = sum(size for size, _ in self._index.values())
+        server = getattr(app, "server", app)
+        server.add_url_rule(_route_path(app, f"{self._prefix}/<key>"),
+                            endpoint=f"tile_proxy{self._prefix.replace('/', '_')}", view_func=self._serve)
+
+    def url(self, upstream):
+        """
+        Register an upstream url, i.e. a TileLayer url template (e.g. "https://tile.openstreetmap.org/{z}/{x}/{y}.png")
+        or a WMS base url, and return the corresponding proxy url.
+        """
+        key = hashlib.sha1(upstream.encode()).hexdigest()[:16]
+        self._upstreams[key] = upstream
+        # The template placeholders (e.g. z/x/y) are passed as query parameters, as are the WMS parameters.
+        params = "&".join(f"{name}={{{name}}}" for name in re.findall(r"{(\w+)}", upstream))
+        return _relative_path(self._app, f"{self._prefix}/{key}" + (f"?{params}" if params else ""))
+
+    def upstream_url(self, key, args):
+        """
+        Resolve the upstream url of a tile request, given the query parameters of the proxy url. Raises a ValueError if
+        a placeholder value is invalid.
+        """
+        from urllib.parse import urlencode
+        template = self._upstreams[key]
+        names = set(re.findall(r"{(\w+)}", template))
+        for name in names:
+            if not re.fullmatch(_TILE_PLACEHOLDERS.get(name, _TILE_PLACEHOLDER_DEFAULT), str(args.get(name, ""))):
+                raise ValueError(f"Invalid value for [{name}].")
+        url = re.sub(r"{(\w+)}", lambda match: str(args.get(match.group(1), "")), template)
+        query = [(name, value) for name, value in args.items() if name not in names]
+        return url + ("&" if "?" in url else "?") + urlencode(query) if query else url
+
+    def fetch(self, url):
+        """Return the (status code, content type, content) of a tile, from the cache or (coalesced) upstream."""
+        name = hashlib.sha256(url.encode()).hexdigest()
+        cached = self._read(name)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+                return cached
+            future = self._inflight.get(name)
+            owner = future is None
+            if owner:
+                future = self._inflight[name] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = self._fetch_upstream(url, name)
+            future.set_result(result)
+            return result
+        except Exception as ex:
+            future.set_exception(ex)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[name]
+
+    def _fetch_upstream(self, url, name):
+        response = self._session.get(url, timeout=self._timeout)
+        content_type = response.headers.get("Content-Type", "application/octet-stream").split(";")[0].strip()
+        # Only successful responses are cached.
+        if response.status_code == 200:
+            self._write(name, _TILE_EXTENSIONS.get(content_type, "bin"), response.content)
+        return response.status_code, content_type, response.content
+
+    def _read(self, name):
+        with self._lock:
+            entry = self._index.get(name)
+            if entry is None:
+                return None
+            self._index.move_to_end(name)
+        extension = entry[1]
+        try:
+            with open(os.path.join(self._cache_dir, f"{name}.{extension}"), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None  # evicted in the meantime
+        content_type = {ext: mime for mime, ext in _TILE_EXTENSIONS.items()}.get(extension, "application/octet-stream")
+        return 200, content_type, content
+
+    def _write(self, name, extension, content):
+        path = os.path.join(self._cache_dir, f"{name}.{extension}")
+        # Write atomically, so that concurrent readers (or other processes) never see partial tiles. The temporary file
+        # is unique per process and thread, as forked workers may share thread idents.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+        with self._lock:
+            previous = self._index.pop(name, None)
+            self._size += len(content) - (previous[0] if previous else 0)
+            self._index[name] = (len(content), extension)
+            # Evict the least recently used tiles.
+            while self._size > self._max_size and len(self._index) > 1:
+                evicted, (size, evicted_extension) = self._index.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(os.path.join(self._cache_dir, f"{evicted}.{evicted_extension}"))
+                except OSError:
+                    pass
+
+    def _serve(self, key):
+        from flask import Response, abort, request
+        if key not in self._upstreams:
+            abort(404)
+        try:
+            url = self.upstream_url(key, request.args)
+        except ValueError:
+            abort(400)
+        try:
+            status, content_type, content = self.fetch(url)
+        except Exception as ex:
+            logging.warning(f"Tile proxy request failed: {ex}")
+            abort(502)
+        headers = {"Cache-Control": "public, max-age=86400"} if status == 200 else {}
+        return Response(content, status=status, mimetype=content_type, headers=headers)
+
+# endregion
+
+
+# region Tile cache
+
+def mount_tile_cache(app, path="/dash-leaflet-tile-cache.js"):
+    """
+    Serve the service worker of the TileCache component on the Flask server of the app. It's served from the root of
+    the app (allowing it to control the whole app, and thereby cache the tile requests), so it cannot be loaded from
+    the component suites. Returns the url to pass as serviceWorkerUrl to the TileCache.
+    """
+    from flask import Response
+    with open(os.path.join(os.path.dirname(__file__), "tile_cache_sw.js")) as f:
+        script = f.read()
+    server = getattr(app, "server", app)
+    headers = {"Service-Worker-Allowed": "/", "Cache-Control": "no-cache"}
+    server.add_url_rule(_route_path(app, path), endpoint="tile_cache_sw", view_func=lambda: Response(
+        script, mimetype="application/javascript", headers=headers))
+    return _relative_path(app, path)
+
+# endregion
+
+
+# region Heatmap
+
+def points_to_heatmap_grid(lat, lon, weights=None, bins=256, bounds=None):
+    """
+    Bin (weighted) points into a density grid via numpy.histogram2d, i.e. the grid property of the Heatmap. Only the
+    non-empty cells are encoded, so the payload size depends on the grid rather than the number of points. The bins
+    are an int or a [lat, lon] pair, and the bounds ([[south, west], [north, east]]) default to the extent of the
+    points.
+    """
+    np = _try_import_numpy()
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    if bounds is None:
+        bounds = [[float(lat.min()), float(lon.min())], [float(lat.max()), float(lon.max())]]
+    (south, west), (north, east) = bounds
+    values, _, _ = np.histogram2d(lat, lon, bins=bins, range=[[south, north], [west, east]], weights=weights)
+    index = np.flatnonzero(values).astype(np.uint32)
+    return dict(bounds=[[south, west], [north, east]], shape=list(values.shape),
+                index=base64.b64encode(index.tobytes()).decode(),
+                values=base64.b64encode(values.ravel()[index].astype(np.float32).tobytes()).decode())
+
+# endregion
+
+
+# region Hexbin
+
+def _hexbin_indices(np, x, y, dx, dy):
+    # Pointy topped hexagons with odd rows shifted half a column (as in the HexbinLayer), distances compared in pixels
+    py = y / dy
+    pj = np.floor(py + 0.5)
+    odd = pj.astype(np.int64) & 1
+    px = x / dx - odd / 2
+    pi = np.floor(px + 0.5)
+    px1, py1 = px - pi, py - pj
+    pi2 = pi + np.where(px < pi, -1, 1) / 2
+    pj2 = pj + np.where(py < pj, -1, 1)
+    px2, py2 = px - pi2, py - pj2
+    swap = (np.abs(py1) * 3 > 1) & ((px1 ** 2 - px2 ** 2) * dx ** 2 > (py2 ** 2 - py1 ** 2) * dy ** 2)
+    pi = np.where(swap, pi2 + np.where(odd, 1, -1) / 2, pi)
+    pj = np.where(swap, pj2, pj)
+    return pi.astype(np.int64), pj.astype(np.int64)
+
+
+def points_to_hexbins(lat, lon, zoom, values=None, aggregation="count", radius=20, shape="hexagon"):
+    """
+    Aggregate points into the hexagonal (or square) bins of the HexbinLayer at a zoom level, i.e. the bins property.
+    The aggregation is "count", "sum", or "mean" (of the values, where NaN values are skipped). The bins are defined in
+    the pixel grid of the zoom level, so the radius is in pixels (for squares, half the side length).
+    """
+    np = _try_import_numpy()
+    if aggregation not in ["count", "sum", "mean"]:
+        raise ValueError(f"Unsupported aggregation [{aggregation}].")
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    values = np.ones_like(lat) if (values is None or aggregation == "count") else np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    lat, lon, values = lat[valid], lon[valid], values[valid]
+    scale = 256 * 2 ** zoom
+    x, y = _lng_x(lon) * scale, _lat_y(np, np.clip(lat, -85.0511287798, 85.0511287798)) * scale
+    if shape == "hexagon":
+        i, j = _hexbin_indices(np, x, y, radius * 2 * math.sin(math.pi / 3), radius * 1.5)
+    elif shape == "square":
+        i, j = np.floor(x / (2 * radius)).astype(np.int64), np.floor(y / (2 * radius)).astype(np.int64)
+    else:
+        raise ValueError(f"Unsupported bin shape [{shape}].")
+    keys, inverse = np.unique((j + 1) * 2 ** 32 + (i + 1), return_inverse=True)
+    count = np.bincount(inverse, minlength=len(keys))
+    value = np.bincount(inverse, weights=values, minlength=len(keys))
+    if aggregation == "mean":
+        value = value / count
+    i, j = keys % 2 ** 32 - 1, keys // 2 ** 32 - 1
+    return dict(zoom=zoom, radius=radius, shape=shape, i=i.tolist(), j=j.tolist(), value=value.tolist(),
+                count=count.tolist())
+
+# endregion
+
+
+# region TopoJSON
+
+def _geometry_positions(geometry):
+    kind = (geometry or {}).get("type")
+    if kind == "GeometryCollection":
+        for child in geometry["geometries"]:
+            yield from _geometry_positions(child)
+    elif kind == "Point":
+        yield geometry["coordinates"]
+    elif kind in ["MultiPoint", "LineString"]:
+        yield from geometry["coordinates"]
+    elif kind in ["MultiLineString", "Polygon"]:
+        for line in geometry["coordinates"]:
+            yield from line
+    elif kind == "MultiPolygon":
+        for polygon in geometry["coordinates"]:
+            for ring in polygon:
+                yield from ring
+
+
+def _topojson_geometry(geometry, quantize, parts):
+    # Convert a geometry to TopoJSON, with the lines/rings collected in parts (and referenced by index until cut into
+    # arcs). Consecutive duplicate positions (e.g. after quantization) are removed.
+    kind = (geometry or {}).get("type")
+    if kind is None:
+        return {"type": None}
+    if kind == "GeometryCollection":
+        return {"type": kind, "geometries": [_topojson_geometry(g, quantize, parts) for g in geometry["geometries"]]}
+    if kind == "Point":
+        return {"type": kind, "coordinates": list(quantize(geometry["coordinates"]))}
+    if kind == "MultiPoint":
+        return {"type": kind, "coordinates": [list(quantize(c)) for c in geometry["coordinates"]]}
+
+    def part(line, closed):
+        points = []
+        for position in line:
+            point = quantize(position)
+            if not points or point != points[-1]:
+                points.append(point)
+        parts.append((points, closed))
+        return len(parts) - 1
+
+    coordinates = geometry["coordinates"]
+    if kind == "LineString":
+        return {"type": kind, "arcs": part(coordinates, False)}
+    if kind == "MultiLineString":
+        return {"type": kind, "arcs": [part(line, False) for line in coordinates]}
+    if kind == "Polygon":
+        return {"type": kind, "arcs": [part(ring, True) for ring in coordinates]}
+    if kind == "MultiPolygon":
+        return {"type": kind, "arcs": [[part(ring, True) for ring in polygon] for polygon in coordinates]}
+    raise ValueError(f"Unsupported geometry type [{kind}].")
+
+
+def _topojson_resolve(geometry, refs):
+    kind = geometry["type"]
+    if kind == "GeometryCollection":
+        for child in geometry["geometries"]:
+            _topojson_resolve(child, refs)
+    elif kind == "LineString":
+        geometry["arcs"] = refs[geometry["arcs"]]
+    elif kind in ["MultiLineString", "Polygon"]:
+        geometry["arcs"] = [refs[i] for i in geometry["arcs"]]
+    elif kind == "MultiPolygon":
+        geometry["arcs"] = [[refs[i] for i in polygon] for polygon in geometry["arcs"]]
+
+
+def _topojson_junctions(parts):
+    # A point is a junction if it's the end of a line, or if it's visited with different neighbours (i.e. where lines
+    # merge or split). Shared borders traversed in opposite directions have the same (unordered) neighbours.
+    neighbours, junctions = {}, set()
+    for points, closed in parts:
+        ring = closed and len(points) > 1 and points[0] == points[-1]
+        n = len(points) - 1 if ring else len(points)
+        for k in range(n):
+            if not ring and (k == 0 or k == n - 1):
+                junctions.add(points[k])
+                continue
+            previous, following = points[k - 1] if k > 0 else points[n - 1], points[k + 1]
+            pair = (previous, following) if previous <= following else (following, previous)
+            if neighbours.setdefault(points[k], pair) != pair:
+                junctions.add(points[k])
+    return junctions
+
+
+def _topojson_arcs(parts, junctions):
+    # Cut the lines/rings into arcs at the junctions, sharing arcs that are identical (possibly reversed)
+    arcs, index, refs = [], {}, []
+
+    def add(arc):
+        key = tuple(arc)
+        if key in index:
+            return index[key]
+        if key[::-1] in index:
+            return ~index[key[::-1]]
+        index[key] = len(arcs)
+        arcs.append(arc)
+        return len(arcs) - 1
+
+    for points, closed in parts:
+        line = points
+        if closed and len(points) > 1:
+            ring = points[:-1] if points[0] == points[-1] else points
+            # Start the ring at a junction, or (if there are none) at its min point, so that identical rings match
+            cuts = [k for k, point in enumerate(ring) if point in junctions]
+            start = cuts[0] if cuts else ring.index(min(ring))
+            ring = ring[start:] + ring[:start]
+            line = ring + ring[:1]
+        part_refs, start = [], 0
+        for k in range(1, len(line) - 1):
+            if line[k] in junctions:
+                part_refs.append(add(line[start:k + 1]))
+                start = k
+        part_refs.append(add(line[start:]))
+        refs.append(part_refs)
+    return arcs, refs
+
+
+@_memoize()
+def geojson_to_topojson(geojson, quantization=1e5, name="data"):
+    """
+    Encode a GeoJSON object as TopoJSON (for the GeoJSON component with format="topojson"), i.e. as arcs shared by the
+    geometries, such that borders of adjacent polygons are stored once. The coordinates are quantized to a grid of
+    quantization x quantization cells over the bounding box and delta-encoded. Set quantization to None to keep the
+    full precision.
+    """
+    features = geojson["features"] if geojson.get("type") == "FeatureCollection" else [geojson]
+    positions = [p for feature in features for p in _geometry_positions(feature.get("geometry"))]
+    xs, ys = [p[0] for p in positions], [p[1] for p in positions]
+    bbox = [min(xs), min(ys), max(xs), max(ys)] if positions else [0, 0, 0, 0]
+    topology = {"type": "Topology", "bbox": bbox}
+    if quantization:
+        n = int(quantization) - 1
+        kx = (bbox[2] - bbox[0]) / n if bbox[2] > bbox[0] else 1
+        ky = (bbox[3] - bbox[1]) / n if bbox[3] > bbox[1] else 1
+        topology["transform"] = {"scale": [kx, ky], "translate": [bbox[0], bbox[1]]}
+
+        def quantize(position):
+            return round((position[0] - bbox[0]) / kx), round((position[1] - bbox[1]) / ky)
+    else:
+        def quantize(position):
+            return position[0], position[1]
+    parts, geometries = [], []
+    for feature in features:
+        geometry = _topojson_geometry(feature.get("geometry"), quantize, parts)
+        if feature.get("properties"):
+            geometry["properties"] = feature["properties"]
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        geometries.append(geometry)
+    arcs, refs = _topojson_arcs(parts, _topojson_junctions(parts))
+    for geometry in geometries:
+        _topojson_resolve(geometry, refs)
+    if quantization:
+        arcs = [[list(arc[0])] + [[b[0] - a[0], b[1] - a[1]] for a, b in zip(arc, arc[1:])] for arc in arcs]
+    else:
+        arcs = [[list(point) for point in arc] for arc in arcs]
+    topology["objects"] = {name: {"type": "GeometryCollection", "geometries": geometries}}
+    topology["arcs"] = arcs
+    return topology
+
+# endregion
+
+
+# region GeoJSON payload
+
+class GeoJSONPayload:
+    """
+    Pre-serialized GeoJSON that can be passed as the data of the GeoJSON component, rather than walking the nested
+    dicts/lists on each serialization. With orjson (3.9+, used by Dash if installed), the JSON is embedded as is,
+    otherwise it's serialized as a string (which the component parses). A payload created once (e.g. at import time)
+    is thus reused across callbacks and users at little cost. Create it via geojson_to_payload.
+    """
+
+    def __init__(self, value):
+        self.json = value
+
+    def to_plotly_json(self):
+        try:
+            from orjson import Fragment
+            from plotly.io.json import config
+        except ImportError:
+            return self.json
+        # The (plain) json engine cannot embed fragments
+        return self.json if config.default_engine == "json" else Fragment(self.json)
+
+
+def _trim_coordinates(coordinates, precision):
+    if coordinates and not isinstance(coordinates[0], (list, tuple)):
+        return [round(c, precision) for c in coordinates]
+    return [_trim_coordinates(c, precision) for c in coordinates]
+
+
+def _trim_geometry(geometry, precision):
+    if not geometry:
+        return geometry
+    if geometry["type"] == "GeometryCollection":
+        return {**geometry, "geometries": [_trim_geometry(g, precision) for g in geometry["geometries"]]}
+    return {**geometry, "coordinates": _trim_coordinates(geometry["coordinates"], precision)}
+
+
+def _json_dumps(obj):
+    # orjson (if installed) is several times faster than the json module
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+@_memoize(content_hash=False)
+def geojson_to_payload(geojson, precision=6):
+    """
+    Serialize a GeoJSON object (once) into a GeoJSONPayload for the data property of the GeoJSON component. The
+    coordinates are rounded to the given number of decimals (by default 6, i.e. ~0.1 m), or kept as is if precision is
+    None. Properties are serialized as is. Payloads are memoized only if a cache_key (e.g. a dataset name) is passed,
+    as hashing the input would cost about as much as serializing it.
+    """
+    if precision is not None:
+        if geojson.get("type") == "FeatureCollection":
+            features = [{**f, "geometry": _trim_geometry(f.get("geometry"), precision)} for f in geojson["features"]]
+            geojson = {**geojson, "features": features}
+        elif geojson.get("type") == "Feature":
+            geojson = {**geojson, "geometry": _trim_geometry(geojson.get("geometry"), precision)}
+        else:
+            geojson = _trim_geometry(geojson, precision)
+    return GeoJSONPayload(_json_dumps(geojson))
+
+# endregion
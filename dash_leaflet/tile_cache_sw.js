@@ -0,0 +1,211 @@
+/**
+ * Service worker caching tiles (and other data, e.g. GeoJSON) for the TileCache component. Requests matching the
+ * configured url patterns are served from the Cache Storage, with LRU eviction once the cache exceeds its size budget.
+ * Served by dash_leaflet.express.mount_tile_cache.
+ */
+const CACHE_NAME = 'dash-leaflet-tile-cache-v1';
+// The configuration and the recency of the entries are persisted (in a separate cache), as the browser may restart
+// the (idle) worker at any time
+const META_CACHE_NAME = 'dash-leaflet-tile-cache-meta-v1';
+const CONFIG_KEY = 'dash-leaflet-tile-cache/config';
+const INDEX_KEY = 'dash-leaflet-tile-cache/index';
+const SAVE_DELAY = 1000;
+const PREFETCH_CONCURRENCY = 4;
+
+let patterns = null;
+let maxSize = 100 * 1024 * 1024;
+// LRU index of the cached urls (url -> size), least recently used first
+let index = null;
+let size = 0;
+let saving = null;
+const stats = {hits: 0, misses: 0, prefetched: 0};
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', (event) => event.waitUntil(self.clients.claim()));
+
+function readMeta(key) {
+  return caches.open(META_CACHE_NAME).then(cache => cache.match(key))
+    .then(response => response ? response.json() : null)
+    .catch(() => null);
+}
+
+function writeMeta(key, value) {
+  return caches.open(META_CACHE_NAME).then(cache => cache.put(key, new Response(JSON.stringify(value), {
+    headers: {'Content-Type': 'application/json'}
+  })));
+}
+
+function applyConfig(config) {
+  patterns = (config.patterns || []).map(pattern => new RegExp(pattern));
+  maxSize = config.maxSize || maxSize;
+}
+
+// The configuration of the previous run applies until the page sends a new one
+const configLoaded = readMeta(CONFIG_KEY).then(config => {
+  if (patterns === null) applyConfig(config || {});
+});
+
+function loadIndex() {
+  // The index is rebuilt from the cache (the sizes are stored as headers) and the persisted recency order when the
+  // worker (re)starts. Entries stored after the order was last persisted are the most recent ones.
+  if (index === null) {
+    index = Promise.all([caches.open(CACHE_NAME), readMeta(INDEX_KEY)]).then(([cache, order]) => {
+      const rank = new Map((order || []).map((url, i) => [url, i]));
+      return cache.keys().then(requests => Promise.all(
+        requests.map(request => cache.match(request).then(response => [request.url, response]))
+      )).then(entries => {
+        const map = new Map();
+        const used = entry => Number(entry[1].headers.get('x-dl-used') || 0);
+        entries
+          .filter(entry => entry[1])
+          .sort((a, b) => {
+            const ra = rank.has(a[0]) ? rank.get(a[0]) : Infinity;
+            const rb = rank.has(b[0]) ? rank.get(b[0]) : Infinity;
+            return ra !== rb ? ra - rb : used(a) - used(b);
+          })
+          .forEach(entry => {
+            const entrySize = Number(entry[1].headers.get('x-dl-size')) || 0;
+            map.set(entry[0], entrySize);
+            size += entrySize;
+          });
+        return map;
+      });
+    });
+  }
+  return index;
+}
+
+function saveIndex() {
+  // Debounced, i.e. the recency order is persisted at most once per SAVE_DELAY
+  if (saving === null) {
+    saving = new Promise(resolve => setTimeout(resolve, SAVE_DELAY)).then(() => {
+      saving = null;
+      return loadIndex();
+    }).then(lru => writeMeta(INDEX_KEY, Array.from(lru.keys()))).catch(() => undefined);
+  }
+  return saving;
+}
+
+function matches(url) {
+  return patterns.some(pattern => pattern.test(url));
+}
+
+function touch(lru, url) {
+  const entrySize = lru.get(url);
+  lru.delete(url);
+  lru.set(url, entrySize);
+  saveIndex();
+}
+
+async function store(cache, lru, url, response) {
+  // Record the size (and time of use) as headers, so that the index can be restored
+  const body = await response.arrayBuffer();
+  const entrySize = body.byteLength;
+  const headers = new Headers(response.headers);
+  headers.set('x-dl-size', String(entrySize));
+  headers.set('x-dl-used', String(Date.now()));
+  await cache.put(url, new Response(body, {status: response.status, statusText: response.statusText, headers}));
+  if (lru.has(url)) {
+    size -= lru.get(url);
+    lru.delete(url);
+  }
+  lru.set(url, entrySize);
+  size += entrySize;
+  // Evict the least recently used entries
+  const evicted = [];
+  for (const [key, value] of lru) {
+    if (size <= maxSize) break;
+    evicted.push(key);
+    size -= value;
+  }
+  evicted.forEach(key => lru.delete(key));
+  await Promise.all(evicted.map(key => cache.delete(key)));
+  saveIndex();
+}
+
+function cacheable(response) {
+  // Opaque (cross-origin, no-cors) responses are not cached, as their size cannot be read (and browsers pad them by
+  // megabytes in the storage quota), i.e. cross-origin tiles are cached only if the tile layer sets crossOrigin
+  return response.ok && response.type !== 'opaque';
+}
+
+async function respond(request) {
+  const [cache, lru] = await Promise.all([caches.open(CACHE_NAME), loadIndex()]);
+  const cached = await cache.match(request.url);
+  if (cached) {
+    stats.hits += 1;
+    touch(lru, request.url);
+    return cached;
+  }
+  stats.misses += 1;
+  const response = await fetch(request);
+  if (cacheable(response)) {
+    await store(cache, lru, request.url, response.clone());
+  }
+  return response;
+}
+
+async function prefetch(urls) {
+  const [cache, lru] = await Promise.all([caches.open(CACHE_NAME), loadIndex()]);
+  const queue = urls.filter(url => !lru.has(url));
+  const next = async () => {
+    while (queue.length > 0) {
+      const url = queue.shift();
+      try {
+        const response = await fetch(url, {mode: 'cors', credentials: 'same-origin'});
+        if (cacheable(response)) {
+          await store(cache, lru, url, response);
+          stats.prefetched += 1;
+        }
+      } catch (e) {
+        // Prefetching is best effort
+      }
+    }
+  };
+  const workers = [];
+  for (let i = 0; i < PREFETCH_CONCURRENCY; i++) {
+    workers.push(next());
+  }
+  await Promise.all(workers);
+  await saving;
+}
+
+function handle(request) {
+  return respond(request).catch(() => fetch(request));
+}
+
+self.addEventListener('fetch', (event) => {
+  if (event.request.method !== 'GET' || event.request.mode === 'navigate') return;
+  let response;
+  if (patterns !== null) {
+    if (!matches(event.request.url)) return;
+    response = handle(event.request);
+  } else {
+    // The persisted configuration is still loading (the worker has just been restarted)
+    response = configLoaded.then(() => matches(event.request.url) ? handle(event.request) : fetch(event.request));
+  }
+  event.respondWith(response);
+  event.waitUntil(response.then(() => saving).catch(() => undefined));
+});
+
+self.addEventListener('message', (event) => {
+  const data = event.data || {};
+  if (data.type === 'config') {
+    applyConfig(data);
+    event.waitUntil(writeMeta(CONFIG_KEY, {patterns: data.patterns || [], maxSize}));
+  } else if (data.type === 'prefetch') {
+    event.waitUntil(prefetch(data.urls || []));
+  } else if (data.type === 'stats' && event.ports[0]) {
+    loadIndex().then(lru => {
+      const requests = stats.hits + stats.misses;
+      event.ports[0].postMessage({
+        hits: stats.hits,
+        misses: stats.misses,
+        hitRate: requests > 0 ? stats.hits / requests : 0,
+        prefetched: stats.prefetched,
+        entries: lru.size,
+        size: size
+      });
+    });
+  }
+});
@@ -0,0 +1,247 @@
+// src/components/AnimatedPaths/AnimatedPathLayer.ts
+import L from 'leaflet';
+
+export interface AnimatedPathOptions {
+    weight?: number;
+    pulseColor?: string;
+    delay?: number;
+    dashArray?: number[] | string;
+    paused?: boolean;
+    reverse?: boolean;
+}
+
+interface AnimatedPath {
+    latlngs: L.LatLng[][];
+    bounds: L.LatLngBounds;
+    options: AnimatedPathOptions;
+    dashArray: number[];
+    patternLength: number;
+    // Current dash offset (px), advanced by the animation loop unless paused
+    offset: number;
+    // Projected (pixel) coordinates, cached for the zoom level they were projected at
+    zoom?: number;
+    points?: L.Point[][];
+}
+
+/**
+ * Compute a cheap hash of (possibly nested) positions, used for change detection instead of stringifying them.
+ */
+export function hashPositions(positions: any): string {
+    let hash = 2166136261;
+    let count = 0;
+    const visit = (value) => {
+        if (Array.isArray(value)) {
+            if (typeof value[0] === 'number') {
+                // Coordinates are hashed with a precision of 1e-7 degrees (~1 cm)
+                for (let i = 0; i < value.length; i++) {
+                    hash = Math.imul(hash ^ ((value[i] * 1e7) | 0), 16777619);
+                }
+                count += value.length;
+            } else {
+                for (let i = 0; i < value.length; i++) {
+                    visit(value[i]);
+                }
+            }
+            // Mark the end of each array, so that the nesting structure is part of the hash
+            hash = Math.imul(hash ^ 0x7fffffff, 16777619);
+        } else if (value && typeof value === 'object') {
+            visit([value.lat, value.lng]);
+        }
+    };
+    visit(positions);
+    return (hash >>> 0).toString(36) + ':' + count;
+}
+
+function toLatLngs(positions: any): L.LatLng[][] {
+    if (!positions || positions.length === 0) {
+        return [];
+    }
+    // A single polyline is a list of coordinates, a multi polyline is a list of those
+    const nested = Array.isArray(positions[0]) && Array.isArray(positions[0][0]);
+    const lines = nested ? positions : [positions];
+    return lines.map(line => line.map(pos => Array.isArray(pos) ? L.latLng(pos[0], pos[1]) : L.latLng(pos)));
+}
+
+function parseDashArray(dashArray: number[] | string | undefined): number[] {
+    if (dashArray === undefined) {
+        return [10, 20];
+    }
+    const values = Array.isArray(dashArray) ? dashArray : String(dashArray).split(/[\s,]+/).map(Number);
+    return values.filter(value => !isNaN(value));
+}
+
+/**
+ * Canvas layer drawing the animated pulses of many paths, driven by a single requestAnimationFrame loop. The static
+ * part of each path is drawn by a regular (canvas rendered) polyline, so this layer is non-interactive.
+ */
+export const AnimatedPathLayer = L.Layer.extend({
+    initialize: function () {
+        this._paths = new Map<number, AnimatedPath>();
+        this._frame = null;
+        this._time = null;
+    },
+
+    onAdd: function (map: L.Map) {
+        this._canvas = L.DomUtil.create('canvas', 'leaflet-animated-paths leaflet-zoom-hide');
+        this._canvas.style.position = 'absolute';
+        this._canvas.style.pointerEvents = 'none';
+        this._ctx = this._canvas.getContext('2d');
+        map.getPanes().overlayPane.appendChild(this._canvas);
+        map.on('resize', this._resize, this);
+        map.on('move viewreset zoomend', this._requestFrame, this);
+        this._resize();
+    },
+
+    onRemove: function (map: L.Map) {
+        map.off('resize', this._resize, this);
+        map.off('move viewreset zoomend', this._requestFrame, this);
+        if (this._frame !== null) {
+            L.Util.cancelAnimFrame(this._frame);
+            this._frame = null;
+        }
+        L.DomUtil.remove(this._canvas);
+    },
+
+    addPath: function (id: number, positions: any, options: AnimatedPathOptions) {
+        const latlngs = toLatLngs(positions);
+        const bounds = L.latLngBounds([]);
+        latlngs.forEach(line => line.forEach(latlng => bounds.extend(latlng)));
+        // Paths without positions (i.e. without valid bounds) are not drawn
+        if (!bounds.isValid()) {
+            this.removePath(id);
+            return;
+        }
+        const previous = this._paths.get(id);
+        this._paths.set(id, {latlngs, bounds, options: {}, dashArray: [], patternLength: 0, offset: previous ? previous.offset : 0});
+        this.setPathOptions(id, options);
+    },
+
+    setPathOptions: function (id: number, options: AnimatedPathOptions) {
+        const path = this._paths.get(id);
+        if (!path) return;
+        path.options = options;
+        path.dashArray = parseDashArray(options.dashArray);
+        path.patternLength = path.dashArray.reduce((a, b) => a + b, 0);
+        this._requestFrame();
+    },
+
+    removePath: function (id: number) {
+        this._paths.delete(id);
+        this._requestFrame();
+    },
+
+    isEmpty: function (): boolean {
+        return this._paths.size === 0;
+    },
+
+    _resize: function () {
+        const size = this._map.getSize();
+        const scale = window.devicePixelRatio || 1;
+        this._canvas.style.width = size.x + 'px';
+        this._canvas.style.height = size.y + 'px';
+        this._canvas.width = size.x * scale;
+        this._canvas.height = size.y * scale;
+        this._scale = scale;
+        this._requestFrame();
+    },
+
+    _requestFrame: function () {
+        if (this._frame === null && this._map) {
+            this._frame = L.Util.requestAnimFrame(this._draw, this);
+        }
+    },
+
+    _draw: function () {
+        this._frame = null;
+        const map = this._map;
+        const now = performance.now();
+        const elapsed = this._time === null ? 0 : now - this._time;
+        this._time = now;
+
+        // The canvas covers the map container, and is drawn in projected pixel coordinates
+        const topLeft = map.containerPointToLayerPoint([0, 0]);
+        L.DomUtil.setPosition(this._canvas, topLeft);
+        const origin = topLeft.add(map.getPixelOrigin());
+        const zoom = map.getZoom();
+        const bounds = map.getBounds().pad(0.1);
+        const ctx = this._ctx;
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, this._canvas.width, this._canvas.height);
+        ctx.setTransform(this._scale, 0, 0, this._scale, -origin.x * this._scale, -origin.y * this._scale);
+        ctx.lineCap = 'butt';
+        ctx.lineJoin = 'round';
+
+        let animating = false;
+        this._paths.forEach((path: AnimatedPath) => {
+            const {weight = 5, pulseColor = '#FFFFFF', delay = 400, paused = false, reverse = false} = path.options;
+            // Advance the dash offset, i.e. the pulse moves one dash pattern per delay
+            if (!paused && path.patternLength > 0) {
+                path.offset = (path.offset + elapsed / Math.max(delay, 1) * path.patternLength) % path.patternLength;
+                animating = true;
+            }
+            if (!path.bounds.isValid() || !bounds.intersects(path.bounds)) return;
+            if (path.zoom !== zoom) {
+                path.points = path.latlngs.map(line => line.map(latlng => map.project(latlng, zoom)));
+                path.zoom = zoom;
+            }
+            ctx.beginPath();
+            path.points.forEach(line => {
+                line.forEach((point, i) => i === 0 ? ctx.moveTo(point.x, point.y) : ctx.lineTo(point.x, point.y));
+            });
+            ctx.setLineDash(path.dashArray);
+            ctx.lineDashOffset = reverse ? path.offset : -path.offset;
+            ctx.lineWidth = weight;
+            ctx.strokeStyle = pulseColor;
+            ctx.stroke();
+        });
+
+        // Keep the loop running only while there are animated paths
+        if (animating) {
+            this._requestFrame();
+        } else {
+            this._time = null;
+        }
+    }
+});
+
+const animatedPathLayers = new WeakMap<L.Map, any>();
+const pathRenderers = new WeakMap<L.Map, L.Renderer>();
+
+/**
+ * Get the animated path layer shared by all paths of the map (it's added to the map on first use).
+ */
+export function getAnimatedPathLayer(map: L.Map): any {
+    let layer = animatedPathLayers.get(map);
+    if (!layer) {
+        layer = new (AnimatedPathLayer as any)();
+        animatedPathLayers.set(map, layer);
+    }
+    if (!map.hasLayer(layer)) {
+        map.addLayer(layer);
+    }
+    return layer;
+}
+
+/**
+ * Remove a path from the shared animated path layer, removing the layer itself from the map when it's empty.
+ */
+export function releaseAnimatedPath(map: L.Map, id: number) {
+    const layer = animatedPathLayers.get(map);
+    if (!layer) return;
+    layer.removePath(id);
+    if (layer.isEmpty() && map.hasLayer(layer)) {
+        map.removeLayer(layer);
+    }
+}
+
+/**
+ * Get the canvas renderer shared by the (static part of the) animated paths of the map.
+ */
+export function getPathRenderer(map: L.Map): L.Renderer {
+    let renderer = pathRenderers.get(map);
+    if (!renderer) {
+        renderer = L.canvas();
+        pathRenderers.set(map, renderer);
+    }
+    return renderer;
+}
@@ -5,6 +5,13 @@ import { useMap } from 'react-leaflet';
 import { PolylineProps, assignClickEventHandlers, ClickComponent, Modify } from "../props";
 import { StreetLabelContext } from './StreetLabels/StreetLabelContext';
 import { LabelStyle } from './StreetLabels/TextPathRenderer';
+import {
+    AnimatedPathOptions,
+    getAnimatedPathLayer,
+    getPathRenderer,
+    hashPositions,
+    releaseAnimatedPath
+} from './AnimatedPaths/AnimatedPathLayer';
 
 // Extend window to include L with antPath
 declare global {
@@ -57,6 +64,12 @@ type Props = Modify<PolylineProps, {
      */
     pathOptions?: any;
 
+    /**
+     * If true, the path is drawn as a regular (canvas rendered) polyline, and the pulse is animated on a canvas shared
+     * by all batched paths of the map, driven by a single animation loop. Recommended for large numbers of paths.
+     */
+    batched?: boolean;
+
     // Street label props
     /**
      * Text to display along the path
@@ -95,6 +108,7 @@ const AntPath = ({
     weight = 5,
     opacity = 0.5,
     pathOptions = {},
+    batched = false,
     label,
     labelStyle,
     showLabel = true,
@@ -108,8 +122,27 @@ const AntPath = ({
     // Use stable ID
     const componentId = useMemo(() => props.id || generateUniqueId(), [props.id]);
 
-    // Memoize positions to avoid unnecessary rerenders
-    const positionsKey = useMemo(() => JSON.stringify(positions), [positions]);
+    // Hash positions (once per positions object) to avoid unnecessary rerenders
+    const positionsKey = useMemo(() => hashPositions(positions), [positions]);
+
+    // Options of the pulse animation, when batched
+    const animationOptions = (): AnimatedPathOptions => {
+        const options = {weight, pulseColor, delay, dashArray, reverse, ...pathOptions};
+        return {
+            weight: options.weight,
+            pulseColor: options.pulseColor,
+            delay: options.delay,
+            dashArray: options.dashArray,
+            paused,
+            reverse: options.reverse
+        };
+    };
+
+    // Style of the (static) polyline, when batched
+    const polylineStyle = () => {
+        const {pulseColor, delay, dashArray, paused, reverse, hardwareAccelerated, ...style} = pathOptions;
+        return {color, weight, opacity, ...style};
+    };
 
     // Register label with context
     useEffect(() => {
@@ -141,6 +174,26 @@ const AntPath = ({
 
     // Create the AntPath instance (only when map or positions change)
     useEffect(() => {
+        if (map && batched) {
+            // The polyline is drawn by a shared canvas renderer, and the pulse by the shared animated path layer
+            const polyline = L.polyline(positions as any, {...polylineStyle(), renderer: getPathRenderer(map)});
+            const handlers = assignClickEventHandlers(props);
+            if (handlers.eventHandlers) {
+                Object.entries(handlers.eventHandlers).forEach(([event, handler]) => {
+                    polyline.on(event, handler as L.LeafletEventHandlerFn);
+                });
+            }
+            polyline.addTo(map);
+            antPathRef.current = polyline;
+            const id = L.Util.stamp(polyline);
+            getAnimatedPathLayer(map).addPath(id, positions, animationOptions());
+            return () => {
+                releaseAnimatedPath(map, id);
+                map.removeLayer(polyline);
+                antPathRef.current = null;
+            };
+        }
+
         if (!map || !window.L?.Polyline?.AntPath) {
             console.warn('AntPath: Map or L.Polyline.AntPath not available');
             return;
@@ -187,7 +240,13 @@ const AntPath = ({
             }
             antPathRef.current = null;
         };
-    }, [map, positionsKey]); // Only recreate when map or positions change
+    }, [map, positionsKey, batched]); // Only recreate when map or positions change
+
+    // Update the pulse animation, when batched
+    useEffect(() => {
+        if (!antPathRef.current || !batched) return;
+        getAnimatedPathLayer(map).setPathOptions(L.Util.stamp(antPathRef.current), animationOptions());
+    }, [paused, reverse, weight, pulseColor, delay, dashArray, pathOptions]);
 
     // Update animation properties
     useEffect(() => {
@@ -214,6 +273,11 @@ const AntPath = ({
     useEffect(() => {
         if (!antPathRef.current || !antPathRef.current.setStyle) return;
 
+        if (batched) {
+            antPathRef.current.setStyle(polylineStyle());
+            return;
+        }
+
         const styleOptions: any = {};
 
         if (color !== undefined) styleOptions.color = color;
@@ -16,6 +16,33 @@ type Props = Modify<EditControlProps, {
         type: string;
         features: object[]
     },
+    /**
+     * If "delta", edits are reported via the geojsonDelta property (rather than via the geojson property, which is then
+     * only updated on request, see requestGeojson). Default value is "full".
+     */
+    geojsonMode?: "full" | "delta",
+    /**
+     * The features added, changed, and removed (leaflet ids) by the latest action (only in "delta" mode).
+     */
+    geojsonDelta?: {
+        added: object[],
+        changed: object[],
+        removed: number[],
+        n_deltas: number
+    },
+    /**
+     * Change the value to update the geojson property with the current features (useful in "delta" mode).
+     */
+    requestGeojson?: string | number | object,
+    /**
+     * Set this prop to load features (e.g. a saved plan) into the control in bulk, replacing the current features. The
+     * feature properties (as in the geojson property, e.g. type, color, emoji, and mRadius) determine the layer types
+     * and styles. Combine with lazyEditHandles for large numbers of features.
+     */
+    loadGeojson?: {
+        type: string;
+        features: object[]
+    },
     /**
      * Current color to apply to new shapes.
      */
@@ -66,25 +93,39 @@ const EditControl = ({
     ...props
 }: Props) => {
     const layerRef = useRef<{[key: string]: StylableLayer}>({});
+    const featureMapRef = useRef<Map<number, GeoJSONFeature>>(new Map());
+    const featureGroupRef = useRef<L.FeatureGroup | null>(null);
     const [lastFeatureId, setLastFeatureId] = useState<number | null>(null);
 
     const nProps = Object.assign(props, {geojson: geojson});
     robustifySetProps(nProps)
     const customEventHandlers = (props.eventHandlers == undefined) ? {} : resolveAllProps(props.eventHandlers, props);
-    const defaultEventHandlers = props.disableDefaultEventHandlers ? {} : _getDefaultEventHandlers(props, layerRef, currentColor, currentEmoji, lastFeatureId, setLastFeatureId);
+    const defaultEventHandlers = props.disableDefaultEventHandlers ? {} : _getDefaultEventHandlers(props, layerRef, featureMapRef, featureGroupRef, currentColor, currentEmoji, lastFeatureId, setLastFeatureId);
 
     nProps.eventHandlers = mergeEventHandlers(defaultEventHandlers, customEventHandlers)
 
+    // Emit the full geojson on request.
+    useEffect(() => {
+        if (props.requestGeojson !== undefined) {
+            props.setProps({geojson: _makeGeojson(_collectFeatures(featureMapRef.current))});
+        }
+    }, [props.requestGeojson]);
+
+    // Load features in bulk. If the control is not mounted yet, the features are loaded on mount.
+    useEffect(() => {
+        if (props.loadGeojson !== undefined && featureGroupRef.current) {
+            _loadGeojson(props, featureGroupRef.current, props.loadGeojson, layerRef, featureMapRef);
+        }
+    }, [props.loadGeojson]);
+
     // Update ONLY the last created feature when color or emoji changes
     useEffect(() => {
-        if (!nProps.geojson || !nProps.geojson.features || lastFeatureId === null) {
+        if (lastFeatureId === null) {
             return;
         }
 
         // Find the last created feature
-        const lastFeature = (nProps.geojson.features as GeoJSONFeature[]).find(
-            feature => feature.properties?.leafletId === lastFeatureId
-        );
+        const lastFeature = featureMapRef.current.get(lastFeatureId);
 
         if (!lastFeature) {
             return;
@@ -116,10 +157,7 @@ const EditControl = ({
         }
 
         // Update the geojson with the modified feature
-        const updatedFeatures = nProps.geojson.features.map((f: GeoJSONFeature) =>
-            f.properties.leafletId === lastFeatureId ? lastFeature : f
-        );
-        props.setProps({geojson: {type: "FeatureCollection", features: updatedFeatures}});
+        _emitChanges(props, featureMapRef.current, {changed: [lastFeature]});
 
     }, [currentColor, currentEmoji]); // Remove geojson from dependencies to avoid infinite loop
 
@@ -187,6 +225,8 @@ function createEmojiIcon(emoji: string) {
 function _getDefaultEventHandlers(
     props,
     layerRef: React.MutableRefObject<{[key: string]: StylableLayer}>,
+    featureMapRef: React.MutableRefObject<Map<number, GeoJSONFeature>>,
+    featureGroupRef: React.MutableRefObject<L.FeatureGroup | null>,
     currentColor: string,
     currentEmoji: string,
     lastFeatureId: number | null,
@@ -228,7 +268,8 @@ function _getDefaultEventHandlers(
         }
 
         const feature = _makeFeature(properties, layer);
-        props.setProps({geojson: _makeGeojson(props.geojson.features.concat([feature]))});
+        featureMapRef.current.set(id, feature);
+        _emitChanges(props, featureMapRef.current, {added: [feature]});
     }
 
     eventHandlers["draw:edited"] = (e) => {
@@ -237,30 +278,39 @@ function _getDefaultEventHandlers(
         if (editedLayers.length === 1) {
             setLastFeatureId(parseInt(editedLayers[0]));
         }
-        props.setProps({geojson: _makeGeojson(_updateFeatures(e, props.geojson.features))});
+        _emitChanges(props, featureMapRef.current, {changed: _updateFeatures(e, featureMapRef.current)});
     }
 
     eventHandlers["draw:deleted"] = (e) => {
         Object.keys(e.layers._layers).forEach(id => {
             delete layerRef.current[id];
+            featureMapRef.current.delete(parseInt(id));
             // If we deleted the last feature, clear the lastFeatureId
             if (parseInt(id) === lastFeatureId) {
                 setLastFeatureId(null);
             }
         });
-        props.setProps({geojson: _makeGeojson(_updateFeatures(e, props.geojson.features))});
+        _emitChanges(props, featureMapRef.current, {removed: Object.keys(e.layers._layers).map(id => parseInt(id))});
     }
 
     eventHandlers["draw:mounted"] = (e) => {
         setTimeout(function () {
             const features = []
             let layers = e.instance.options.edit.featureGroup._layers;
+            featureGroupRef.current = e.instance.options.edit.featureGroup;
+            featureMapRef.current.clear();
             Object.keys(layers).forEach((key) => {
                 const layer = layers[key] as StylableLayer;
+                const feature = _makeFeature({type: 'mount', leafletId: parseInt(key)}, layer);
                 layerRef.current[key] = layer;
-                features.push(_makeFeature({type: 'mount'}, layer));
+                featureMapRef.current.set(parseInt(key), feature);
+                features.push(feature);
             })
-            props.setProps({geojson: _makeGeojson(features)});
+            if (props.loadGeojson !== undefined) {
+                _loadGeojson(props, featureGroupRef.current, props.loadGeojson, layerRef, featureMapRef);
+                return;
+            }
+            _emitChanges(props, featureMapRef.current, {added: features});
         }, 1);
     }
 
@@ -354,30 +404,102 @@ function _makeGeojson(features) {
     return {type: "FeatureCollection", features: features}
 }
 
-function _updateFeatures(e, features) {
-    const featureMap = {};
+function _makeLayer(feature) {
+    const properties = feature.properties || {};
+    const geometry = feature.geometry;
+    if (!geometry) {
+        return null;
+    }
+    const style = !properties.color ? {} : {
+        color: properties.color,
+        fillColor: properties.color,
+        opacity: 0.5,
+        fillOpacity: 0.2,
+        weight: 4
+    };
+    switch (geometry.type) {
+        case "Point": {
+            const latlng = L.GeoJSON.coordsToLatLng(geometry.coordinates);
+            if (properties.type === "circle" && properties.mRadius !== undefined) {
+                return L.circle(latlng, {...style, radius: properties.mRadius});
+            }
+            if (properties.type === "circlemarker") {
+                return L.circleMarker(latlng, {...style, radius: properties.radius});
+            }
+            return properties.emoji ? L.marker(latlng, {icon: createEmojiIcon(properties.emoji)}) : L.marker(latlng);
+        }
+        case "LineString":
+            return L.polyline(L.GeoJSON.coordsToLatLngs(geometry.coordinates, 0), style);
+        case "Polygon": {
+            const latlngs = L.GeoJSON.coordsToLatLngs(geometry.coordinates, 1);
+            return properties.type === "rectangle" ? L.rectangle(L.latLngBounds(latlngs[0]), style) : L.polygon(latlngs, style);
+        }
+        default:
+            return null;
+    }
+}
+
+function _loadGeojson(props, featureGroup, geojson, layerRef, featureMapRef) {
+    // Replace the current features.
+    const removed = [];
+    featureMapRef.current.forEach((feature, leafletId) => removed.push(leafletId));
+    featureGroup.clearLayers();
+    layerRef.current = {};
+    featureMapRef.current.clear();
+    // Create all layers (and the corresponding features) first, then add them to the map.
+    const layers = [];
+    const added = [];
+    (geojson.features || []).forEach(f => {
+        const layer = _makeLayer(f);
+        if (!layer) {
+            return;
+        }
+        const id = L.Util.stamp(layer);
+        const feature = _makeFeature({...f.properties, leafletId: id}, layer);
+        layerRef.current[id] = layer;
+        featureMapRef.current.set(id, feature);
+        layers.push(layer);
+        added.push(feature);
+    });
+    layers.forEach(layer => featureGroup.addLayer(layer));
+    _emitChanges(props, featureMapRef.current, {added: added, removed: removed});
+}
+
+function _collectFeatures(featureMap: Map<number, GeoJSONFeature>) {
+    const features = [];
+    featureMap.forEach(feature => features.push(feature));
+    return features;
+}
+
+function _updateFeatures(e, featureMap: Map<number, GeoJSONFeature>) {
+    // Recreate the features of the edited layers (keeping their properties), and return them.
+    const changed = [];
     Object.keys(e.layers._layers).forEach((key) => {
         const layer = e.layers._layers[key];
-        const existingFeature = features.find(f => f.properties.leafletId === parseInt(key));
+        const leafletId = parseInt(key);
+        const existingFeature = featureMap.get(leafletId);
         const properties = existingFeature ? {...existingFeature.properties} : {};
-        featureMap[key] = _makeFeature(properties, layer);
+        const feature = _makeFeature(properties, layer);
+        featureMap.set(leafletId, feature);
+        changed.push(feature);
     });
+    return changed
+}
 
-    const updatedFeatures = []
-    for (const feature of features) {
-        let leafletId = feature.properties.leafletId;
-        if (!(leafletId in featureMap)) {
-            updatedFeatures.push(feature);
-            continue;
-        }
-        if (e.type === "draw:deleted") {
-            continue;
-        }
-        if (e.type === "draw:edited") {
-            updatedFeatures.push(featureMap[leafletId]);
-        }
+function _emitChanges(props, featureMap: Map<number, GeoJSONFeature>, delta: {added?: object[], changed?: object[], removed?: number[]}) {
+    // In "delta" mode, only the changes are reported. Otherwise, the full geojson is reported.
+    if (props.geojsonMode === "delta") {
+        props.setProps({
+            geojsonDelta: {
+                added: delta.added || [],
+                changed: delta.changed || [],
+                removed: delta.removed || [],
+                n_deltas: props.geojsonDelta == undefined ? 1 : props.geojsonDelta.n_deltas + 1
+            }
+        });
+        return;
     }
-    return updatedFeatures
+    props.setProps({geojson: _makeGeojson(_collectFeatures(featureMap))});
 }
 
-export default EditControl;
\ No newline at end of file
+export default EditControl;
@@ -42,7 +42,9 @@ function _getDefaultEventHandlers(props: Props) {
         click: (e: LeafletMouseEvent) => {
             props.setProps({
                 n_clicks: props.n_clicks == undefined ? 1 : props.n_clicks + 1,
-                clickData: _getFeature(e)
+                clickData: _getFeature(e),
+                // Cleared, so that the popup opens at the new location, even if the content resolved is unchanged
+                ...(props.delegatePopups ? {popupContent: undefined} : {})
             })
         },
         dblclick: (e: LeafletMouseEvent) => {
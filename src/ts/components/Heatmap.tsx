@@ -0,0 +1,17 @@
+import React from 'react';
+import {Heatmap as ReactLeafletHeatmap, HeatmapProps} from '../react-leaflet/Heatmap';
+import {DashComponent, Modify} from "../props";
+
+type Props = Modify<HeatmapProps, DashComponent>;
+
+/**
+ * Heatmap draws the density of (weighted) points via WebGL, accumulating the point kernels with additive blending.
+ * Pass raw points, or a pre-binned grid created with dash_leaflet.express.points_to_heatmap_grid for large data.
+ */
+const Heatmap = (props: Props) => {
+    return (
+        <ReactLeafletHeatmap {...props}></ReactLeafletHeatmap>
+    )
+}
+
+export default Heatmap;
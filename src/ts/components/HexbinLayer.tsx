@@ -0,0 +1,36 @@
+import React from 'react';
+import {LeafletMouseEvent} from "leaflet";
+import {HexbinLayer as ReactLeafletHexbinLayer, HexbinLayerProps} from '../react-leaflet/HexbinLayer';
+import {ClickComponent, Modify, resolveAllProps} from "../props";
+import {mergeEventHandlers} from '../utils';
+
+type Props = Modify<HexbinLayerProps, ClickComponent>;
+
+/**
+ * HexbinLayer aggregates points (count, sum, or mean of a property) into hexagonal or square bins, which are
+ * recomputed in a web worker as the map is zoomed, and cached per zoom level. Alternatively, the bins can be
+ * computed server side via dash_leaflet.express.points_to_hexbins. Click events report the bin.
+ */
+const HexbinLayer = (props: Props) => {
+    const nProps = Object.assign({}, props);
+    // Add event handlers.
+    const defaultEventHandlers = props.disableDefaultEventHandlers ? {} : _getDefaultEventHandlers(props);
+    const customEventHandlers = (props.eventHandlers == undefined) ? {} : resolveAllProps(props.eventHandlers, props);
+    nProps.eventHandlers = mergeEventHandlers(defaultEventHandlers, customEventHandlers)
+    return (
+        <ReactLeafletHexbinLayer {...nProps}></ReactLeafletHexbinLayer>
+    )
+}
+
+function _getDefaultEventHandlers(props: Props) {
+    return {
+        click: (e: LeafletMouseEvent & { bin: object }) => {
+            props.setProps({
+                n_clicks: props.n_clicks == undefined ? 1 : props.n_clicks + 1,
+                clickData: {...e.bin, latlng: [e.latlng.lat, e.latlng.lng]}
+            })
+        }
+    }
+}
+
+export default HexbinLayer;
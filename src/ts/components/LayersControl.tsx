@@ -1,6 +1,15 @@
-import React, {useEffect} from 'react';
-import {LayersControl as ReactLeafletLayersControl, useMapEvents} from 'react-leaflet';
+import React, {createContext, useContext, useEffect, useMemo, useRef, useState} from 'react';
+import {LayerGroup, LayersControl as ReactLeafletLayersControl, useMapEvents} from 'react-leaflet';
 import {LayersControlProps, DashComponent, Modify} from "../props";
+import L from "leaflet";
+
+type OverlayStats = {
+    loaded: boolean,
+    n_loads: number,
+    n_unloads: number,
+    layers: number,
+    vertices: number
+};
 
 export type Props = Modify<LayersControlProps, {
     /**
@@ -12,8 +21,122 @@ export type Props = Modify<LayersControlProps, {
      * Names of the currently selected overlays. [DL]
      */
     overlays?: string[]
+
+    /**
+     * If true, the children of unchecked overlays are not mounted (i.e. no data is loaded) until the overlay is
+     * added for the first time. [DL]
+     */
+    lazyOverlays?: boolean,
+
+    /**
+     * If set (and lazyOverlays is true), the children of an overlay are unmounted (i.e. their data is released) when the
+     * overlay has been removed for this many milliseconds. They are mounted again when the overlay is added. [DL]
+     */
+    unloadDelay?: number,
+
+    /**
+     * Load statistics of the lazy overlays (if lazyOverlays is true), keyed by overlay name, i.e. whether the
+     * overlay is loaded, the number of loads/unloads, and the number of (leaflet) layers and vertices released
+     * on the latest unload. [DL]
+     */
+    overlayStats?: { [name: string]: OverlayStats }
 } & DashComponent>;
 
+type LazyOverlayOptions = {
+    unloadDelay?: number,
+    onLoad: (name: string) => void,
+    onUnload: (name: string, size: { layers: number, vertices: number }) => void
+};
+
+const LazyOverlayContext = createContext<LazyOverlayOptions | null>(null);
+
+function measureLayers(layer, size = {layers: 0, vertices: 0}) {
+    if (layer.eachLayer) {
+        layer.eachLayer(child => measureLayers(child, size));
+        return size;
+    }
+    size.layers += 1;
+    // Vertices of (possibly nested) polylines/polygons, or one for point layers
+    const count = (latlngs) => Array.isArray(latlngs) ? latlngs.reduce((n, item) => n + count(item), 0) : 1;
+    size.vertices += layer.getLatLngs ? count(layer.getLatLngs()) : 1;
+    return size;
+}
+
+/**
+ * Content of a lazy overlay, i.e. a layer group that mounts the children when added to the map for the first time,
+ * and (optionally) unmounts them when the overlay has been removed for a while.
+ */
+const LazyOverlayContent = ({name, checked, children, options}) => {
+    const [loaded, setLoaded] = useState(!!checked);
+    const loadedRef = useRef(!!checked);
+    const groupRef = useRef<L.LayerGroup>(null);
+    const timerRef = useRef<any>(null);
+    const mountedRef = useRef(true);
+    const optionsRef = useRef<LazyOverlayOptions>(options);
+    optionsRef.current = options;
+    const clearTimer = () => {
+        if (timerRef.current !== null) {
+            clearTimeout(timerRef.current);
+            timerRef.current = null;
+        }
+    }
+    const eventHandlers = useMemo(() => ({
+        add: () => {
+            clearTimer();
+            if (!loadedRef.current) {
+                loadedRef.current = true;
+                optionsRef.current.onLoad(name);
+                setLoaded(true);
+            }
+        },
+        remove: () => {
+            const {unloadDelay} = optionsRef.current;
+            // The group is also removed when the overlay itself unmounts, in which case there is nothing to unload.
+            if (!mountedRef.current || unloadDelay === undefined || unloadDelay === null) {
+                return;
+            }
+            clearTimer();
+            timerRef.current = setTimeout(() => {
+                timerRef.current = null;
+                loadedRef.current = false;
+                optionsRef.current.onUnload(name, measureLayers(groupRef.current));
+                setLoaded(false);
+            }, unloadDelay);
+        }
+    }), [name]);
+    useEffect(() => {
+        // Overlays that start checked are loaded right away (rather than on add).
+        if (loadedRef.current) {
+            optionsRef.current.onLoad(name);
+        }
+        return () => {
+            mountedRef.current = false;
+            clearTimer();
+        };
+    }, []);
+    return (
+        <LayerGroup ref={groupRef} eventHandlers={eventHandlers}>{loaded ? children : null}</LayerGroup>
+    )
+}
+
+/**
+ * Overlay that defers mounting of its children (if lazy overlays are enabled in the parent LayersControl).
+ */
+const LazyOverlay = (props) => {
+    const options = useContext(LazyOverlayContext);
+    if (options === null) {
+        return <ReactLeafletLayersControl.Overlay {...props}></ReactLeafletLayersControl.Overlay>
+    }
+    const {children, ...overlayProps} = props;
+    return (
+        <ReactLeafletLayersControl.Overlay {...overlayProps}>
+            <LazyOverlayContent name={props.name} checked={props.checked} options={options}>
+                {children}
+            </LazyOverlayContent>
+        </ReactLeafletLayersControl.Overlay>
+    )
+}
+
 /**
  * The layers control gives users the ability to switch between different base layers and switch overlays on/off.
  */
@@ -21,7 +144,7 @@ const LayersControl = (props: Props) => {
     // Inject components into window.
     const dash_leaflet = Object.assign({}, window["dash_leaflet"]);
     dash_leaflet["BaseLayer"] = ReactLeafletLayersControl.BaseLayer;
-    dash_leaflet["Overlay"] = ReactLeafletLayersControl.Overlay;
+    dash_leaflet["Overlay"] = LazyOverlay;
     window["dash_leaflet"] = dash_leaflet;
     // Bind events.
     const eventHandlers = {
@@ -36,6 +159,18 @@ const LayersControl = (props: Props) => {
         },
     }
     useMapEvents(eventHandlers)
+    // Track the load statistics of the lazy overlays.
+    const statsRef = useRef<{ [name: string]: OverlayStats }>({});
+    const updateStats = (name: string, update: (stats: OverlayStats) => Partial<OverlayStats>) => {
+        const stats = statsRef.current[name] || {loaded: false, n_loads: 0, n_unloads: 0, layers: 0, vertices: 0};
+        statsRef.current = {...statsRef.current, [name]: {...stats, ...update(stats)}};
+        props.setProps({overlayStats: statsRef.current});
+    }
+    const lazyOptions: LazyOverlayOptions | null = !props.lazyOverlays ? null : {
+        unloadDelay: props.unloadDelay,
+        onLoad: (name) => updateStats(name, stats => ({loaded: true, n_loads: stats.n_loads + 1})),
+        onUnload: (name, size) => updateStats(name, stats => ({loaded: false, n_unloads: stats.n_unloads + 1, ...size}))
+    };
     // Derive initial values.
     useEffect(() => {
         const overlays = [];
@@ -57,8 +192,11 @@ const LayersControl = (props: Props) => {
         })
     }, []);
     // Render the component.
+    const {lazyOverlays, unloadDelay, overlayStats, ...controlProps} = props;
     return (
-        <ReactLeafletLayersControl {...props}></ReactLeafletLayersControl>
+        <LazyOverlayContext.Provider value={lazyOptions}>
+            <ReactLeafletLayersControl {...controlProps}></ReactLeafletLayersControl>
+        </LazyOverlayContext.Provider>
     )
 }
 
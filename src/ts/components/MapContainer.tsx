@@ -1,4 +1,4 @@
-import React, {useEffect} from 'react';
+import React, {useEffect, useRef} from 'react';
 import {MapContainer as LeafletMapContainer, useMapEvents} from 'react-leaflet';
 import {resolveCRS, resolveEventHandlers, resolveRenderer} from '../utils';
 // Force loading of basic leaflet CSS.
@@ -25,31 +25,112 @@ const deltaZoomCenter = (map, zoom, center) => {
    return delta
 }
 
+const snapBounds = (map, bounds, tileSize = 256) => {
+    // Expand the bounds to the edges of the (visible) tiles at the current zoom level.
+    const zoom = Math.round(map.getZoom());
+    const nw = map.project(bounds.getNorthWest(), zoom).divideBy(tileSize).floor().multiplyBy(tileSize);
+    const se = map.project(bounds.getSouthEast(), zoom).divideBy(tileSize).ceil().multiplyBy(tileSize);
+    return L.latLngBounds(map.unproject(nw, zoom), map.unproject(se, zoom));
+}
+
 const trackViewport = (map, props) => {
+    const options = props.trackViewportOptions || {};
+    let bounds = map.getBounds()
     const delta = deltaZoomCenter(map, props.zoom, props.center);
+    // If snapping is enabled, only the zoom and (snapped) bounds decide if the view changed.
+    if(options.snapBounds){
+        bounds = snapBounds(map, bounds, options.tileSize);
+        if(!('zoom' in delta) && props.bounds && bounds.equals(L.latLngBounds(props.bounds))){
+            return
+        }
+        delta['center'] = map.getCenter()
+    }
    // If the view didn't change, don't update anything.
     if(isEmpty(delta)){
        return
     }
    // Otherwise, issue the update.
-    const bounds = map.getBounds()
     delta['bounds'] = [[bounds.getSouth(), bounds.getWest()], [bounds.getNorth(), bounds.getEast()]]
     props.setProps(delta)
 }
 
 function EventSubscriber(props) {
+    const propsRef = useRef(props);
+    const timerRef = useRef<any>(null);
+    const lastReportRef = useRef(0);
+    const echoRef = useRef<string>(null);
+    const echoTimerRef = useRef(null);
+    propsRef.current = props;
+    // Viewport updates are debounced/throttled according to the trackViewportOptions.
+    const reportViewport = () => {
+        timerRef.current = null;
+        lastReportRef.current = Date.now();
+        trackViewport(map, propsRef.current);
+    }
+    const scheduleViewport = () => {
+        const {debounce = 0, throttle = 0} = props.trackViewportOptions || {};
+        if(timerRef.current !== null){
+            // When debouncing, the pending update is postponed, when throttling, it's just left pending.
+            if(!debounce){
+                return;
+            }
+            clearTimeout(timerRef.current);
+        }
+        const wait = Math.max(debounce, lastReportRef.current + throttle - Date.now());
+        if(wait <= 0){
+            reportViewport();
+            return;
+        }
+        timerRef.current = setTimeout(reportViewport, wait);
+    }
+    // Mark the next move as an echo of a viewport change issued via the props (if echoes are suppressed). The change
+    // starts the move right away (or on the next animation frame, when zooming), so if it doesn't (e.g. if the map
+    // didn't need to move), the mark is cleared shortly after, i.e. it doesn't swallow the next move of the user.
+    const expectEcho = () => {
+        clearTimeout(echoTimerRef.current);
+        if(!(props.trackViewportOptions && props.trackViewportOptions.suppressEcho)){
+            echoRef.current = null;
+            return;
+        }
+        echoRef.current = "pending";
+        echoTimerRef.current = setTimeout(() => {
+            if(echoRef.current === "pending"){
+                echoRef.current = null;
+            }
+        }, 100);
+    }
     const eventHandlers = resolveEventHandlers(props, ["click", "dblclick", "keydown", "load"])
     const map = useMapEvents(Object.assign(eventHandlers, !props.trackViewport? {} : {
+        movestart: (e) => {
+            if(echoRef.current === "pending"){
+                echoRef.current = "moving";
+            }
+        },
         moveend: (e) => {
-            trackViewport(map, props);
+            if(echoRef.current !== null){
+                echoRef.current = null;
+                return;
+            }
+            scheduleViewport();
         }
     }));
-    if(props.trackViewport) {
+
+    useEffect(function initViewport(){
+        if(!props.trackViewport){
+            return;
+        }
         map.whenReady(() => {
             // The setTimeout ensures map is rendered before initial viewport tracking call.
-            setTimeout(()=>{trackViewport(map, props)}, 0);
+            setTimeout(()=>{trackViewport(map, propsRef.current)}, 0);
         })
-    }
+        return function clearTimer(){
+            if(timerRef.current !== null){
+                clearTimeout(timerRef.current);
+                timerRef.current = null;
+            }
+            clearTimeout(echoTimerRef.current);
+        }
+    }, [])
 
     useEffect(function invalidateSize(){
         if(props.invalidateSize !== undefined){
@@ -67,11 +148,10 @@ function EventSubscriber(props) {
             bounds = new L.LatLngBounds(bounds)
             // Check if update is needed.
             if(map.getBounds().equals(bounds)){
-                console.log("BREAK BOUNDS CHANGE")
                 return;
             }
             // Issue the update.
-            console.log("ISSUE BOUNDS UPDATE")
+            expectEcho();
             switch (transition) {
                 case 'flyToBounds':
                     map.flyToBounds(bounds, options)
@@ -94,10 +174,10 @@ function EventSubscriber(props) {
         const delta = deltaZoomCenter(map, zoom, center)
         // Check if an update is missing.
         if(isEmpty(delta)){
-            console.log("BREAK CENTER/ZOOM CHANGE")
+            return;
         }
         // Issue the update.
-        console.log("ISSUE CENTER/ZOOM CHANGE")
+        expectEcho();
         switch (transition) {
             case 'flyTo':
                 map.flyTo(center, zoom, options)
@@ -117,6 +197,7 @@ function EventSubscriber(props) {
         if(props.zoom == map.getZoom()){
             return;
         }
+        expectEcho();
         map.setZoom(props.zoom);
     }, [props.zoom])
 
@@ -127,6 +208,7 @@ function EventSubscriber(props) {
         if(L.latLng(props.center).equals(map.getCenter())){
             return;
         }
+        expectEcho();
         map.setView(props.center);
     }, [props.center])
 
@@ -178,6 +260,21 @@ type Props = Modify<MapContainerProps, {
      * If true (default), zoom, center, and bounds properties are updated on whenReady/moveend. [DL]
      */
     trackViewport?: boolean;
+
+    /**
+     * Options controlling how often the viewport (zoom, center, and bounds) is reported when trackViewport is true.
+     * Set "debounce" (ms) to report only when the map has been idle for that long, and/or "throttle" (ms) to report at
+     * most once per interval. If "snapBounds" is true, the bounds are expanded to the tile grid (of size "tileSize",
+     * default 256) at the current zoom, and updates are only issued when the zoom or the snapped bounds change. If
+     * "suppressEcho" is true, moves caused by the viewport/zoom/center properties are not reported back. [DL]
+     */
+    trackViewportOptions?: {
+        debounce?: number,
+        throttle?: number,
+        snapBounds?: boolean,
+        tileSize?: number,
+        suppressEcho?: boolean
+    };
 }  & DashComponent & ClickEvents & LoadEvents & KeyboardEvents>;
 
 /**
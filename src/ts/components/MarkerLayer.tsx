@@ -0,0 +1,49 @@
+import React from 'react';
+import {LeafletMouseEvent} from "leaflet";
+import {MarkerLayer as ReactLeafletMarkerLayer, MarkerLayerProps, getMarkerIndex} from '../react-leaflet/MarkerLayer';
+import {ClickComponent, Modify, resolveAllProps} from "../props";
+import {mergeEventHandlers} from '../utils';
+
+type Props = Modify<MarkerLayerProps, ClickComponent>;
+
+/**
+ * MarkerLayer draws many markers from arrays of positions and icon keys (with icons shared via an icon registry),
+ * avoiding the overhead of a Marker component per marker. Markers are updated in place (matched by id) when the
+ * arrays change, and click events report the index and id of the marker.
+ */
+const MarkerLayer = (props: Props) => {
+    const nProps = Object.assign({}, props);
+    // Add event handlers.
+    const defaultEventHandlers = props.disableDefaultEventHandlers ? {} : _getDefaultEventHandlers(props);
+    const customEventHandlers = (props.eventHandlers == undefined) ? {} : resolveAllProps(props.eventHandlers, props);
+    nProps.eventHandlers = mergeEventHandlers(defaultEventHandlers, customEventHandlers)
+    return (
+        <ReactLeafletMarkerLayer {...nProps}></ReactLeafletMarkerLayer>
+    )
+}
+
+function _getDefaultEventHandlers(props: Props) {
+    return {
+        click: (e: LeafletMouseEvent) => {
+            props.setProps({
+                n_clicks: props.n_clicks == undefined ? 1 : props.n_clicks + 1,
+                clickData: _getMarker(e)
+            })
+        },
+        dblclick: (e: LeafletMouseEvent) => {
+            props.setProps({
+                n_dblclicks: props.n_dblclicks == undefined ? 1 : props.n_dblclicks + 1,
+                dblclickData: _getMarker(e)
+            })
+        }
+    }
+}
+
+function _getMarker(e: LeafletMouseEvent) {
+    // The event is propagated from the marker to the layer (group).
+    const marker = (e as any).propagatedFrom || e.layer;
+    const latlng = e.latlng;
+    return {...getMarkerIndex(marker), latlng: [latlng.lat, latlng.lng]};
+}
+
+export default MarkerLayer;
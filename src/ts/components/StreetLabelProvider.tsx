@@ -1,6 +1,8 @@
 // src/ts/components/StreetLabelProvider.tsx
 import React from 'react';
 import { StreetLabelProvider as Provider } from './StreetLabels/StreetLabelContext';
+import { LabelStyle } from './StreetLabels/TextPathRenderer';
+import { LabelSource } from './StreetLabels/labelSource';
 import { DashComponent, Modify } from '../props';
 
 type Props = Modify<{
@@ -13,6 +15,51 @@ type Props = Modify<{
    * Enable collision detection for labels to prevent overlapping
    */
   collisionDetection?: boolean;
+
+  /**
+   * Render the labels on an OffscreenCanvas in a web worker (if supported by the browser), keeping the layout,
+   * collision detection and text rendering off the main thread. Falls back to main thread rendering otherwise.
+   */
+  offscreen?: boolean;
+
+  /**
+   * Bulk label source, i.e. a GeoJSON FeatureCollection of LineString/MultiLineString features, or a binary buffer as
+   * created by dash_leaflet.express.geojson_to_label_buffer. Labels are rendered along all lines, without the need for
+   * a Polyline component per line.
+   */
+  data?: LabelSource;
+
+  /**
+   * The feature property holding the label text (for GeoJSON data). Default value is "name".
+   */
+  labelProperty?: string;
+
+  /**
+   * Styling options for the labels of the bulk label source.
+   */
+  labelStyle?: LabelStyle;
+
+  /**
+   * If true, glyphs are rasterized once per style (fill and halo) into a glyph atlas, and labels are composited from
+   * the atlas via drawImage, rather than drawing the text of each label. Applies to main thread rendering only.
+   */
+  glyphAtlas?: boolean;
+
+  /**
+   * If true, statistics of each render pass are reported via the renderStats property.
+   */
+  reportRenderStats?: boolean;
+
+  /**
+   * Statistics of the latest render pass (if reportRenderStats is true), i.e. the number of labels drawn, the number
+   * of candidate labels in view, the render time (ms), and the number of render passes. [DL]
+   */
+  renderStats?: {
+    labels: number,
+    candidates: number,
+    ms: number,
+    n_renders: number
+  };
 }, DashComponent>;
 
 /**
@@ -21,7 +68,9 @@ type Props = Modify<{
  */
 const StreetLabelProvider = (props: Props) => {
   return (
-    <Provider collisionDetection={props.collisionDetection}>
+    <Provider collisionDetection={props.collisionDetection} offscreen={props.offscreen} data={props.data}
+              labelProperty={props.labelProperty} labelStyle={props.labelStyle} glyphAtlas={props.glyphAtlas}
+              onRenderStats={props.reportRenderStats ? (renderStats => props.setProps({renderStats})) : undefined}>
       {props.children}
     </Provider>
   );
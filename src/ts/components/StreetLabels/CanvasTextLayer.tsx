@@ -1,9 +1,11 @@
 // src/components/StreetLabels/CanvasTextLayer.tsx
-import React, { useEffect, useRef, useMemo } from 'react';
+import React, { useEffect, useRef } from 'react';
 import { useMap } from 'react-leaflet';
 import L from 'leaflet';
-import { TextPathRenderer, LabelStyle } from './TextPathRenderer';
+import RBush from 'rbush';
+import { TextPathRenderer, TextPathLayout, LabelStyle } from './TextPathRenderer';
 import { LabelCollisionManager } from './LabelCollisionManager';
+import { createLabelWorker, LabelWorkerLabel } from './LabelWorker';
 import './street-labels.css'; // Import the CSS styles
 
 interface CanvasTextLayerProps {
@@ -13,12 +15,88 @@ interface CanvasTextLayerProps {
     label?: string;
     labelStyle?: LabelStyle;
   }>;
+  // Incremented whenever the polylines change
+  version?: number;
   collisionDetection?: boolean;
+  offscreen?: boolean;
+  glyphAtlas?: boolean;
+  onRenderStats?: (stats: RenderStats) => void;
+}
+
+export interface RenderStats {
+  // Number of labels drawn
+  labels: number;
+  // Number of labels in view (before zoom constraints and collision detection)
+  candidates: number;
+  // Time spent on the render pass (ms)
+  ms: number;
+  n_renders: number;
+}
+
+interface PolylineItem {
+  minX: number;
+  minY: number;
+  maxX: number;
+  maxY: number;
+  order: number;
+  latlngs: L.LatLng[];
+  polyline: CanvasTextLayerProps['polylines'][number];
+}
+
+interface CachedLayout {
+  polyline: CanvasTextLayerProps['polylines'][number];
+  layout: TextPathLayout | null;
+  path?: Float64Array;
+}
+
+// Number of zoom levels for which label layouts are cached
+const LAYOUT_CACHE_ZOOM_LEVELS = 4;
+
+// Versions of the polyline objects, used to invalidate the layouts cached in the worker
+const polylineVersions = new WeakMap<object, number>();
+let polylineVersion = 0;
+
+function getPolylineVersion(polyline: object): number {
+  let version = polylineVersions.get(polyline);
+  if (version === undefined) {
+    version = polylineVersion++;
+    polylineVersions.set(polyline, version);
+  }
+  return version;
+}
+
+/**
+ * Build an R-tree over the (geographic) bounds of the labelled polylines, used to cull off-screen labels.
+ */
+function indexPolylines(polylines: CanvasTextLayerProps['polylines']): RBush<PolylineItem> {
+  const items: PolylineItem[] = [];
+  polylines.forEach((polyline, order) => {
+    if (!polyline.label) return;
+    const latlngs = polyline.positions.map(pos => Array.isArray(pos) ? L.latLng(pos[0], pos[1]) : L.latLng(pos));
+    if (latlngs.length < 2) return;
+    const bounds = L.latLngBounds(latlngs);
+    items.push({
+      minX: bounds.getWest(),
+      minY: bounds.getSouth(),
+      maxX: bounds.getEast(),
+      maxY: bounds.getNorth(),
+      order,
+      latlngs,
+      polyline
+    });
+  });
+  const tree = new RBush<PolylineItem>();
+  tree.load(items);
+  return tree;
 }
 
 export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
   polylines,
-  collisionDetection = true
+  version = 0,
+  collisionDetection = true,
+  offscreen = false,
+  glyphAtlas = false,
+  onRenderStats
 }) => {
   const map = useMap();
   const layerRef = useRef<L.Layer | null>(null);
@@ -27,30 +105,16 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
   // Create a stable reference to polylines data
   const polylinesRef = useRef(polylines);
   polylinesRef.current = polylines;
-
-  // Memoize the polylines array to prevent unnecessary rerenders
-  const polylineKey = useMemo(() => {
-    return polylines.map(p => `${p.id}-${p.label}`).join('|');
-  }, [polylines]);
+  const onRenderStatsRef = useRef(onRenderStats);
+  onRenderStatsRef.current = onRenderStats;
+  const renderCount = useRef(0);
 
   useEffect(() => {
     if (!map) return;
 
     const CanvasLabelLayer = L.Layer.extend({
       onAdd: function() {
-        this._canvas = L.DomUtil.create('canvas', 'leaflet-street-labels');
-        this._ctx = this._canvas.getContext('2d');
-        this._renderer = new TextPathRenderer(this._ctx);
-
-        const size = map.getSize();
-        this._updateCanvasSize(size);
-
-        // Set canvas style
-        this._canvas.style.position = 'absolute';
-        this._canvas.style.pointerEvents = 'none'; // Make labels non-interactive
-
-        // Add to markerPane instead of overlayPane to ensure labels appear above paths
-        map.getPanes().markerPane.appendChild(this._canvas);
+        this._createCanvas(offscreen);
 
         // Bind map events
         map.on('viewreset', this._reset, this);
@@ -63,7 +127,7 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
       },
 
       onRemove: function() {
-        L.DomUtil.remove(this._canvas);
+        this._removeCanvas();
         map.off('viewreset', this._reset, this);
         map.off('zoom', this._onZoom, this);
         map.off('move', this._onMove, this);
@@ -71,12 +135,54 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
         map.off('moveend', this._redraw, this);
       },
 
+      _createCanvas: function(offscreen: boolean) {
+        this._canvas = L.DomUtil.create('canvas', 'leaflet-street-labels');
+        this._worker = offscreen ? createLabelWorker() : null;
+        if (this._worker) {
+          // Transfer the canvas to the worker, which does the layout, collision detection and rendering
+          const offscreenCanvas = this._canvas.transferControlToOffscreen();
+          this._worker.postMessage({type: 'init', canvas: offscreenCanvas}, [offscreenCanvas]);
+          // If the worker fails, fall back to rendering on the main thread
+          this._worker.onerror = () => {
+            this._removeCanvas();
+            this._layouts = null;
+            this._createCanvas(false);
+            this._reset();
+          };
+        } else {
+          this._ctx = this._canvas.getContext('2d');
+          this._renderer = new TextPathRenderer(this._ctx, {glyphAtlas});
+        }
+
+        const size = map.getSize();
+        this._updateCanvasSize(size);
+
+        // Set canvas style
+        this._canvas.style.position = 'absolute';
+        this._canvas.style.pointerEvents = 'none'; // Make labels non-interactive
+
+        // Add to markerPane instead of overlayPane to ensure labels appear above paths
+        map.getPanes().markerPane.appendChild(this._canvas);
+      },
+
+      _removeCanvas: function() {
+        L.DomUtil.remove(this._canvas);
+        if (this._worker) {
+          this._worker.terminate();
+          this._worker = null;
+        }
+      },
+
       _updateCanvasSize: function(size) {
         const scale = window.devicePixelRatio || 1;
-        this._canvas.width = size.x * scale;
-        this._canvas.height = size.y * scale;
         this._canvas.style.width = size.x + 'px';
         this._canvas.style.height = size.y + 'px';
+        if (this._worker) {
+          this._worker.postMessage({type: 'resize', width: size.x, height: size.y, pixelRatio: scale});
+          return;
+        }
+        this._canvas.width = size.x * scale;
+        this._canvas.height = size.y * scale;
 
         if (scale !== 1) {
           this._ctx.scale(scale, scale);
@@ -105,9 +211,117 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
         this._redraw();
       },
 
+      _getIndex: function(): RBush<PolylineItem> {
+        // Rebuild the index (and drop layouts of removed polylines) when the polylines change
+        const polylines = polylinesRef.current;
+        if (this._index && this._indexedPolylines === polylines) {
+          return this._index;
+        }
+        this._index = indexPolylines(polylines);
+        this._indexedPolylines = polylines;
+        const ids = new Set(polylines.map(p => p.id));
+        if (this._layouts) {
+          this._layouts.forEach(layouts => {
+            layouts.forEach((_, id) => {
+              if (!ids.has(id)) layouts.delete(id);
+            });
+          });
+        }
+        return this._index;
+      },
+
+      _getLayouts: function(zoom: number): Map<string, CachedLayout> {
+        // Label layouts are cached per zoom level (in projected pixel coordinates), so pans only translate them
+        if (!this._layouts) {
+          this._layouts = new Map<number, Map<string, CachedLayout>>();
+        }
+        let layouts = this._layouts.get(zoom);
+        if (layouts) {
+          this._layouts.delete(zoom);
+        } else {
+          layouts = new Map<string, CachedLayout>();
+        }
+        this._layouts.set(zoom, layouts);
+        if (this._layouts.size > LAYOUT_CACHE_ZOOM_LEVELS) {
+          this._layouts.delete(this._layouts.keys().next().value);
+        }
+        return layouts;
+      },
+
+      _redrawOffscreen: function(zoom: number, origin: L.Point, items: PolylineItem[]) {
+        // Send the projected paths of the labels in view (as typed arrays) to the worker
+        const layouts = this._getLayouts(zoom);
+        const labels: LabelWorkerLabel[] = [];
+        const projected: Float64Array[] = [];
+        let length = 0;
+        items.forEach(item => {
+          const polyline = item.polyline;
+          const style = polyline.labelStyle || {};
+          if (zoom < (style.minZoom || 0) || zoom > (style.maxZoom || 22)) return;
+          // The projected paths are cached like the layouts (the layouts themselves are cached by the worker)
+          let cached = layouts.get(polyline.id);
+          if (!cached || cached.polyline !== polyline) {
+            const path = new Float64Array(item.latlngs.length * 2);
+            item.latlngs.forEach((latlng, i) => {
+              const point = map.project(latlng, zoom);
+              path[2 * i] = point.x;
+              path[2 * i + 1] = point.y;
+            });
+            cached = {polyline, layout: null, path};
+            layouts.set(polyline.id, cached);
+          }
+          labels.push({id: polyline.id, version: getPolylineVersion(polyline), text: polyline.label, style});
+          projected.push(cached.path);
+          length += cached.path.length;
+        });
+        const paths = new Float64Array(length);
+        const offsets = new Uint32Array(projected.length + 1);
+        projected.forEach((path, i) => {
+          paths.set(path, offsets[i]);
+          offsets[i + 1] = offsets[i] + path.length;
+        });
+        this._worker.postMessage({
+          type: 'render',
+          zoom,
+          origin: [origin.x, origin.y],
+          labels,
+          paths,
+          offsets,
+          collisionDetection
+        }, [paths.buffer, offsets.buffer]);
+      },
+
+      _reportStats: function(labels: number, candidates: number, start: number) {
+        if (!onRenderStatsRef.current) return;
+        renderCount.current += 1;
+        onRenderStatsRef.current({labels, candidates, ms: performance.now() - start, n_renders: renderCount.current});
+      },
+
       _redraw: function() {
+        const start = performance.now();
+        const zoom = map.getZoom();
+        // Projected pixel coordinates of the top left corner of the map container
+        const origin = map.containerPointToLayerPoint([0, 0]).add(map.getPixelOrigin());
+
+        // Only consider the polylines in view, in the order they were registered (for stable collision priority)
+        const bounds = map.getBounds();
+        const items = this._getIndex().search({
+          minX: bounds.getWest(),
+          minY: bounds.getSouth(),
+          maxX: bounds.getEast(),
+          maxY: bounds.getNorth()
+        }).sort((a, b) => a.order - b.order);
+
+        if (this._worker) {
+          // The labels are drawn in the worker, so only the candidates (and the time to dispatch them) are known here
+          this._redrawOffscreen(zoom, origin, items);
+          this._reportStats(0, items.length, start);
+          return;
+        }
+
         const canvas = this._canvas;
         const ctx = this._ctx;
+        const layouts = this._getLayouts(zoom);
 
         // Clear canvas
         ctx.clearRect(0, 0, canvas.width, canvas.height);
@@ -116,46 +330,33 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
           collisionManager.current.reset();
         }
 
-        const zoom = map.getZoom();
-
-        // Get current polylines data from ref
-        const currentPolylines = polylinesRef.current;
-
-        currentPolylines.forEach(polyline => {
-          if (!polyline.label) return;
-
+        let drawn = 0;
+        items.forEach(item => {
+          const polyline = item.polyline;
           const style = polyline.labelStyle || {};
 
           // Check zoom constraints
           if (zoom < (style.minZoom || 0) || zoom > (style.maxZoom || 22)) return;
 
-          // Convert positions to container points
-          const points = polyline.positions.map(pos => {
-            // Ensure proper lat/lng format
-            const latLng = Array.isArray(pos)
-              ? L.latLng(pos[0], pos[1])
-              : L.latLng(pos);
-            return map.latLngToContainerPoint(latLng);
-          });
-
-          // Skip if path is too short
-          if (points.length < 2) return;
-
-          // Check if label should be rendered
-          if (collisionDetection) {
-            const bounds = this._renderer.calculateLabelBounds(
-              polyline.label,
-              points,
-              style
-            );
+          // Reuse the cached layout, if the polyline hasn't changed
+          let cached = layouts.get(polyline.id);
+          if (!cached || cached.polyline !== polyline) {
+            const points = item.latlngs.map(latlng => map.project(latlng, zoom));
+            cached = {polyline, layout: this._renderer.layoutTextPath(polyline.label, points, style)};
+            layouts.set(polyline.id, cached);
+          }
+          const layout = cached.layout;
+          if (!layout) return;
 
-            if (!collisionManager.current.checkAndAdd(polyline.id, bounds)) {
-              return; // Skip if collision detected
-            }
+          // Check if label should be rendered (collisions are invariant to translation)
+          if (collisionDetection && !collisionManager.current.checkAndAdd(polyline.id, layout.bounds)) {
+            return; // Skip if collision detected
           }
 
-          this._renderer.renderTextPath(polyline.label, points, style);
+          this._renderer.renderLayout(layout, -origin.x, -origin.y);
+          drawn++;
         });
+        this._reportStats(drawn, items.length, start);
       }
     });
 
@@ -175,14 +376,14 @@ export const CanvasTextLayer: React.FC<CanvasTextLayerProps> = ({
         map.removeLayer(layerRef.current);
       }
     };
-  }, [map, collisionDetection]); // Remove polylines from dependencies
+  }, [map, collisionDetection, offscreen, glyphAtlas]); // Remove polylines from dependencies
 
   // Update the layer when polylines change
   useEffect(() => {
     if (layerRef.current && (layerRef.current as any)._redraw) {
       (layerRef.current as any)._redraw();
     }
-  }, [polylineKey]);
+  }, [version]);
 
   return null;
 };
\ No newline at end of file
@@ -0,0 +1,281 @@
+// src/components/StreetLabels/LabelWorker.ts
+import { LabelStyle } from './TextPathRenderer';
+
+export interface LabelWorkerLabel {
+  id: string;
+  version: number;
+  text: string;
+  style: LabelStyle;
+}
+
+/**
+ * Worker side of the offscreen label rendering. The function is serialized (via toString) into a Blob worker, so it
+ * must be self-contained, i.e. it cannot reference anything outside its own body (including compiler helpers, so no
+ * spread operators, for...of loops, etc.). It mirrors TextPathRenderer.layoutTextPath/renderLayout, operating on the
+ * flat (projected) path arrays sent by the main thread.
+ */
+function labelWorker() {
+  const ZOOM_LEVELS = 4;
+  let canvas = null;
+  let ctx = null;
+  let pixelRatio = 1;
+  // Layouts are cached per zoom level, keyed by label id (and invalidated by the label version)
+  const layouts = new Map();
+
+  function getLayouts(zoom) {
+    let cache = layouts.get(zoom);
+    if (cache) {
+      layouts.delete(zoom);
+    } else {
+      cache = new Map();
+    }
+    layouts.set(zoom, cache);
+    if (layouts.size > ZOOM_LEVELS) {
+      layouts.delete(layouts.keys().next().value);
+    }
+    return cache;
+  }
+
+  function font(style) {
+    return (style.fontSize || 14) + 'px ' + (style.fontFamily || 'Arial');
+  }
+
+  // Glyph widths and font metrics are cached per font
+  const glyphWidths = new Map();
+  const fontMetrics = new Map();
+
+  function measureGlyphs(fontName, text) {
+    let cache = glyphWidths.get(fontName);
+    if (!cache) {
+      cache = new Map();
+      glyphWidths.set(fontName, cache);
+    }
+    const widths = [];
+    for (let i = 0; i < text.length; i++) {
+      let width = cache.get(text[i]);
+      if (width === undefined) {
+        ctx.font = fontName;
+        width = ctx.measureText(text[i]).width;
+        cache.set(text[i], width);
+      }
+      widths.push(width);
+    }
+    return widths;
+  }
+
+  function measureFont(fontName) {
+    let metrics = fontMetrics.get(fontName);
+    if (!metrics) {
+      ctx.font = fontName;
+      const textMetrics = ctx.measureText('Hg');
+      metrics = {ascent: textMetrics.actualBoundingBoxAscent, descent: textMetrics.actualBoundingBoxDescent};
+      fontMetrics.set(fontName, metrics);
+    }
+    return metrics;
+  }
+
+  function layoutLabel(text, paths, start, end, style) {
+    const n = (end - start) / 2;
+    if (!text || n < 2) return null;
+    const fontSize = style.fontSize || 14;
+    const textAlign = style.textAlign || 'center';
+    const textBaseline = style.textBaseline || 'middle';
+
+    // Flip path if needed for readability (based on the overall direction)
+    const angle = Math.atan2(paths[end - 1] - paths[start + 1], paths[end - 2] - paths[start]) * 180 / Math.PI;
+    const flip = angle > 90 || angle < -90;
+    const xs = new Float64Array(n);
+    const ys = new Float64Array(n);
+    for (let i = 0; i < n; i++) {
+      const k = flip ? end - 2 * (i + 1) : start + 2 * i;
+      xs[i] = paths[k];
+      ys[i] = paths[k + 1];
+    }
+
+    // Cumulative path length at each vertex
+    const lengths = new Float64Array(n);
+    for (let i = 1; i < n; i++) {
+      lengths[i] = lengths[i - 1] + Math.sqrt((xs[i] - xs[i - 1]) * (xs[i] - xs[i - 1]) + (ys[i] - ys[i - 1]) * (ys[i] - ys[i - 1]));
+    }
+    const pathLength = lengths[n - 1];
+    if (pathLength < 40) return null; // Minimum path length
+
+    const fontName = font(style);
+    const widths = measureGlyphs(fontName, text);
+    let textWidth = 0;
+    for (let i = 0; i < widths.length; i++) {
+      textWidth += widths[i];
+    }
+
+    let yOffset = 0;
+    if (textBaseline === 'top') {
+      yOffset = measureFont(fontName).ascent / 2;
+    } else if (textBaseline === 'bottom') {
+      yOffset = -measureFont(fontName).descent / 2;
+    }
+
+    let currentOffset = 0;
+    if (textAlign === 'center') {
+      currentOffset = (pathLength - textWidth) / 2;
+    } else if (textAlign === 'right' || textAlign === 'end') {
+      currentOffset = pathLength - textWidth;
+    }
+
+    // Walk the path, placing each glyph at the position of its center
+    const glyphs = [];
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    let segment = 1;
+    for (let i = 0; i < text.length; i++) {
+      const target = currentOffset + widths[i] / 2;
+      while (segment < n && lengths[segment] < target) segment++;
+      if (segment >= n || target < 0) break;
+      const ratio = (target - lengths[segment - 1]) / ((lengths[segment] - lengths[segment - 1]) || 1);
+      const x = xs[segment - 1] + (xs[segment] - xs[segment - 1]) * ratio;
+      const y = ys[segment - 1] + (ys[segment] - ys[segment - 1]) * ratio;
+      glyphs.push(x, y, Math.atan2(ys[segment] - ys[segment - 1], xs[segment] - xs[segment - 1]));
+      minX = Math.min(minX, x);
+      minY = Math.min(minY, y);
+      maxX = Math.max(maxX, x);
+      maxY = Math.max(maxY, y);
+      currentOffset += widths[i];
+    }
+    if (glyphs.length === 0) return null;
+
+    const pad = fontSize * 0.75;
+    return {
+      text: text,
+      glyphs: glyphs,
+      yOffset: yOffset,
+      bounds: [minX - pad, minY - pad, maxX + pad, maxY + pad],
+      style: style
+    };
+  }
+
+  // Collision detection via a uniform grid of (label) boxes
+  const CELL_SIZE = 128;
+
+  function collides(grid, box) {
+    const x0 = Math.floor(box[0] / CELL_SIZE), x1 = Math.floor(box[2] / CELL_SIZE);
+    const y0 = Math.floor(box[1] / CELL_SIZE), y1 = Math.floor(box[3] / CELL_SIZE);
+    for (let x = x0; x <= x1; x++) {
+      for (let y = y0; y <= y1; y++) {
+        const cell = grid.get(x + ':' + y);
+        if (!cell) continue;
+        for (let i = 0; i < cell.length; i++) {
+          const other = cell[i];
+          if (box[0] <= other[2] && box[2] >= other[0] && box[1] <= other[3] && box[3] >= other[1]) {
+            return true;
+          }
+        }
+      }
+    }
+    for (let x = x0; x <= x1; x++) {
+      for (let y = y0; y <= y1; y++) {
+        const key = x + ':' + y;
+        const cell = grid.get(key);
+        if (cell) {
+          cell.push(box);
+        } else {
+          grid.set(key, [box]);
+        }
+      }
+    }
+    return false;
+  }
+
+  function drawGlyphs(layout, dx, dy, stroke) {
+    const glyphs = layout.glyphs;
+    for (let i = 0, j = 0; j < glyphs.length; i++, j += 3) {
+      const cos = Math.cos(glyphs[j + 2]) * pixelRatio;
+      const sin = Math.sin(glyphs[j + 2]) * pixelRatio;
+      ctx.setTransform(cos, sin, -sin, cos, (glyphs[j] + dx) * pixelRatio, (glyphs[j + 1] + dy) * pixelRatio);
+      if (stroke) {
+        ctx.strokeText(layout.text[i], 0, layout.yOffset);
+      } else {
+        ctx.fillText(layout.text[i], 0, layout.yOffset);
+      }
+    }
+  }
+
+  function renderLayout(layout, dx, dy) {
+    const style = layout.style;
+    const strokeColor = style.strokeColor === undefined ? '#FFFFFF' : style.strokeColor;
+    const strokeWidth = style.strokeWidth === undefined ? 3 : style.strokeWidth;
+    ctx.font = font(style);
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'middle';
+    if (strokeColor && strokeWidth > 0) {
+      ctx.strokeStyle = strokeColor;
+      ctx.lineWidth = strokeWidth;
+      ctx.lineJoin = 'round';
+      ctx.miterLimit = 2;
+      drawGlyphs(layout, dx, dy, true);
+    }
+    ctx.fillStyle = style.textColor || '#333333';
+    drawGlyphs(layout, dx, dy, false);
+  }
+
+  function render(data) {
+    ctx.setTransform(1, 0, 0, 1, 0, 0);
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    const cache = getLayouts(data.zoom);
+    const grid = new Map();
+    const labels = data.labels;
+    const paths = data.paths;
+    const offsets = data.offsets;
+    for (let i = 0; i < labels.length; i++) {
+      const label = labels[i];
+      let cached = cache.get(label.id);
+      if (!cached || cached.version !== label.version) {
+        cached = {version: label.version, layout: layoutLabel(label.text, paths, offsets[i], offsets[i + 1], label.style)};
+        cache.set(label.id, cached);
+      }
+      const layout = cached.layout;
+      if (!layout) continue;
+      // Collisions are checked in projected coordinates, i.e. they are invariant to translation
+      if (data.collisionDetection && collides(grid, layout.bounds)) continue;
+      renderLayout(layout, -data.origin[0], -data.origin[1]);
+    }
+  }
+
+  (self as any).onmessage = function (e) {
+    const data = e.data;
+    if (data.type === 'init') {
+      canvas = data.canvas;
+      ctx = canvas.getContext('2d');
+    } else if (data.type === 'resize') {
+      pixelRatio = data.pixelRatio;
+      canvas.width = data.width * pixelRatio;
+      canvas.height = data.height * pixelRatio;
+    } else if (data.type === 'render') {
+      render(data);
+    }
+  };
+}
+
+/**
+ * Check if offscreen label rendering is supported by the browser.
+ */
+export function supportsOffscreenLabels(): boolean {
+  return typeof Worker !== 'undefined' && typeof (self as any).OffscreenCanvas !== 'undefined' &&
+    typeof HTMLCanvasElement !== 'undefined' && 'transferControlToOffscreen' in HTMLCanvasElement.prototype;
+}
+
+/**
+ * Create the label rendering worker. Returns null if not supported, or if the worker cannot be created (e.g. due to
+ * a content security policy blocking blob URLs).
+ */
+export function createLabelWorker(): Worker | null {
+  if (!supportsOffscreenLabels()) {
+    return null;
+  }
+  try {
+    const blob = new Blob(['(' + labelWorker.toString() + ')()'], { type: 'application/javascript' });
+    const url = URL.createObjectURL(blob);
+    const worker = new Worker(url);
+    URL.revokeObjectURL(url);
+    return worker;
+  } catch (e) {
+    return null;
+  }
+}
@@ -2,7 +2,8 @@
 import React, { createContext, useCallback, useMemo, useRef, useReducer } from 'react';
 import L from 'leaflet';
 import { LabelStyle } from './TextPathRenderer';
-import { CanvasTextLayer } from './CanvasTextLayer';
+import { CanvasTextLayer, RenderStats } from './CanvasTextLayer';
+import { LabelSource, labelSourceToPolylines } from './labelSource';
 
 export interface PolylineData {
   id: string;
@@ -55,12 +56,31 @@ function reducer(state: State, action: Action): State {
 
 export const StreetLabelContext = createContext<StreetLabelContextType | null>(null);
 
+// Version of the bulk label sources, incremented whenever a source changes
+let sourceVersion = 0;
+
 export const StreetLabelProvider: React.FC<{
   children: React.ReactNode;
   collisionDetection?: boolean;
-}> = ({ children, collisionDetection = true }) => {
+  offscreen?: boolean;
+  data?: LabelSource;
+  labelProperty?: string;
+  labelStyle?: LabelStyle;
+  glyphAtlas?: boolean;
+  onRenderStats?: (stats: RenderStats) => void;
+}> = ({ children, collisionDetection = true, offscreen = false, data, labelProperty, labelStyle, glyphAtlas = false,
+       onRenderStats }) => {
   const [state, dispatch] = useReducer(reducer, { polylines: [], version: 0 });
 
+  // Labels from the bulk source (if any) are rendered along with the registered polylines
+  const source = useMemo(() => ({
+    polylines: labelSourceToPolylines(data, labelProperty, labelStyle),
+    version: ++sourceVersion
+  }), [data, labelProperty, labelStyle]);
+  const polylines = useMemo(() => {
+    return source.polylines.length === 0 ? state.polylines : state.polylines.concat(source.polylines);
+  }, [state.polylines, source]);
+
   // Use refs to batch updates
   const pendingUpdates = useRef<Action[]>([]);
   const updateScheduled = useRef(false);
@@ -100,8 +120,12 @@ export const StreetLabelProvider: React.FC<{
     <StreetLabelContext.Provider value={contextValue}>
       {children}
       <CanvasTextLayer
-        polylines={state.polylines}
+        polylines={polylines}
+        version={state.version + source.version}
         collisionDetection={collisionDetection}
+        offscreen={offscreen}
+        glyphAtlas={glyphAtlas}
+        onRenderStats={onRenderStats}
       />
     </StreetLabelContext.Provider>
   );
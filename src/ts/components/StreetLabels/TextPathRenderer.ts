@@ -16,11 +16,164 @@ export interface LabelStyle {
   offset?: number;
 }
 
+export interface TextPathLayout {
+  text: string;
+  // Glyph centers and angles, i.e. [x0, y0, angle0, x1, y1, angle1, ...]
+  glyphs: number[];
+  // Glyph widths
+  widths: number[];
+  yOffset: number;
+  bounds: L.Bounds;
+  style: LabelStyle;
+}
+
+// Glyph widths and font metrics, cached per font (and shared by all renderers)
+const glyphWidths = new Map<string, Map<string, number>>();
+const fontMetrics = new Map<string, { ascent: number; descent: number }>();
+
+/**
+ * Measure the widths of the glyphs of a text, using (and filling) the glyph width cache.
+ */
+export function measureGlyphs(ctx: CanvasRenderingContext2D, font: string, text: string): number[] {
+  let cache = glyphWidths.get(font);
+  if (!cache) {
+    cache = new Map();
+    glyphWidths.set(font, cache);
+  }
+  const widths = [];
+  let fontSet = false;
+  for (let i = 0; i < text.length; i++) {
+    let width = cache.get(text[i]);
+    if (width === undefined) {
+      if (!fontSet) {
+        ctx.save();
+        ctx.font = font;
+        fontSet = true;
+      }
+      width = ctx.measureText(text[i]).width;
+      cache.set(text[i], width);
+    }
+    widths.push(width);
+  }
+  if (fontSet) {
+    ctx.restore();
+  }
+  return widths;
+}
+
+function measureFont(ctx: CanvasRenderingContext2D, font: string): { ascent: number; descent: number } {
+  let metrics = fontMetrics.get(font);
+  if (!metrics) {
+    ctx.save();
+    ctx.font = font;
+    const textMetrics = ctx.measureText('Hg');
+    ctx.restore();
+    metrics = { ascent: textMetrics.actualBoundingBoxAscent, descent: textMetrics.actualBoundingBoxDescent };
+    fontMetrics.set(font, metrics);
+  }
+  return metrics;
+}
+
+interface AtlasGlyph {
+  page: HTMLCanvasElement;
+  sx: number;
+  sy: number;
+  sw: number;
+  sh: number;
+  // Size in CSS pixels
+  width: number;
+  height: number;
+}
+
+/**
+ * Pre-rasterized glyphs (fill and halo separately), packed into canvas pages via a simple shelf packer. Each glyph is
+ * drawn once per style, after which labels are composited via drawImage.
+ */
+export class GlyphAtlas {
+  private pages: HTMLCanvasElement[] = [];
+  private glyphs = new Map<string, AtlasGlyph>();
+  private x = 0;
+  private y = 0;
+  private rowHeight = 0;
+
+  constructor(readonly pixelRatio: number, private pageSize: number = 1024) {}
+
+  get(char: string, width: number, style: LabelStyle, halo: boolean): AtlasGlyph {
+    const {
+      fontSize = 14,
+      fontFamily = 'Arial',
+      textColor = '#333333',
+      strokeColor = '#FFFFFF',
+      strokeWidth = 3
+    } = style;
+    const key = `${fontSize}|${fontFamily}|${halo ? strokeColor + '|' + strokeWidth : textColor}|${char}`;
+    let glyph = this.glyphs.get(key);
+    if (glyph) return glyph;
+
+    // Reserve space (with room for the halo) in the current page, or start a new row/page
+    const pad = strokeWidth + 1;
+    const cssWidth = width + 2 * pad;
+    const cssHeight = fontSize * 1.5 + 2 * pad;
+    const sw = Math.ceil(cssWidth * this.pixelRatio);
+    const sh = Math.ceil(cssHeight * this.pixelRatio);
+    if (this.x + sw > this.pageSize) {
+      this.x = 0;
+      this.y += this.rowHeight;
+      this.rowHeight = 0;
+    }
+    if (this.pages.length === 0 || this.y + sh > this.pageSize) {
+      const page = document.createElement('canvas');
+      page.width = this.pageSize;
+      page.height = this.pageSize;
+      this.pages.push(page);
+      this.x = 0;
+      this.y = 0;
+      this.rowHeight = 0;
+    }
+    const page = this.pages[this.pages.length - 1];
+    glyph = { page, sx: this.x, sy: this.y, sw, sh, width: sw / this.pixelRatio, height: sh / this.pixelRatio };
+    this.x += sw;
+    this.rowHeight = Math.max(this.rowHeight, sh);
+
+    // Rasterize the glyph, centered in its cell
+    const ctx = page.getContext('2d');
+    ctx.save();
+    ctx.setTransform(this.pixelRatio, 0, 0, this.pixelRatio, 0, 0);
+    ctx.font = `${fontSize}px ${fontFamily}`;
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'middle';
+    const x = glyph.sx / this.pixelRatio + glyph.width / 2;
+    const y = glyph.sy / this.pixelRatio + glyph.height / 2;
+    if (halo) {
+      ctx.strokeStyle = strokeColor;
+      ctx.lineWidth = strokeWidth;
+      ctx.lineJoin = 'round';
+      ctx.miterLimit = 2;
+      ctx.strokeText(char, x, y);
+    } else {
+      ctx.fillStyle = textColor;
+      ctx.fillText(char, x, y);
+    }
+    ctx.restore();
+
+    this.glyphs.set(key, glyph);
+    return glyph;
+  }
+}
+
+export interface TextPathRendererOptions {
+  // Composite glyphs from a pre-rasterized atlas (via drawImage), rather than drawing text
+  glyphAtlas?: boolean;
+}
+
 export class TextPathRenderer {
   private ctx: CanvasRenderingContext2D;
+  private options: TextPathRendererOptions;
+  private atlas: GlyphAtlas | null = null;
 
-  constructor(ctx: CanvasRenderingContext2D) {
+  constructor(ctx: CanvasRenderingContext2D, options: TextPathRendererOptions = {}) {
     this.ctx = ctx;
+    this.options = options;
   }
 
   renderTextPath(text: string, points: L.Point[], style: LabelStyle = {}) {
@@ -98,6 +251,164 @@ export class TextPathRenderer {
     this.ctx.restore();
   }
 
+  /**
+   * Compute the glyph positions of a text along a path (i.e. the layout), without drawing anything. As the layout
+   * is expressed in the coordinates of the path, it can be reused (translated) as long as the path doesn't change.
+   */
+  layoutTextPath(text: string, points: L.Point[], style: LabelStyle = {}): TextPathLayout | null {
+    if (!text || points.length < 2) return null;
+
+    const {
+      fontSize = 14,
+      fontFamily = 'Arial',
+      textAlign = 'center',
+      textBaseline = 'middle'
+    } = style;
+
+    // Flip path if needed for readability (based on the overall direction, as in renderTextPath)
+    const first = points[0];
+    const last = points[points.length - 1];
+    const angle = Math.atan2(last.y - first.y, last.x - first.x) * 180 / Math.PI;
+    const path = (angle > 90 || angle < -90) ? points.slice().reverse() : points;
+
+    // Cumulative path length at each vertex
+    const lengths = [0];
+    for (let i = 1; i < path.length; i++) {
+      lengths.push(lengths[i - 1] + path[i].distanceTo(path[i - 1]));
+    }
+    const pathLength = lengths[lengths.length - 1];
+    if (pathLength < 40) return null; // Minimum path length (textStrokeMin)
+
+    // Glyph widths are cached per font, and the text width is their sum
+    const font = `${fontSize}px ${fontFamily}`;
+    const widths = measureGlyphs(this.ctx, font, text);
+    const textWidth = widths.reduce((a, b) => a + b, 0);
+
+    let yOffset = 0;
+    if (textBaseline === 'top') {
+      yOffset = measureFont(this.ctx, font).ascent / 2;
+    } else if (textBaseline === 'bottom') {
+      yOffset = -measureFont(this.ctx, font).descent / 2;
+    }
+
+    let currentOffset = 0;
+    if (textAlign === 'center') {
+      currentOffset = (pathLength - textWidth) / 2;
+    } else if (textAlign === 'right' || textAlign === 'end') {
+      currentOffset = pathLength - textWidth;
+    }
+
+    // Walk the path, placing each glyph at the position of its center
+    const glyphs = [];
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    let segment = 1;
+    for (let i = 0; i < text.length; i++) {
+      const target = currentOffset + widths[i] / 2;
+      while (segment < path.length && lengths[segment] < target) segment++;
+      if (segment >= path.length || target < 0) break;
+      const p1 = path[segment - 1];
+      const p2 = path[segment];
+      const ratio = (target - lengths[segment - 1]) / ((lengths[segment] - lengths[segment - 1]) || 1);
+      const x = p1.x + (p2.x - p1.x) * ratio;
+      const y = p1.y + (p2.y - p1.y) * ratio;
+      glyphs.push(x, y, Math.atan2(p2.y - p1.y, p2.x - p1.x));
+      minX = Math.min(minX, x);
+      minY = Math.min(minY, y);
+      maxX = Math.max(maxX, x);
+      maxY = Math.max(maxY, y);
+      currentOffset += widths[i];
+    }
+    if (glyphs.length === 0) return null;
+
+    // Pad the glyph centers by (approximately) half the glyph size
+    const pad = fontSize * 0.75;
+    return {
+      text,
+      glyphs,
+      widths,
+      yOffset,
+      bounds: L.bounds([minX - pad, minY - pad], [maxX + pad, maxY + pad]),
+      style
+    };
+  }
+
+  /**
+   * Draw a layout (see layoutTextPath), translated by (dx, dy).
+   */
+  renderLayout(layout: TextPathLayout, dx: number = 0, dy: number = 0) {
+    const {
+      fontSize = 14,
+      fontFamily = 'Arial',
+      textColor = '#333333',
+      strokeColor = '#FFFFFF',
+      strokeWidth = 3
+    } = layout.style;
+
+    const scale = this.ctx.getTransform().a;
+    if (this.options.glyphAtlas) {
+      this.renderLayoutFromAtlas(layout, dx, dy, scale);
+      return;
+    }
+    this.ctx.save();
+    this.ctx.font = `${fontSize}px ${fontFamily}`;
+    this.ctx.textAlign = 'center';
+    this.ctx.textBaseline = 'middle';
+
+    // Draw the halo first for all glyphs, then the text, so that halos don't cover neighbouring glyphs
+    if (strokeColor && strokeWidth > 0) {
+      this.ctx.strokeStyle = strokeColor;
+      this.ctx.lineWidth = strokeWidth;
+      this.ctx.lineJoin = 'round';
+      this.ctx.miterLimit = 2;
+      this.drawGlyphs(layout, dx, dy, scale, true);
+    }
+    this.ctx.fillStyle = textColor;
+    this.drawGlyphs(layout, dx, dy, scale, false);
+
+    this.ctx.restore();
+  }
+
+  private renderLayoutFromAtlas(layout: TextPathLayout, dx: number, dy: number, scale: number) {
+    const { strokeColor = '#FFFFFF', strokeWidth = 3 } = layout.style;
+    // The atlas is rasterized for the pixel ratio of the canvas
+    if (!this.atlas || this.atlas.pixelRatio !== scale) {
+      this.atlas = new GlyphAtlas(scale);
+    }
+    this.ctx.save();
+    if (strokeColor && strokeWidth > 0) {
+      this.drawAtlasGlyphs(layout, dx, dy, scale, true);
+    }
+    this.drawAtlasGlyphs(layout, dx, dy, scale, false);
+    this.ctx.restore();
+  }
+
+  private drawAtlasGlyphs(layout: TextPathLayout, dx: number, dy: number, scale: number, halo: boolean) {
+    const glyphs = layout.glyphs;
+    for (let i = 0, j = 0; j < glyphs.length; i++, j += 3) {
+      const glyph = this.atlas.get(layout.text[i], layout.widths[i], layout.style, halo);
+      const cos = Math.cos(glyphs[j + 2]) * scale;
+      const sin = Math.sin(glyphs[j + 2]) * scale;
+      this.ctx.setTransform(cos, sin, -sin, cos, (glyphs[j] + dx) * scale, (glyphs[j + 1] + dy) * scale);
+      this.ctx.drawImage(glyph.page, glyph.sx, glyph.sy, glyph.sw, glyph.sh,
+        -glyph.width / 2, layout.yOffset - glyph.height / 2, glyph.width, glyph.height);
+    }
+  }
+
+  private drawGlyphs(layout: TextPathLayout, dx: number, dy: number, scale: number, stroke: boolean) {
+    const glyphs = layout.glyphs;
+    // Set the glyph transforms directly (rather than via save/translate/rotate/restore), keeping the pixel ratio
+    for (let i = 0, j = 0; j < glyphs.length; i++, j += 3) {
+      const cos = Math.cos(glyphs[j + 2]) * scale;
+      const sin = Math.sin(glyphs[j + 2]) * scale;
+      this.ctx.setTransform(cos, sin, -sin, cos, (glyphs[j] + dx) * scale, (glyphs[j + 1] + dy) * scale);
+      if (stroke) {
+        this.ctx.strokeText(layout.text[i], 0, layout.yOffset);
+      } else {
+        this.ctx.fillText(layout.text[i], 0, layout.yOffset);
+      }
+    }
+  }
+
   calculateLabelBounds(text: string, points: L.Point[], style: LabelStyle = {}): L.Bounds {
     const { fontSize = 14 } = style;
 
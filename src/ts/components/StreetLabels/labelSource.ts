@@ -0,0 +1,77 @@
+// src/components/StreetLabels/labelSource.ts
+import L from 'leaflet';
+import { toByteArray } from 'base64-js';
+import { LabelStyle } from './TextPathRenderer';
+import { PolylineData } from './StreetLabelContext';
+
+/**
+ * Binary label source, i.e. the (base64 encoded) coordinates of all lines as float32 [lng, lat, lng, lat, ...], the
+ * (base64 encoded) uint32 start offsets (in vertices) of each line, followed by the total number of vertices, and the
+ * labels. See dash_leaflet.express.geojson_to_label_buffer.
+ */
+export interface LabelBuffer {
+  coordinates: string;
+  offsets: string;
+  labels: string[];
+}
+
+export type LabelSource = LabelBuffer | {
+  type: string;
+  features: object[];
+};
+
+function decode(value: string, ArrayType: Float32ArrayConstructor | Uint32ArrayConstructor) {
+  const bytes = toByteArray(value);
+  // Copy to ensure alignment
+  return new ArrayType(bytes.slice().buffer, 0, bytes.byteLength / ArrayType.BYTES_PER_ELEMENT);
+}
+
+function bufferToPolylines(source: LabelBuffer, labelStyle: LabelStyle, prefix: string): PolylineData[] {
+  const coordinates = decode(source.coordinates, Float32Array);
+  const offsets = decode(source.offsets, Uint32Array);
+  const polylines: PolylineData[] = [];
+  for (let i = 0; i < source.labels.length; i++) {
+    const label = source.labels[i];
+    if (!label) continue;
+    const positions = [];
+    for (let j = offsets[i]; j < offsets[i + 1]; j++) {
+      positions.push(L.latLng(coordinates[2 * j + 1], coordinates[2 * j]));
+    }
+    polylines.push({ id: `${prefix}-${i}`, positions, label, labelStyle });
+  }
+  return polylines;
+}
+
+function geojsonToPolylines(source: {features: object[]}, labelProperty: string, labelStyle: LabelStyle,
+                            prefix: string): PolylineData[] {
+  const polylines: PolylineData[] = [];
+  source.features.forEach((feature: any, i) => {
+    const label = feature.properties ? feature.properties[labelProperty] : undefined;
+    const geometry = feature.geometry;
+    if (!label || !geometry) return;
+    const lines = geometry.type === 'LineString' ? [geometry.coordinates] :
+      (geometry.type === 'MultiLineString' ? geometry.coordinates : []);
+    lines.forEach((line, j) => {
+      polylines.push({
+        id: `${prefix}-${i}-${j}`,
+        positions: line.map(c => L.latLng(c[1], c[0])),
+        label: String(label),
+        labelStyle
+      });
+    });
+  });
+  return polylines;
+}
+
+/**
+ * Convert a bulk label source (a GeoJSON FeatureCollection of LineString/MultiLineString features, or a binary label
+ * buffer) to polyline data for the label layer.
+ */
+export function labelSourceToPolylines(source: LabelSource | undefined, labelProperty: string = 'name',
+                                       labelStyle: LabelStyle = undefined, prefix: string = 'source'): PolylineData[] {
+  if (!source) return [];
+  if ('coordinates' in source) {
+    return bufferToPolylines(source, labelStyle, prefix);
+  }
+  return geojsonToPolylines(source, labelProperty, labelStyle, prefix);
+}
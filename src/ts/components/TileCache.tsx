@@ -0,0 +1,216 @@
+import {useEffect, useRef} from 'react';
+import {useMap} from 'react-leaflet';
+import L from 'leaflet';
+import {DashComponent, Modify} from "../props";
+
+type Props = Modify<{
+    /**
+     * Url of the service worker script, as returned by dash_leaflet.express.mount_tile_cache (which serves it). [DL]
+     */
+    serviceWorkerUrl?: string;
+
+    /**
+     * Size budget of the cache (in bytes). When exceeded, the least recently used entries are evicted. Only responses
+     * whose size can be read are cached, i.e. cross-origin tiles are cached only if the tile layer sets crossOrigin
+     * (and the tile server allows CORS). [DL]
+     */
+    maxSize?: number;
+
+    /**
+     * Url prefixes of additional data to cache, e.g. the url of a GeoJSON component. The tiles of the tile layers
+     * on the map are always cached. [DL]
+     */
+    urls?: string[];
+
+    /**
+     * If true, tiles adjacent to the view (in the direction of panning) and the tiles of the next zoom level are
+     * prefetched while the browser is idle. [DL]
+     */
+    prefetch?: boolean;
+
+    /**
+     * Maximum number of tiles to prefetch per tile layer after each move. [DL]
+     */
+    prefetchLimit?: number;
+
+    /**
+     * Interval (ms) at which the cacheStats property is updated. Set to 0 to disable. [DL]
+     */
+    statsInterval?: number;
+
+    /**
+     * Statistics of the cache, i.e. the number of hits/misses, the hit rate, the number of prefetched entries, and
+     * the number of entries/bytes in the cache. [DL]
+     */
+    cacheStats?: {
+        hits: number,
+        misses: number,
+        hitRate: number,
+        prefetched: number,
+        entries: number,
+        size: number
+    };
+}, DashComponent>;
+
+function escapeRegExp(value: string): string {
+    return value.replace(/[.*+?^$()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * Regular expression matching the urls of a tile layer, i.e. the url template with the placeholders as wildcards.
+ */
+function tileUrlPattern(layer): string {
+    // Templates may contain placeholders in the host name (e.g. {s}), so only relative urls are resolved
+    const template = /^([a-z]+:)?\/\//i.test(layer._url) ? layer._url.replace(/^\/\//, window.location.protocol + '//') :
+        new URL(layer._url, window.location.href).href.replace(/%7B/g, '{').replace(/%7D/g, '}');
+    return '^' + template.split(/\{[^}]*\}/).map(part => escapeRegExp(part)).join('[^/?&]*');
+}
+
+function getTileLayers(map: L.Map): L.TileLayer[] {
+    const layers = [];
+    map.eachLayer(layer => {
+        if (layer instanceof L.TileLayer && (layer as any)._url) {
+            layers.push(layer);
+        }
+    });
+    return layers;
+}
+
+/**
+ * Urls of the tiles to prefetch, i.e. the ring of tiles just outside the view (on the sides the map is panning
+ * towards), and the tiles covering the view at the next zoom level.
+ */
+function getPrefetchUrls(map: L.Map, layer, direction: L.Point, limit: number): string[] {
+    const zoom = layer._tileZoom;
+    if (zoom === undefined) return [];
+    const tileSize = layer.getTileSize();
+    const bounds = map.getPixelBounds();
+    const scale = map.getZoomScale(zoom, map.getZoom());
+    const range = L.bounds(
+        bounds.min.multiplyBy(scale).unscaleBy(tileSize).floor(),
+        bounds.max.multiplyBy(scale).unscaleBy(tileSize).ceil().subtract([1, 1])
+    );
+    const coords: L.Coords[] = [];
+    // Adjacent tiles, in the direction of panning (or all around, if not panning)
+    const dx = direction.x > 0 ? 1 : (direction.x < 0 ? -1 : 0);
+    const dy = direction.y > 0 ? 1 : (direction.y < 0 ? -1 : 0);
+    for (let x = range.min.x - 1; x <= range.max.x + 1; x++) {
+        for (let y = range.min.y - 1; y <= range.max.y + 1; y++) {
+            const outside = x < range.min.x || x > range.max.x || y < range.min.y || y > range.max.y;
+            const ahead = (dx === 0 && dy === 0) || (dx > 0 && x > range.max.x) || (dx < 0 && x < range.min.x) ||
+                (dy > 0 && y > range.max.y) || (dy < 0 && y < range.min.y);
+            if (outside && ahead) {
+                coords.push(Object.assign(L.point(x, y), {z: zoom}) as L.Coords);
+            }
+        }
+    }
+    // Tiles of the next zoom level
+    const maxZoom = Math.min(layer.options.maxZoom, map.getMaxZoom());
+    if (zoom + 1 <= maxZoom) {
+        for (let x = 2 * range.min.x; x <= 2 * range.max.x + 1; x++) {
+            for (let y = 2 * range.min.y; y <= 2 * range.max.y + 1; y++) {
+                coords.push(Object.assign(L.point(x, y), {z: zoom + 1}) as L.Coords);
+            }
+        }
+    }
+    // The url of a tile is resolved for the current tile zoom level, so it is swapped temporarily
+    const urls = [];
+    coords.slice(0, limit).forEach(c => {
+        if (!layer._isValidTile(c)) return;
+        const wrapped = layer._wrapCoords(c);
+        wrapped.z = c.z;
+        layer._tileZoom = c.z;
+        urls.push(new URL(layer.getTileUrl(wrapped), window.location.href).href);
+    });
+    layer._tileZoom = zoom;
+    return urls;
+}
+
+const requestIdle = (callback) => (window as any).requestIdleCallback ?
+    (window as any).requestIdleCallback(callback, {timeout: 2000}) : setTimeout(callback, 200);
+
+/**
+ * TileCache caches the tiles of the tile layers on the map (and optionally other data, e.g. GeoJSON) in a service
+ * worker, with a size budget and LRU eviction, and prefetches tiles ahead of panning/zooming while the browser is
+ * idle. The service worker script must be served via dash_leaflet.express.mount_tile_cache, and the url it returns
+ * passed as serviceWorkerUrl if the app is mounted under a path prefix.
+ */
+const TileCache = ({
+    serviceWorkerUrl = "/dash-leaflet-tile-cache.js",
+    maxSize = 100 * 1024 * 1024,
+    urls = [],
+    prefetch = true,
+    prefetchLimit = 64,
+    statsInterval = 5000,
+    ...props
+}: Props) => {
+    const map = useMap();
+    const workerRef = useRef<ServiceWorker | null>(null);
+    const propsRef = useRef(props);
+    propsRef.current = props;
+    const urlsKey = urls.join('\n');
+
+    useEffect(() => {
+        if (!('serviceWorker' in navigator)) {
+            return;
+        }
+        let active = true;
+        let center = map.getCenter();
+        let statsTimer = null;
+        const configure = () => {
+            const worker = workerRef.current;
+            if (!worker) return;
+            const patterns = getTileLayers(map).map(tileUrlPattern).concat(
+                urls.map(url => '^' + escapeRegExp(new URL(url, window.location.href).href)));
+            worker.postMessage({type: 'config', patterns, maxSize});
+        };
+        const onMoveEnd = () => {
+            const previous = center;
+            center = map.getCenter();
+            // The configuration is resent, as it's lost whenever the browser restarts the (idle) service worker
+            configure();
+            if (!prefetch || !workerRef.current) return;
+            const direction = map.project(center).subtract(map.project(previous));
+            requestIdle(() => {
+                if (!active || !workerRef.current) return;
+                const tileUrls = [];
+                getTileLayers(map).forEach(layer => {
+                    tileUrls.push(...getPrefetchUrls(map, layer, direction, prefetchLimit));
+                });
+                workerRef.current.postMessage({type: 'prefetch', urls: tileUrls});
+            });
+        };
+        const reportStats = () => {
+            if (!workerRef.current) return;
+            const channel = new MessageChannel();
+            channel.port1.onmessage = (e) => {
+                if (active) propsRef.current.setProps({cacheStats: e.data});
+            };
+            workerRef.current.postMessage({type: 'stats'}, [channel.port2]);
+        };
+        navigator.serviceWorker.register(serviceWorkerUrl).then(() => navigator.serviceWorker.ready).then(registration => {
+            if (!active) return;
+            workerRef.current = registration.active;
+            configure();
+            onMoveEnd();
+            if (statsInterval > 0) {
+                statsTimer = setInterval(reportStats, statsInterval);
+            }
+        }).catch(e => console.warn('TileCache: Unable to register service worker', e));
+        map.on('layeradd layerremove', configure);
+        map.on('moveend', onMoveEnd);
+        return () => {
+            active = false;
+            map.off('layeradd layerremove', configure);
+            map.off('moveend', onMoveEnd);
+            if (statsTimer !== null) {
+                clearInterval(statsTimer);
+            }
+            workerRef.current = null;
+        };
+    }, [map, serviceWorkerUrl, maxSize, urlsKey, prefetch, prefetchLimit, statsInterval]);
+
+    return null;
+}
+
+export default TileCache;
@@ -1,6 +1,8 @@
 import MapContainer from './components/MapContainer';
 import Marker from './components/Marker';
+import MarkerLayer from './components/MarkerLayer';
 import TileLayer from './components/TileLayer';
+import TileCache from './components/TileCache';
 import Popup from './components/Popup';
 import Tooltip from './components/Tooltip';
 import WMSTileLayer from './components/WMSTileLayer';
@@ -33,11 +35,15 @@ import EditControl from './components/EditControl';
 import GeoJSON from './components/GeoJSON';
 import AntPath from "./components/AntPath";
 import StreetLabelProvider from './components/StreetLabelProvider';
+import Heatmap from './components/Heatmap';
+import HexbinLayer from './components/HexbinLayer';
 
 export {
     MapContainer,
     Marker,
+    MarkerLayer,
     TileLayer,
+    TileCache,
     Tooltip,
     Popup,
     WMSTileLayer,
@@ -69,5 +75,7 @@ export {
     EditControl,
     GeoJSON,
     AntPath,
-    StreetLabelProvider
+    StreetLabelProvider,
+    Heatmap,
+    HexbinLayer
 }
@@ -8,6 +8,7 @@ import {
 import "leaflet-draw"
 import * as L from "leaflet";
 import {useEffect, useRef} from "react";
+import RBush from "rbush";
 import {ControlProps} from "../leaflet-props";
 import {EventedBehavior} from "../react-leaflet-props";
 
@@ -22,6 +23,12 @@ export type EditControlProps = {
      */
     edit?: object;
 
+    /**
+     * If true, the edit handles (vertex markers) are only created for the features in view when edit mode is enabled,
+     * and for the remaining features as they come into view. Recommended for large numbers of features.
+     */
+    lazyEditHandles?: boolean;
+
     // Custom properties.
 
     /**
@@ -69,6 +76,90 @@ const manipulateToolbar = (toolbar, mode, action) => {
     }
 }
 
+type LayerItem = {
+    minX: number,
+    minY: number,
+    maxX: number,
+    maxY: number,
+    layer: L.Layer
+}
+
+const _layerItem = (layer) => {
+    const bounds = layer.getBounds ? layer.getBounds() : (layer.getLatLng ? L.latLngBounds([layer.getLatLng()]) : null);
+    if (!bounds || !bounds.isValid()) {
+        return null;
+    }
+    return {minX: bounds.getWest(), minY: bounds.getSouth(), maxX: bounds.getEast(), maxY: bounds.getNorth(), layer: layer};
+}
+
+const makeEditHandlerLazy = (handler) => {
+    // The layers are indexed (RBush) when edit mode is enabled, and editing is enabled only for the layers in view.
+    const addHooks = handler.addHooks;
+    const removeHooks = handler.removeHooks;
+    const enableLayerEdit = handler._enableLayerEdit;
+    const disableLayerEdit = handler._disableLayerEdit;
+    let pending: LayerItem[] | null = null;
+    let tree: RBush<LayerItem> | null = null;
+    let enabled = {};
+    let items = {};
+    const enableLayer = (layer) => {
+        enabled[L.Util.stamp(layer)] = true;
+        enableLayerEdit.call(handler, layer);
+    }
+    const enableVisibleLayers = () => {
+        const bounds = handler._map.getBounds();
+        tree.search({minX: bounds.getWest(), minY: bounds.getSouth(), maxX: bounds.getEast(), maxY: bounds.getNorth()}).forEach(item => {
+            tree.remove(item);
+            delete items[L.Util.stamp(item.layer)];
+            enableLayer(item.layer);
+        });
+    }
+    handler._enableLayerEdit = function (e) {
+        const layer = e.layer || e.target || e;
+        const item = pending ? _layerItem(layer) : null;
+        // While edit mode is being enabled, the layers are just collected. Layers added later are enabled right away.
+        if (item) {
+            pending.push(item);
+            items[L.Util.stamp(layer)] = item;
+            return;
+        }
+        enableLayer(layer);
+    }
+    handler._disableLayerEdit = function (e) {
+        const layer = e.layer || e.target || e;
+        const id = L.Util.stamp(layer);
+        if (enabled[id]) {
+            delete enabled[id];
+            disableLayerEdit.call(handler, layer);
+        } else if (tree && items[id]) {
+            tree.remove(items[id]);
+            delete items[id];
+        }
+    }
+    handler.addHooks = function () {
+        pending = [];
+        enabled = {};
+        items = {};
+        addHooks.call(handler);
+        tree = new RBush<LayerItem>();
+        tree.load(pending);
+        pending = null;
+        if (handler._map) {
+            handler._map.on("moveend", enableVisibleLayers);
+            enableVisibleLayers();
+        }
+    }
+    handler.removeHooks = function () {
+        if (handler._map) {
+            handler._map.off("moveend", enableVisibleLayers);
+        }
+        // Drop the index first, as only the layers with editing enabled must be disabled.
+        tree = null;
+        items = {};
+        removeHooks.call(handler);
+        enabled = {};
+    }
+}
 
 function createEditControl(){
     function createDrawElement(props, ctx) {
@@ -86,7 +177,23 @@ function createEditControl(){
         if (position) {
             options["position"] = position;
         }
-        return createElementObject(new L.Control.Draw(options), ctx)
+        const control = new L.Control.Draw(options) as any;
+        // The edit toolbar doesn't exist if editing is disabled.
+        const editToolbar = (L as any).EditToolbar ? control._toolbars[(L as any).EditToolbar.TYPE] : undefined;
+        if (props.lazyEditHandles && editToolbar) {
+            // The mode handlers are (re)created when the toolbar is added to the map, so they are patched then.
+            const getModeHandlers = editToolbar.getModeHandlers;
+            editToolbar.getModeHandlers = function (map) {
+                const modeHandlers = getModeHandlers.call(this, map);
+                modeHandlers.forEach(modeHandler => {
+                    if (modeHandler.handler instanceof (L as any).EditToolbar.Edit) {
+                        makeEditHandlerLazy(modeHandler.handler);
+                    }
+                });
+                return modeHandlers;
+            }
+        }
+        return createElementObject(control, ctx)
     }
     function updateDrawElement(instance, props, prevProps) {
         if (prevProps.drawToolbar !== props.drawToolbar) {
@@ -3,11 +3,12 @@ import * as L from "leaflet";
 import {useMap} from "react-leaflet";
 import {createElementHook, createElementObject, withPane, extendContext, useEventHandlers, useLayerLifecycle, createContainerComponent, useLeafletContext, LeafletElement} from "@react-leaflet/core";
 import Supercluster from "supercluster";
-import update from "immutability-helper";
+import KDBush from "kdbush";
 import {pick} from "../utils";
 import {FeatureGroupProps, DashFunction, Modify, resolveProp, resolveProps} from "../props";
 import {toByteArray} from "base64-js";
 import {decode} from "geobuf";
+import {topojsonToGeoJSON} from "./topojson";
 
 require('../marker-cluster.css');
 
@@ -18,7 +19,9 @@ type SuperClusterOptions = {
     cluster?: boolean;
 
     /**
-     * Function that determines how a cluster is drawn. [MUTABLE, DL]
+     * Function that determines how a cluster is drawn. It is called with the arguments (feature, latlng, index, context),
+     * where context.iconCache.get(key, createIcon) can be used to reuse icons across redraws. Here createIcon must
+     * return either L.DivIcon options or an L.Icon, and is only invoked if the key is not already cached. [MUTABLE, DL]
      */
     clusterToLayer?: DashFunction;
 
@@ -27,10 +30,33 @@ type SuperClusterOptions = {
      */
     spiderfyOnMaxZoom?: boolean;
 
+    /**
+     * Options for spiderfying clusters. Leaves are fetched from the index in pages of pageSize (a positive integer,
+     * default 1000), and clusters with more than gridThreshold leaves (default 1000) are laid out on a grid (without
+     * legs) rather than a spiral. The distanceMultiplier (default 1) scales the distance between the spiderfied markers. [MUTABLE, DL]
+     */
+    spiderfyOptions?: {distanceMultiplier?: number, gridThreshold?: number, pageSize?: number};
+
     /**
      * Options for the SuperCluster object (see https://github.com/mapbox/supercluster for details). [MUTABLE, DL]
      */
     superClusterOptions?: object;
+
+    /**
+     * Cluster property aggregations, computed once when the cluster index is built (via the map/reduce options of
+     * Supercluster). Keys are the names of the resulting cluster properties, values the aggregation specification, e.g.
+     * {"total_capacity": {"op": "sum", "property": "capacity"}}. Supported operations are "sum", "mean", "min", "max",
+     * "count" (number of points, or of points with the property set, if a property is given) and "countBy" (number of
+     * points per value of the property). [MUTABLE, DL]
+     */
+    clusterAggregates?: object;
+
+    /**
+     * A prebuilt cluster index (base64 encoded), e.g. as created by dash_leaflet.express.geojson_to_supercluster_index.
+     * If set, the index is loaded directly instead of being built client side. It must have been built from the same
+     * data, otherwise it is ignored. [MUTABLE, DL]
+     */
+    superClusterIndex?: string;
 }
 type GeoJSONOptions = {
     /**
@@ -80,9 +106,10 @@ type GeoJSONOptions = {
 export type GeoJSONProps = Modify<Modify<FeatureGroupProps, GeoJSONOptions>, {
 
     /**
-     * Data (consider using url for better performance). One of data/url must be set. [MUTABLE, DL]
+     * Data (consider using url for better performance). One of data/url must be set. Large data can be passed
+     * pre-serialized, i.e. as a string created with dash_leaflet.express.geojson_to_payload. [MUTABLE, DL]
      */
-    data?: object;
+    data?: object | string;
 
     /**
      * Url to data (use instead of data for better performance). One of data/url must be set. [MUTABLE, DL]
@@ -113,14 +140,30 @@ export type GeoJSONProps = Modify<Modify<FeatureGroupProps, GeoJSONOptions>, {
     hideout?: string | object;
 
     /**
-     * Format of the data, applies both to url/data properties. Defaults to "geojson". [MUTABLE, DL]
+     * Format of the data, applies both to url/data properties. Defaults to "geojson". For "topojson", the data can be
+     * created with dash_leaflet.express.geojson_to_topojson. [MUTABLE, DL]
+     */
+    format?: "geojson" | "geobuf" | "flatgeobuf" | "topojson";
+
+    /**
+     * Format options, i.e. the rect to load (for "flatgeobuf"), and the name of the object to decode (for "topojson",
+     * defaults to all objects). [MUTABLE, DL]
+     */
+    formatOptions?: {rect?: {minX: number, minY: number, maxX: number, maxY: number}, object?: string};
+
+    /**
+     * If true, a single popup and a single tooltip are shared by all features, with the content resolved from the
+     * "popup"/"tooltip" feature properties on click/hover. This avoids binding a popup/tooltip to every feature, which
+     * is expensive for large datasets. Only applies when onEachFeature is not set. [MUTABLE, DL]
      */
-    format?: "geojson" | "geobuf" | "flatgeobuf";
+    delegatePopups?: boolean;
 
     /**
-     * Format options, currently only used for "flatgeobuf". [MUTABLE, DL]
+     * HTML content to show in the shared popup at the location of the most recent click. Intended to be set from a
+     * callback (e.g. on clickData), so that popup content doesn't need to be shipped with the data. It is cleared on
+     * each click. Only applies when delegatePopups is true. [MUTABLE, DL]
      */
-    formatOptions?: {rect: {minX: number, minY: number, maxX: number, maxY: number}};
+    popupContent?: string;
 
 } & SuperClusterOptions>;
 
@@ -129,14 +172,14 @@ export type GeoJSONProps = Modify<Modify<FeatureGroupProps, GeoJSONOptions>, {
 
 const _funcOptions = ["pointToLayer", "style", "onEachFeature", "filter", "coordsToLatLng"]
 const _options = _funcOptions.concat(["markersInheritOptions"])
-function _parseOptions(props, map, indexRef) {
+function _parseOptions(props, map, indexRef, iconCache) {
     // TODO: Can it be avoided to do resolveProps here?
-    const context = {map: map, ...props};
+    const context = {map: map, iconCache: iconCache, ...props};
     const clusterToLayer = props.clusterToLayer? resolveProp(props.clusterToLayer, context) : undefined;
     const options = resolveProps(pick(props, ..._options), _funcOptions,  context);
     const {pointToLayer} = options;
-    // Bind default onEachFeature.
-    if (!options.onEachFeature) {
+    // Bind default onEachFeature, unless popups/tooltips are delegated to the shared instances.
+    if (!options.onEachFeature && !props.delegatePopups) {
         options.onEachFeature = (feature, layer) => {
             if (!feature.properties) {
                 return
@@ -161,7 +204,7 @@ function _parseOptions(props, map, indexRef) {
             if (clusterToLayer) {
                 return clusterToLayer(feature, latlng, indexRef.current);
             }
-            return _defaultClusterToLayer(feature, latlng, options);
+            return _defaultClusterToLayer(feature, latlng, iconCache);
         }
         if (!options.style) {
             options.style = {weight: 1.5, color: '#222', opacity: 0.5}
@@ -188,7 +231,7 @@ async function _fetchGeoJSON(props) {
     // Download data if needed.
     let geojson = data;
     if (!data && url) {
-        if (format === "geojson") {
+        if (format === "geojson" || format === "topojson") {
             const response = await fetch(url);
             geojson = await response.json();
         }
@@ -220,12 +263,19 @@ async function _fetchGeoJSON(props) {
         if (format == "geobuf") {
             geojson = toByteArray(geojson)
         }
+        // Pre-serialized data, see dash_leaflet.express.geojson_to_payload
+        if ((format === "geojson" || format === "topojson") && typeof geojson === "string") {
+            geojson = JSON.parse(geojson);
+        }
     }
     // Do any data transformations needed to arrive at geojson data. TODO: Might work only in node?
     if (format == "geobuf") {
         const pbf = await import(/* webpackChunkName: "geobuf" */  'pbf').then((module) => module.default);
         geojson = decode(new pbf(geojson));
     }
+    if (format == "topojson") {
+        geojson = topojsonToGeoJSON(geojson, formatOptions ? formatOptions.object : undefined);
+    }
     // Handle single geometries.
     if(geojson.type === "Feature"){
         geojson = {
@@ -251,7 +301,187 @@ async function _fetchGeoJSON(props) {
     return geojson
 }
 
-function _buildIndex(geojson, map, superclusterOptions){
+function _resolveAggregates(aggregates) {
+    const specs = Object.entries(aggregates).map(([name, spec]: [string, any]) => ({name: name, ...spec}));
+    const _value = (properties, spec) => {
+        const value = spec.property === undefined ? undefined : properties[spec.property];
+        return value === undefined || value === null ? null : value;
+    }
+    // Map the properties of a single point to the (initial) aggregated properties.
+    const map = (properties) => {
+        const result = {};
+        for (const spec of specs) {
+            const value = _value(properties, spec);
+            switch (spec.op) {
+                case "sum":
+                    result[spec.name] = value === null ? 0 : Number(value);
+                    break;
+                case "mean":
+                    result["_" + spec.name + "_sum"] = value === null ? 0 : Number(value);
+                    result["_" + spec.name + "_n"] = value === null ? 0 : 1;
+                    result[spec.name] = value === null ? null : Number(value);
+                    break;
+                case "min":
+                case "max":
+                    result[spec.name] = value === null ? null : Number(value);
+                    break;
+                case "count":
+                    result[spec.name] = (spec.property === undefined || value !== null) ? 1 : 0;
+                    break;
+                case "countBy":
+                    result[spec.name] = value === null ? {} : {[value]: 1};
+                    break;
+                default:
+                    throw new Error("Unsupported cluster aggregation [" + spec.op + "] for [" + spec.name + "].")
+            }
+        }
+        return result
+    }
+    // Reduce the (mapped) properties of a point or cluster into the accumulated properties of a cluster.
+    const reduce = (accumulated, properties) => {
+        for (const spec of specs) {
+            const a = accumulated[spec.name];
+            const b = properties[spec.name];
+            switch (spec.op) {
+                case "sum":
+                case "count":
+                    accumulated[spec.name] = a + b;
+                    break;
+                case "mean": {
+                    const sumKey = "_" + spec.name + "_sum";
+                    const nKey = "_" + spec.name + "_n";
+                    accumulated[sumKey] += properties[sumKey];
+                    accumulated[nKey] += properties[nKey];
+                    accumulated[spec.name] = accumulated[nKey] > 0 ? accumulated[sumKey] / accumulated[nKey] : null;
+                    break;
+                }
+                case "min":
+                    accumulated[spec.name] = a === null ? b : (b === null ? a : Math.min(a, b));
+                    break;
+                case "max":
+                    accumulated[spec.name] = a === null ? b : (b === null ? a : Math.max(a, b));
+                    break;
+                case "countBy": {
+                    // Copy before modification, as the object might be shared with a child cluster (shallow clone).
+                    const counts = {...a};
+                    for (const key in b) {
+                        counts[key] = (counts[key] || 0) + b[key];
+                    }
+                    accumulated[spec.name] = counts;
+                    break;
+                }
+            }
+        }
+    }
+    return {map: map, reduce: reduce}
+}
+
+let indexFormatSupported: boolean = undefined;
+
+/**
+ * The prebuilt index is loaded into the internal state of Supercluster (v8), i.e. its trees (KDBush v4 indices holding
+ * a flat data array with a stride of 6, or 7 with aggregates). As that's not part of the public API, the layout is
+ * checked (once) on a tiny index built by Supercluster itself.
+ */
+function _checkIndexFormat(): boolean {
+    if (indexFormatSupported === undefined) {
+        try {
+            const probe = new Supercluster({minZoom: 0, maxZoom: 0}) as any;
+            probe.load([{type: "Feature", properties: {}, geometry: {type: "Point", coordinates: [0, 0]}}]);
+            const tree = Array.isArray(probe.trees) ? probe.trees[1] : undefined;
+            indexFormatSupported = probe.stride === 6 && tree !== undefined && tree.data.length === 6 &&
+                tree.data[3] === 0 && tree.data[4] === -1 && tree.data[5] === 1 && tree.coords instanceof Float32Array &&
+                tree.ids.length === 1 && typeof tree.range === "function" && typeof tree.within === "function";
+        } catch (e) {
+            indexFormatSupported = false;
+        }
+    }
+    return indexFormatSupported;
+}
+
+function _coordinatesHash(features) {
+    // Position dependent (32 bit) hash of the float32 lng/lat words of the features, missing geometries hashed as
+    // 0xFFFFFFFF words (see dash_leaflet.express._coordinates_hash).
+    const coords = new Float32Array(2 * features.length).fill(NaN);
+    features.forEach((feature, i) => {
+        if (feature.geometry) {
+            coords[2 * i] = feature.geometry.coordinates[0];
+            coords[2 * i + 1] = feature.geometry.coordinates[1];
+        }
+    });
+    const words = new Uint32Array(coords.buffer);
+    let hash = 0;
+    for (let k = 0; k < words.length; k++) {
+        const word = isNaN(coords[k]) ? 0xFFFFFFFF : words[k];
+        hash = (hash + Math.imul(word ^ (word >>> 15), Math.imul(2 * k + 1, 0x9E3779B1))) | 0;
+    }
+    return hash >>> 0;
+}
+
+function _loadIndex(geojson, encoded) {
+    if (!_checkIndexFormat()) {
+        throw new Error("The cluster index format is not supported by this version of Supercluster.");
+    }
+    const bytes = toByteArray(encoded);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    if (String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]) !== "DLSC") {
+        throw new Error("Invalid cluster index.");
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+    if (header.numPoints !== geojson.features.length || header.coordinatesHash !== _coordinatesHash(geojson.features)) {
+        throw new Error("The cluster index does not match the data.");
+    }
+    // Recreate the index state, i.e. the trees and the flat data arrays (see Supercluster.load).
+    const index = new Supercluster(header.options) as any;
+    const stride = header.aggregates ? 7 : 6;
+    index.points = geojson.features;
+    index.stride = stride;
+    index.clusterProps = header.clusterProps;
+    index.trees = new Array(header.options.maxZoom + 2);
+    // Copy into a fresh buffer to guarantee alignment of the typed array views.
+    const buffer = bytes.slice(8 + headerLength + (8 - (8 + headerLength) % 8) % 8).buffer;
+    header.trees.forEach(t => {
+        const n = t.numItems;
+        const tree = KDBush.from(buffer.slice(t.offset, t.offset + t.treeLength));
+        const ids = (tree as any).ids;
+        const coords = (tree as any).coords;
+        const columns = t.offset + t.treeLength;
+        const clusterIds = new Uint32Array(buffer, columns, n);
+        const parents = new Uint32Array(buffer, columns + 4 * n, n);
+        const nums = new Uint32Array(buffer, columns + 8 * n, n);
+        const props = header.aggregates ? new Int32Array(buffer, columns + 12 * n, n) : undefined;
+        const data = new Float64Array(n * stride);
+        for (let i = 0; i < n; i++) {
+            const k = ids[i] * stride;
+            data[k] = coords[2 * i];
+            data[k + 1] = coords[2 * i + 1];
+        }
+        for (let i = 0; i < n; i++) {
+            const k = i * stride;
+            data[k + 2] = Infinity;
+            data[k + 3] = clusterIds[i];
+            data[k + 4] = parents[i] === 0xFFFFFFFF ? -1 : parents[i];
+            data[k + 5] = nums[i];
+            if (props) {
+                data[k + 6] = props[i];
+            }
+        }
+        (tree as any).data = data;
+        index.trees[t.zoom] = tree;
+    });
+    return index;
+}
+
+function _buildIndex(geojson, map, superclusterOptions, aggregates = undefined, prebuilt = undefined){
+    // Use the prebuilt index, if available (and supported), otherwise build it client side.
+    if (prebuilt) {
+        try {
+            return _loadIndex(geojson, prebuilt);
+        } catch (e) {
+            console.warn(e);
+        }
+    }
     // Try to guess max zoom.
     if(!superclusterOptions || !("maxZoom" in superclusterOptions)){
         const maxZoom = map._layersMaxZoom;
@@ -264,6 +494,10 @@ function _buildIndex(geojson, map, superclusterOptions){
             }
         }
     }
+    // Add aggregations (if any). The options are copied, as the map/reduce functions must not end up in the props.
+    if (aggregates) {
+        superclusterOptions = {...superclusterOptions, ..._resolveAggregates(aggregates)}
+    }
     // Create index.
     const index = new Supercluster(superclusterOptions);
     index.load(geojson.features);
@@ -293,7 +527,7 @@ function _redrawClusters(instance, props, map, index, toSpiderfyRef) {
         }
         // Otherwise, do spiderfy.
         else {
-            clusters = _defaultSpiderfy(map, index, clusters, [toSpiderfyRef.current.clusterId]);
+            clusters = _defaultSpiderfy(map, index, clusters, [toSpiderfyRef.current.clusterId], props.spiderfyOptions);
             toSpiderfyRef.current.zoom = zoom;
         }
     }
@@ -379,35 +613,94 @@ function _defaultPointToLayer(feature, latlng, options) {
     return new L.Marker(latlng, options && options.markersInheritOptions && options);
 }
 
-function _defaultClusterToLayer(feature, latlng, options) {
+const _clusterClassNames = [
+    {minCount: 0, className: "marker-cluster marker-cluster-small"},
+    {minCount: 100, className: "marker-cluster marker-cluster-medium"},
+    {minCount: 1000, className: "marker-cluster marker-cluster-large"},
+]
+
+function _defaultClusterToLayer(feature, latlng, iconCache) {
     const iconSize = 40;
-    const classNames = [
-        {minCount: 0, className: "marker-cluster marker-cluster-small"},
-        {minCount: 100, className: "marker-cluster marker-cluster-medium"},
-        {minCount: 1000, className: "marker-cluster marker-cluster-large"},
-    ]
     const count = feature.properties.point_count;
     let className = "";
-    for (let i in classNames) {
-        if (count > classNames[i]["minCount"]) {
-            className = classNames[i]["className"]
+    for (let i in _clusterClassNames) {
+        if (count > _clusterClassNames[i]["minCount"]) {
+            className = _clusterClassNames[i]["className"]
         }
     }
-    const icon = L.divIcon({
-        html: '<div><span>' + feature.properties.point_count_abbreviated + '</span></div>',
+    const abbreviated = feature.properties.point_count_abbreviated;
+    const icon = iconCache.get(className + "|" + abbreviated, () => ({
+        html: '<div><span>' + abbreviated + '</span></div>',
         className: className,
         iconSize: L.point(iconSize, iconSize)
-    });
+    }));
     return L.marker(latlng, {
         icon: icon
     });
 }
 
-function _defaultSpiderfy(map, index, clusters, toSpiderfy) {
+/**
+ * A DivIcon that parses its HTML only once, and creates subsequent icon elements by cloning the parsed template.
+ */
+const TemplateDivIcon = L.DivIcon.extend({
+    createIcon: function (oldIcon) {
+        if (!this._template) {
+            this._template = L.DivIcon.prototype.createIcon.call(this);
+        }
+        return this._template.cloneNode(true);
+    }
+});
+
+/**
+ * Bounded (LRU) cache of icons, intended for reuse of cluster icons across redraws.
+ */
+export class IconCache {
+    private icons = new Map<string, L.Icon | L.DivIcon>();
+    private maxSize: number;
+    hits = 0;
+    misses = 0;
+
+    constructor(maxSize: number = 1000) {
+        this.maxSize = maxSize;
+    }
+
+    get(key: string, createIcon: () => L.DivIconOptions | L.Icon | L.DivIcon) {
+        let icon = this.icons.get(key);
+        if (icon !== undefined) {
+            // Move the key to the end, i.e. mark it as most recently used.
+            this.icons.delete(key);
+            this.icons.set(key, icon);
+            this.hits++;
+            return icon
+        }
+        this.misses++;
+        const value = createIcon();
+        icon = value instanceof L.Icon ? value : new TemplateDivIcon(value);
+        this.icons.set(key, icon);
+        // Evict the least recently used icon, if the cache is full.
+        if (this.icons.size > this.maxSize) {
+            this.icons.delete(this.icons.keys().next().value);
+        }
+        return icon
+    }
+
+    clear() {
+        this.icons.clear();
+    }
+}
+
+// Cache of spiderfy layouts, i.e. pixel offsets relative to the cluster center, keyed by layout type and leaf count.
+const _spiderfyLayouts = new Map<string, Float64Array>();
+const _spiderfyLayoutsMaxSize = 64;
+
+function _defaultSpiderfy(map, index, clusters, toSpiderfy, spiderfyOptions = undefined) {
 
     // Source: https://github.com/Leaflet/Leaflet.markercluster/blob/master/src/MarkerCluster.Spiderfier.js
 
-    const spiderfyDistanceMultiplier = 1; // TODO: Make make it available as option?
+    const {distanceMultiplier = 1, gridThreshold = 1000} = spiderfyOptions || {};
+    // Supercluster treats a limit of 0 as its default (10), i.e. the page size must be a positive integer
+    const pageSize = Math.max(1, Math.floor((spiderfyOptions || {}).pageSize) || 1000);
+    const spiderfyDistanceMultiplier = distanceMultiplier;
     const _2PI = Math.PI * 2;
     const _circleFootSeparation = 25; //related to circumference of circle
     const _circleStartAngle = 0;
@@ -416,38 +709,39 @@ function _defaultSpiderfy(map, index, clusters, toSpiderfy) {
     const _spiralLengthFactor = 5;
     const _circleSpiralSwitchover = 9; //show spiral instead of circle from this marker count upwards.
     // 0 -> always spiral; Infinity -> always circle
+    const _gridSeparation = 25;
 
-    function _generatePointsCircle(count, centerPt) {
+    function _generateOffsetsCircle(count) {
         const circumference = spiderfyDistanceMultiplier * _circleFootSeparation * (2 + count),
             angleStep = _2PI / count,
-            res = [];
+            res = new Float64Array(2 * count);
         let legLength = circumference / _2PI;  //radius from circumference
         let i, angle;
         legLength = Math.max(legLength, 35); // Minimum distance to get outside the cluster icon.
-        res.length = count;
         for (i = 0; i < count; i++) { // Clockwise, like spiral.
             angle = _circleStartAngle + i * angleStep;
-            res[i] = new L.Point(centerPt.x + legLength * Math.cos(angle), centerPt.y + legLength * Math.sin(angle)).round();
+            res[2 * i] = Math.round(legLength * Math.cos(angle));
+            // The y-shift is a hack for standard blue icon, otherwise circles look wrong (renders differently for other icons).
+            res[2 * i + 1] = Math.round(10 + legLength * Math.sin(angle));
         }
         return res;
     }
 
-    function _generatePointsSpiral(count, centerPt) {
+    function _generateOffsetsSpiral(count) {
         const separation = spiderfyDistanceMultiplier * _spiralFootSeparation;
         let legLength = spiderfyDistanceMultiplier * _spiralLengthStart;
         let lengthFactor = spiderfyDistanceMultiplier * _spiralLengthFactor * _2PI;
         let angle = 0;
-        const res = [];
+        const res = new Float64Array(2 * count);
         let i;
 
-        res.length = count;
-
         // Higher index, closer position to cluster center.
         for (i = count; i >= 0; i--) {
             // Skip the first position, so that we are already farther from center and we avoid
             // being under the default cluster icon (especially important for Circle Markers).
             if (i < count) {
-                res[i] = new L.Point(centerPt.x + legLength * Math.cos(angle), centerPt.y + legLength * Math.sin(angle)).round();
+                res[2 * i] = Math.round(legLength * Math.cos(angle));
+                res[2 * i + 1] = Math.round(legLength * Math.sin(angle));
             }
             angle += separation / legLength + i * 0.0005;
             legLength += lengthFactor / angle;
@@ -455,32 +749,75 @@ function _defaultSpiderfy(map, index, clusters, toSpiderfy) {
         return res;
     }
 
-    function _spiderfy(cluster) {
+    function _generateOffsetsGrid(count) {
+        const separation = spiderfyDistanceMultiplier * _gridSeparation;
+        const columns = Math.ceil(Math.sqrt(count));
+        const rows = Math.ceil(count / columns);
+        const res = new Float64Array(2 * count);
+        for (let i = 0; i < count; i++) {
+            res[2 * i] = Math.round(((i % columns) - (columns - 1) / 2) * separation);
+            res[2 * i + 1] = Math.round((Math.floor(i / columns) - (rows - 1) / 2) * separation);
+        }
+        return res;
+    }
+
+    function _getOffsets(count) {
+        const layout = count > gridThreshold ? "grid" : (count >= _circleSpiralSwitchover ? "spiral" : "circle");
+        const key = layout + "|" + count + "|" + spiderfyDistanceMultiplier;
+        let offsets = _spiderfyLayouts.get(key);
+        if (offsets === undefined) {
+            if (layout === "grid") {
+                offsets = _generateOffsetsGrid(count);
+            } else if (layout === "spiral") {
+                offsets = _generateOffsetsSpiral(count);
+            } else {
+                offsets = _generateOffsetsCircle(count);
+            }
+            _spiderfyLayouts.set(key, offsets);
+            if (_spiderfyLayouts.size > _spiderfyLayoutsMaxSize) {
+                _spiderfyLayouts.delete(_spiderfyLayouts.keys().next().value);
+            }
+        }
+        return {offsets: offsets, legs: layout !== "grid"};
+    }
+
+    function _getLeaves(clusterId) {
+        const leaves = [];
+        for (let offset = 0; ; offset += pageSize) {
+            const page = index.getLeaves(clusterId, pageSize, offset);
+            for (let i = 0; i < page.length; i++) {
+                leaves.push(page[i]);
+            }
+            if (page.length === 0 || page.length < pageSize) {
+                return leaves;
+            }
+        }
+    }
+
+    function _spiderfy(cluster, spiderfied) {
         const lnglat = cluster.geometry.coordinates;
-        let center = map.latLngToLayerPoint([lnglat[1], lnglat[0]]);
-        const leaves = index.getLeaves(cluster.properties.cluster_id, 1000, 0);
+        const center = map.latLngToLayerPoint([lnglat[1], lnglat[0]]);
+        const leaves = _getLeaves(cluster.properties.cluster_id);
         // Generate positions.
-        let positions, leg, newPos;
-        if (leaves.length >= _circleSpiralSwitchover) {
-            positions = _generatePointsSpiral(leaves.length, center);
-        } else {
-            center.y += 10; // Otherwise circles look wrong => hack for standard blue icon, renders differently for other icons.
-            positions = _generatePointsCircle(leaves.length, center);
-        }
-        // Create spiderfied leaves.
-        let legs = [];
+        const {offsets, legs} = _getOffsets(leaves.length);
+        // Create spiderfied leaves (and legs). The leaves are not modified, as they are references to the source data.
+        let newPos;
         for (let i = 0; i < leaves.length; i++) {
-            newPos = map.layerPointToLatLng(positions[i]);
-            leg = [cluster.geometry.coordinates, [newPos.lng, newPos.lat]];
-            legs.push({
+            newPos = map.layerPointToLatLng(L.point(center.x + offsets[2 * i], center.y + offsets[2 * i + 1]));
+            spiderfied.push({
                 "type": "Feature",
-                "geometry": {"type": "LineString", "coordinates": leg},
-                "properties": {"id": leaves[i].properties.id}
+                "id": leaves[i].id,
+                "geometry": {"type": "Point", "coordinates": [newPos.lng, newPos.lat]},
+                "properties": leaves[i].properties
             });
-            // Update the marker position.
-            leaves[i] = update(leaves[i], {geometry: {coordinates: {$set: [newPos.lng, newPos.lat]}}})
+            if (legs) {
+                spiderfied.push({
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": [lnglat, [newPos.lng, newPos.lat]]},
+                    "properties": {"id": leaves[i].properties.id}
+                });
+            }
         }
-        return leaves.concat(legs);
     }
     // Check if there are any cluster(s) to spiderfy.
     const matches = clusters.filter(item => toSpiderfy.includes(item.properties.cluster_id));
@@ -488,9 +825,9 @@ function _defaultSpiderfy(map, index, clusters, toSpiderfy) {
         return clusters
     }
     // Do spiderfy.
-    let spiderfied = clusters.filter(item => !toSpiderfy.includes(item.properties.cluster_id));
+    const spiderfied = clusters.filter(item => !toSpiderfy.includes(item.properties.cluster_id));
     for (let i = 0; i < matches.length; i++) {
-        spiderfied = spiderfied.concat(_spiderfy(matches[i]))
+        _spiderfy(matches[i], spiderfied)
     }
 
     return spiderfied
@@ -500,6 +837,26 @@ function _defaultSpiderfy(map, index, clusters, toSpiderfy) {
 
 //#region Events
 
+function _getPopupLatLng(e) {
+    return e.layer.getLatLng ? e.layer.getLatLng() : e.latlng;
+}
+
+function _openDelegatedPopup(e, map, popup) {
+    const properties = e.layer.feature && e.layer.feature.properties;
+    if (!properties || !properties.popup) {
+        return
+    }
+    map.openPopup(popup.setLatLng(_getPopupLatLng(e)).setContent(properties.popup));
+}
+
+function _openDelegatedTooltip(e, map, tooltip) {
+    const properties = e.layer.feature && e.layer.feature.properties;
+    if (!properties || !properties.tooltip) {
+        return
+    }
+    map.openTooltip(tooltip.setLatLng(_getPopupLatLng(e)).setContent(properties.tooltip));
+}
+
 function _handleClick(e, instance, props, map, index, toSpiderfyRef) {
     const {zoomToBoundsOnClick, spiderfyOnMaxZoom, cluster} = props;
     // Check if any actions are enabled. If not, just return.
@@ -552,6 +909,30 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
     const toSpiderfyRef = useRef<object>();
     const propsRef = useRef(props)
     const busyRef = useRef(false)
+    const popupRef = useRef<L.Popup>();
+    const tooltipRef = useRef<L.Tooltip>();
+    const popupLatLngRef = useRef<L.LatLng>();
+    const iconCacheRef = useRef<IconCache>();
+    if (!iconCacheRef.current) {
+        iconCacheRef.current = new IconCache();
+    }
+
+    //#region Delegated popups
+
+    const _getPopup = () => {
+        if (!popupRef.current) {
+            popupRef.current = L.popup();
+        }
+        return popupRef.current
+    }
+    const _getTooltip = () => {
+        if (!tooltipRef.current) {
+            tooltipRef.current = L.tooltip();
+        }
+        return tooltipRef.current
+    }
+
+    //#endregion
 
     //#region Events
 
@@ -561,9 +942,18 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
         }
         _redrawClusters(instance, propsRef.current, map, indexRef.current, toSpiderfyRef)
     };
-    const _onClick = (e) => _handleClick(e, instance, propsRef.current, map, indexRef.current, toSpiderfyRef);
+    const _onClick = (e) => {
+        if (propsRef.current.delegatePopups) {
+            popupLatLngRef.current = _getPopupLatLng(e);
+            _openDelegatedPopup(e, map, _getPopup());
+        }
+        _handleClick(e, instance, propsRef.current, map, indexRef.current, toSpiderfyRef);
+    }
     const _onMouseOver = (e) => {
         const feature = e.layer.feature;
+        if (propsRef.current.delegatePopups) {
+            _openDelegatedTooltip(e, map, _getTooltip());
+        }
         let hoverStyle = propsRef.current.hoverStyle
         // Hover styling.
         if (hoverStyle) {
@@ -576,6 +966,9 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
         }
     }
     const _onMouseOut = (e) => {
+        if (tooltipRef.current) {
+            map.closeTooltip(tooltipRef.current);
+        }
         // Hover styling.
         if (propsRef.current.hoverStyle) {
             instance.resetStyle(e.layer);
@@ -595,6 +988,12 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
         instance.off('mouseout', _onMouseOut);
         instance.off('click', _onClick);
         map.off('moveend', _onMoveEnd);
+        if (popupRef.current) {
+            map.closePopup(popupRef.current);
+        }
+        if (tooltipRef.current) {
+            map.closeTooltip(tooltipRef.current);
+        }
     }
 
     //#endregion
@@ -610,7 +1009,7 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
             }
             // Refresh index.
             if (props.cluster) {
-                indexRef.current = _buildIndex(geojson, map, props.superClusterOptions)
+                indexRef.current = _buildIndex(geojson, map, props.superClusterOptions, props.clusterAggregates, props.superClusterIndex)
             }
             // Draw stuff.
             _redraw(instance, props, map, geojson, indexRef.current, toSpiderfyRef);
@@ -621,7 +1020,7 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
     // This hook is responsible for initialization and cleanup.
     useEffect(
         function initGeojson() {
-            instance.options = _parseOptions(props, map, indexRef);
+            instance.options = _parseOptions(props, map, indexRef, iconCacheRef.current);
             _setData(true);
             return function removeEventHandlers() {
                 _unbindEvents();
@@ -641,7 +1040,7 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
                 let redrawNeeded = false;
                 let reindexNeeded = false;
                 // Update element options.
-                let optionsChanged = prevProps.hideout !== props.hideout
+                let optionsChanged = prevProps.hideout !== props.hideout || prevProps.delegatePopups !== props.delegatePopups
                 if (!optionsChanged) {
                     _options.forEach(o => {
                         if (prevProps[o] !== props[o]) {
@@ -661,7 +1060,7 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
                     redrawNeeded = true;
                 }
                 // Update cluster options
-                const clusterOptionsChanged = prevProps.superClusterOptions !== props.superClusterOptions;
+                const clusterOptionsChanged = prevProps.superClusterOptions !== props.superClusterOptions || prevProps.clusterAggregates !== props.clusterAggregates || prevProps.superClusterIndex !== props.superClusterIndex;
                 if (clusterOptionsChanged) {
                     reindexNeeded = true
                     redrawNeeded = true;
@@ -674,10 +1073,12 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
                 }
                 // If needed, dispatch actions.
                 if (reindexNeeded) {
-                    indexRef.current = _buildIndex(geojsonRef.current, map, props.superClusterOptions)
+                    indexRef.current = _buildIndex(geojsonRef.current, map, props.superClusterOptions, props.clusterAggregates, props.superClusterIndex)
                 }
                 if (reparseNeeded) {
-                    instance.options = {...instance.options, ..._parseOptions(props, map, indexRef)}
+                    // Cached icons might depend on the options (e.g. via the hideout), so they must be recreated.
+                    iconCacheRef.current.clear();
+                    instance.options = {...instance.options, ..._parseOptions(props, map, indexRef, iconCacheRef.current)}
                 }
                 if (redrawNeeded) {
                     _redraw(instance, props, map, geojsonRef.current, indexRef.current, toSpiderfyRef);
@@ -688,6 +1089,16 @@ function useUpdateGeoJSON(element: LeafletElement<L.GeoJSON>, props: GeoJSONProp
         },
         [element, props, instance],
     )
+    // This hook is responsible for showing popup content resolved on demand (e.g. via a Dash callback).
+    useEffect(
+        function updatePopupContent() {
+            if (!props.delegatePopups || !props.popupContent || !popupLatLngRef.current) {
+                return;
+            }
+            map.openPopup(_getPopup().setLatLng(popupLatLngRef.current).setContent(props.popupContent));
+        },
+        [props.popupContent],
+    )
 }
 
 const useGeoJSON = createElementHook<L.GeoJSON, GeoJSONProps>(
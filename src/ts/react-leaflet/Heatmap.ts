@@ -0,0 +1,559 @@
+import {createElementObject, createLayerComponent} from "@react-leaflet/core";
+import * as L from "leaflet";
+import {toByteArray} from "base64-js";
+import {LayerComponent} from "../react-leaflet-props";
+
+/**
+ * Pre-binned density grid, i.e. the (base64 encoded) uint32 flat indices (row major, the first row being the
+ * southernmost) and float32 values of the non-empty cells. See dash_leaflet.express.points_to_heatmap_grid.
+ */
+export type HeatmapGrid = {
+    bounds: number[][],
+    shape: number[],
+    index: string,
+    values: string
+}
+
+export type HeatmapProps = {
+    /**
+     * Points of the heatmap, i.e. a list of [lat, lon] or [lat, lon, intensity] triplets. [MUTABLE, DL]
+     */
+    points?: number[][];
+
+    /**
+     * Pre-binned density grid, as created by dash_leaflet.express.points_to_heatmap_grid. Each (non-empty) cell is
+     * drawn as a point at the cell center, weighted by the cell value. Takes precedence over points. [MUTABLE, DL]
+     */
+    grid?: HeatmapGrid;
+
+    /**
+     * Radius of the kernel of each point, in the units of radiusUnits. Default value is 25. [MUTABLE, DL]
+     */
+    radius?: number;
+
+    /**
+     * Units of the radius, i.e. "pixels" (the kernel has the same size on screen at all zoom levels) or "meters"
+     * (the kernel scales with the map). Default value is "pixels". [MUTABLE, DL]
+     */
+    radiusUnits?: "pixels" | "meters";
+
+    /**
+     * Density that maps to the top of the gradient. If not set, it's estimated from the points in view after each
+     * move. [MUTABLE, DL]
+     */
+    max?: number;
+
+    /**
+     * Minimum opacity of (non-zero) densities. Default value is 0.05. [MUTABLE, DL]
+     */
+    minOpacity?: number;
+
+    /**
+     * Color gradient, either a mapping of stops (between 0 and 1) to colors, or a list of (equally spaced) colors.
+     * [MUTABLE, DL]
+     */
+    gradient?: { [stop: string]: string } | string[];
+
+    /**
+     * The layer opacity. [MUTABLE, DL]
+     */
+    opacity?: number;
+} & LayerComponent;
+
+const DEFAULT_GRADIENT = {0.4: 'blue', 0.6: 'cyan', 0.7: 'lime', 0.8: 'yellow', 1.0: 'red'};
+const EARTH_CIRCUMFERENCE = 40075016.686;
+const MAX_LATITUDE = 85.0511287798;
+
+// The points are projected (on the CPU) relative to the pixel origin at projection time, so that the float32
+// coordinates near the view are precise, and panning only changes the offset uniform.
+const POINT_VERTEX_SHADER = `
+precision highp float;
+attribute vec2 a_position;
+attribute float a_intensity;
+uniform vec2 u_offset;
+uniform vec2 u_size;
+uniform float u_radius;
+uniform float u_max;
+varying float v_weight;
+void main() {
+    vec2 p = (a_position + u_offset) / u_size * 2.0 - 1.0;
+    gl_Position = vec4(p.x, -p.y, 0.0, 1.0);
+    gl_PointSize = 2.0 * u_radius;
+    v_weight = a_intensity / u_max;
+}`;
+
+const POINT_FRAGMENT_SHADER = `
+precision mediump float;
+varying float v_weight;
+void main() {
+    vec2 d = gl_PointCoord * 2.0 - 1.0;
+    float r2 = dot(d, d);
+    if (r2 > 1.0) discard;
+    float k = 1.0 - r2;
+    gl_FragColor = vec4(v_weight * k * k, 0.0, 0.0, 1.0);
+}`;
+
+const COLORIZE_VERTEX_SHADER = `
+precision highp float;
+attribute vec2 a_vertex;
+uniform vec2 u_uvScale;
+uniform vec2 u_uvOffset;
+varying vec2 v_uv;
+void main() {
+    v_uv = (a_vertex * 0.5 + 0.5) * u_uvScale + u_uvOffset;
+    gl_Position = vec4(a_vertex, 0.0, 1.0);
+}`;
+
+const COLORIZE_FRAGMENT_SHADER = `
+precision mediump float;
+uniform sampler2D u_density;
+uniform sampler2D u_gradient;
+uniform float u_minOpacity;
+varying vec2 v_uv;
+void main() {
+    float t = clamp(texture2D(u_density, v_uv).r, 0.0, 1.0);
+    if (t <= 0.0) {
+        gl_FragColor = vec4(0.0);
+        return;
+    }
+    vec4 color = texture2D(u_gradient, vec2(t, 0.5));
+    float alpha = max(t, u_minOpacity) * color.a;
+    gl_FragColor = vec4(color.rgb * alpha, alpha);
+}`;
+
+function createShader(gl: WebGLRenderingContext, type: number, source: string): WebGLShader {
+    const shader = gl.createShader(type);
+    gl.shaderSource(shader, source);
+    gl.compileShader(shader);
+    if (!gl.getShaderParameter(shader, gl.COMPILE_STATUS)) {
+        throw new Error(gl.getShaderInfoLog(shader));
+    }
+    return shader;
+}
+
+function createProgram(gl: WebGLRenderingContext, vertexSource: string, fragmentSource: string): WebGLProgram {
+    const program = gl.createProgram();
+    gl.attachShader(program, createShader(gl, gl.VERTEX_SHADER, vertexSource));
+    gl.attachShader(program, createShader(gl, gl.FRAGMENT_SHADER, fragmentSource));
+    gl.linkProgram(program);
+    if (!gl.getProgramParameter(program, gl.LINK_STATUS)) {
+        throw new Error(gl.getProgramInfoLog(program));
+    }
+    return program;
+}
+
+function createTexture(gl: WebGLRenderingContext, filter: number): WebGLTexture {
+    const texture = gl.createTexture();
+    gl.bindTexture(gl.TEXTURE_2D, texture);
+    gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MIN_FILTER, filter);
+    gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MAG_FILTER, filter);
+    gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_WRAP_S, gl.CLAMP_TO_EDGE);
+    gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_WRAP_T, gl.CLAMP_TO_EDGE);
+    return texture;
+}
+
+/**
+ * Get the texture types that can be rendered to (with additive blending), most precise first. Without float
+ * textures, the density is accumulated in 8 bits, i.e. it saturates at max.
+ */
+function getTextureTypes(gl: WebGLRenderingContext): number[] {
+    const types = [];
+    if (gl.getExtension('OES_texture_float')) {
+        gl.getExtension('WEBGL_color_buffer_float');
+        types.push(gl.FLOAT);
+    }
+    const half = gl.getExtension('OES_texture_half_float');
+    if (half) {
+        gl.getExtension('EXT_color_buffer_half_float');
+        types.push(half.HALF_FLOAT_OES);
+    }
+    types.push(gl.UNSIGNED_BYTE);
+    return types;
+}
+
+function decode(value: string, ArrayType: Float32ArrayConstructor | Uint32ArrayConstructor) {
+    const bytes = toByteArray(value);
+    // Copy to ensure alignment
+    return new ArrayType(bytes.slice().buffer, 0, bytes.byteLength / ArrayType.BYTES_PER_ELEMENT);
+}
+
+/**
+ * Convert the points (or grid) to flat arrays of coordinates ([lat, lng, lat, lng, ...]) and intensities.
+ */
+function toArrays(points: number[][], grid: HeatmapGrid): { latlngs: Float64Array, intensities: Float32Array } {
+    if (grid) {
+        const index = decode(grid.index, Uint32Array);
+        const values = decode(grid.values, Float32Array);
+        const [[south, west], [north, east]] = grid.bounds;
+        const [rows, cols] = grid.shape;
+        const latlngs = new Float64Array(2 * index.length);
+        for (let i = 0; i < index.length; i++) {
+            const row = Math.floor(index[i] / cols);
+            const col = index[i] - row * cols;
+            latlngs[2 * i] = south + (row + 0.5) * (north - south) / rows;
+            latlngs[2 * i + 1] = west + (col + 0.5) * (east - west) / cols;
+        }
+        return {latlngs, intensities: values as Float32Array};
+    }
+    points = points || [];
+    const latlngs = new Float64Array(2 * points.length);
+    const intensities = new Float32Array(points.length);
+    for (let i = 0; i < points.length; i++) {
+        latlngs[2 * i] = points[i][0];
+        latlngs[2 * i + 1] = points[i][1];
+        intensities[i] = points[i].length > 2 ? points[i][2] : 1;
+    }
+    return {latlngs, intensities};
+}
+
+function drawGradient(gradient): HTMLCanvasElement {
+    const canvas = document.createElement('canvas');
+    canvas.width = 256;
+    canvas.height = 1;
+    const ctx = canvas.getContext('2d');
+    const linear = ctx.createLinearGradient(0, 0, 256, 0);
+    if (Array.isArray(gradient)) {
+        gradient.forEach((color, i) => linear.addColorStop(gradient.length > 1 ? i / (gradient.length - 1) : 1, color));
+    } else {
+        Object.keys(gradient).forEach(stop => linear.addColorStop(Number(stop), gradient[stop]));
+    }
+    ctx.fillStyle = linear;
+    ctx.fillRect(0, 0, 256, 1);
+    return canvas;
+}
+
+/**
+ * Heatmap layer, accumulating the kernels of the points (drawn as point sprites) in an offscreen texture via additive
+ * blending, and mapping the accumulated density to colors in a second pass. Both passes run on the GPU (WebGL).
+ */
+export const HeatmapLayer = L.Layer.extend({
+    options: {
+        radius: 25,
+        radiusUnits: 'pixels',
+        max: undefined,
+        minOpacity: 0.05,
+        gradient: DEFAULT_GRADIENT,
+        opacity: 1,
+        pane: 'overlayPane'
+    },
+
+    initialize: function (options) {
+        L.setOptions(this, options);
+        this._frame = null;
+        this._latlngs = new Float64Array(0);
+        this._intensities = new Float32Array(0);
+        this._projected = null;
+        this._max = 1;
+        this._estimateMax = true;
+    },
+
+    setData: function (points: number[][], grid: HeatmapGrid) {
+        const {latlngs, intensities} = toArrays(points, grid);
+        this._latlngs = latlngs;
+        this._intensities = intensities;
+        this._projected = null;
+        this._estimateMax = true;
+        this._requestFrame();
+    },
+
+    setOptions: function (options) {
+        const gradient = this.options.gradient;
+        L.setOptions(this, options);
+        if (this._gl && this.options.gradient !== gradient) {
+            this._uploadGradient();
+        }
+        if (this._canvas) {
+            this._canvas.style.opacity = String(this.options.opacity);
+        }
+        this._estimateMax = true;
+        this._requestFrame();
+    },
+
+    onAdd: function (map: L.Map) {
+        this._canvas = L.DomUtil.create('canvas', 'leaflet-heatmap-layer leaflet-zoom-hide');
+        this._canvas.style.position = 'absolute';
+        this._canvas.style.pointerEvents = 'none';
+        this._canvas.style.opacity = String(this.options.opacity);
+        this.getPane().appendChild(this._canvas);
+        this._gl = this._canvas.getContext('webgl', {premultipliedAlpha: true, antialias: false});
+        if (!this._gl) {
+            console.warn('Heatmap: WebGL is not supported');
+            return;
+        }
+        this._setupGL();
+        map.on('resize', this._resize, this);
+        map.on('move viewreset zoomend', this._requestFrame, this);
+        map.on('moveend', this._onMoveEnd, this);
+        this._resize();
+    },
+
+    onRemove: function (map: L.Map) {
+        map.off('resize', this._resize, this);
+        map.off('move viewreset zoomend', this._requestFrame, this);
+        map.off('moveend', this._onMoveEnd, this);
+        if (this._frame !== null) {
+            L.Util.cancelAnimFrame(this._frame);
+            this._frame = null;
+        }
+        if (this._gl) {
+            const lose = this._gl.getExtension('WEBGL_lose_context');
+            if (lose) lose.loseContext();
+            this._gl = null;
+        }
+        this._projected = null;
+        L.DomUtil.remove(this._canvas);
+    },
+
+    _setupGL: function () {
+        const gl: WebGLRenderingContext = this._gl;
+        this._pointProgram = createProgram(gl, POINT_VERTEX_SHADER, POINT_FRAGMENT_SHADER);
+        this._colorizeProgram = createProgram(gl, COLORIZE_VERTEX_SHADER, COLORIZE_FRAGMENT_SHADER);
+        this._positionBuffer = gl.createBuffer();
+        this._intensityBuffer = gl.createBuffer();
+        this._quadBuffer = gl.createBuffer();
+        gl.bindBuffer(gl.ARRAY_BUFFER, this._quadBuffer);
+        gl.bufferData(gl.ARRAY_BUFFER, new Float32Array([-1, -1, 1, -1, -1, 1, 1, 1]), gl.STATIC_DRAW);
+        this._textureTypes = getTextureTypes(gl);
+        this._maxPointSize = gl.getParameter(gl.ALIASED_POINT_SIZE_RANGE)[1];
+        this._maxTextureSize = gl.getParameter(gl.MAX_TEXTURE_SIZE);
+        this._densityTexture = createTexture(gl, gl.NEAREST);
+        this._framebuffer = gl.createFramebuffer();
+        this._gradientTexture = createTexture(gl, gl.LINEAR);
+        this._targetSize = null;
+        this._uploadGradient();
+    },
+
+    _uploadGradient: function () {
+        const gl: WebGLRenderingContext = this._gl;
+        gl.bindTexture(gl.TEXTURE_2D, this._gradientTexture);
+        gl.texImage2D(gl.TEXTURE_2D, 0, gl.RGBA, gl.RGBA, gl.UNSIGNED_BYTE, drawGradient(this.options.gradient));
+    },
+
+    /**
+     * Resize the density texture. It's padded by the kernel radius on all sides, as point sprites are clipped as a
+     * whole when their center is outside the viewport.
+     */
+    _resizeTarget: function (width: number, height: number) {
+        const gl: WebGLRenderingContext = this._gl;
+        if (this._targetSize && this._targetSize.x === width && this._targetSize.y === height) {
+            return;
+        }
+        gl.bindTexture(gl.TEXTURE_2D, this._densityTexture);
+        gl.bindFramebuffer(gl.FRAMEBUFFER, this._framebuffer);
+        for (let i = 0; i < this._textureTypes.length; i++) {
+            gl.texImage2D(gl.TEXTURE_2D, 0, gl.RGBA, width, height, 0, gl.RGBA, this._textureTypes[i], null);
+            gl.framebufferTexture2D(gl.FRAMEBUFFER, gl.COLOR_ATTACHMENT0, gl.TEXTURE_2D, this._densityTexture, 0);
+            if (gl.checkFramebufferStatus(gl.FRAMEBUFFER) === gl.FRAMEBUFFER_COMPLETE) {
+                // Stick to the first type that works
+                this._textureTypes = this._textureTypes.slice(i);
+                break;
+            }
+        }
+        gl.bindFramebuffer(gl.FRAMEBUFFER, null);
+        this._targetSize = L.point(width, height);
+    },
+
+    _resize: function () {
+        const size = this._map.getSize();
+        const scale = window.devicePixelRatio || 1;
+        this._canvas.style.width = size.x + 'px';
+        this._canvas.style.height = size.y + 'px';
+        this._canvas.width = size.x * scale;
+        this._canvas.height = size.y * scale;
+        this._scale = scale;
+        this._estimateMax = true;
+        this._requestFrame();
+    },
+
+    _onMoveEnd: function () {
+        this._estimateMax = true;
+        this._requestFrame();
+    },
+
+    _requestFrame: function () {
+        if (this._frame === null && this._map && this._gl) {
+            this._frame = L.Util.requestAnimFrame(this._draw, this);
+        }
+    },
+
+    /**
+     * Project the points at the current zoom level, relative to the current pixel origin. The spherical mercator
+     * projection (the default) is inlined, as creating a LatLng per point is slow for large data.
+     */
+    _project: function () {
+        const map = this._map;
+        const zoom = map.getZoom();
+        const origin = map.getPixelOrigin();
+        const crs = map.options.crs;
+        const scale = crs.scale(zoom);
+        const latlngs = this._latlngs;
+        const n = latlngs.length / 2;
+        const positions = new Float32Array(2 * n);
+        for (let i = 0; i < n; i++) {
+            const lat = latlngs[2 * i], lng = latlngs[2 * i + 1];
+            if (crs === L.CRS.EPSG3857) {
+                const sin = Math.sin(Math.max(Math.min(lat, MAX_LATITUDE), -MAX_LATITUDE) * Math.PI / 180);
+                positions[2 * i] = scale * (lng / 360 + 0.5) - origin.x;
+                positions[2 * i + 1] = scale * (0.5 - 0.25 * Math.log((1 + sin) / (1 - sin)) / Math.PI) - origin.y;
+            } else {
+                const point = map.project(L.latLng(lat, lng), zoom);
+                positions[2 * i] = point.x - origin.x;
+                positions[2 * i + 1] = point.y - origin.y;
+            }
+        }
+        const gl: WebGLRenderingContext = this._gl;
+        gl.bindBuffer(gl.ARRAY_BUFFER, this._positionBuffer);
+        gl.bufferData(gl.ARRAY_BUFFER, positions, gl.STATIC_DRAW);
+        gl.bindBuffer(gl.ARRAY_BUFFER, this._intensityBuffer);
+        gl.bufferData(gl.ARRAY_BUFFER, this._intensities, gl.STATIC_DRAW);
+        this._projected = {zoom, origin, positions};
+        this._estimateMax = true;
+    },
+
+    /**
+     * Kernel radius in (css) pixels at the current zoom level.
+     */
+    _getRadius: function (): number {
+        const {radius, radiusUnits} = this.options;
+        if (radiusUnits !== 'meters') {
+            return radius;
+        }
+        const map = this._map;
+        const metersPerPixel = EARTH_CIRCUMFERENCE * Math.cos(map.getCenter().lat * Math.PI / 180) /
+            map.options.crs.scale(map.getZoom());
+        return radius / metersPerPixel;
+    },
+
+    /**
+     * Estimate the max density as the max total intensity of the cells (of radius size) of a grid over the view.
+     */
+    _updateMax: function (offset: L.Point, radius: number) {
+        const size = this._map.getSize();
+        const cell = Math.max(radius, 1);
+        const cols = Math.ceil(size.x / cell) + 2, rows = Math.ceil(size.y / cell) + 2;
+        const sums = new Float64Array(cols * rows);
+        const positions = this._projected.positions;
+        const intensities = this._intensities;
+        let max = 0;
+        for (let i = 0; i < intensities.length; i++) {
+            const col = Math.floor((positions[2 * i] + offset.x) / cell) + 1;
+            const row = Math.floor((positions[2 * i + 1] + offset.y) / cell) + 1;
+            if (col < 0 || col >= cols || row < 0 || row >= rows) continue;
+            const sum = sums[row * cols + col] += intensities[i];
+            if (sum > max) max = sum;
+        }
+        this._max = max > 0 ? max : 1;
+        this._estimateMax = false;
+    },
+
+    _draw: function () {
+        this._frame = null;
+        const map = this._map;
+        const gl: WebGLRenderingContext = this._gl;
+        if (!map || !gl) return;
+        if (!this._projected || this._projected.zoom !== map.getZoom() ||
+            !this._projected.origin.equals(map.getPixelOrigin())) {
+            this._project();
+        }
+
+        // The canvas covers the map container
+        const topLeft = map.containerPointToLayerPoint([0, 0]);
+        L.DomUtil.setPosition(this._canvas, topLeft);
+        const offset = this._projected.origin.subtract(map.getPixelOrigin()).subtract(topLeft);
+        const size = map.getSize();
+        const scale = this._scale;
+        const radius = Math.min(this._getRadius(), this._maxPointSize / (2 * scale));
+        const maxPad = Math.floor((this._maxTextureSize / scale - Math.max(size.x, size.y)) / 2);
+        const pad = Math.max(0, Math.min(Math.ceil(radius), maxPad));
+        const padded = size.add([2 * pad, 2 * pad]);
+        this._resizeTarget(Math.round(padded.x * scale), Math.round(padded.y * scale));
+        if (this.options.max !== undefined && this.options.max !== null) {
+            this._max = this.options.max;
+        } else if (this._estimateMax) {
+            this._updateMax(offset, radius);
+        }
+
+        // Accumulate the kernels of the points
+        const n = this._intensities.length;
+        gl.bindFramebuffer(gl.FRAMEBUFFER, this._framebuffer);
+        gl.viewport(0, 0, this._targetSize.x, this._targetSize.y);
+        gl.clearColor(0, 0, 0, 0);
+        gl.clear(gl.COLOR_BUFFER_BIT);
+        if (n > 0) {
+            const program = this._pointProgram;
+            gl.useProgram(program);
+            gl.enable(gl.BLEND);
+            gl.blendFunc(gl.ONE, gl.ONE);
+            const position = gl.getAttribLocation(program, 'a_position');
+            const intensity = gl.getAttribLocation(program, 'a_intensity');
+            gl.bindBuffer(gl.ARRAY_BUFFER, this._positionBuffer);
+            gl.enableVertexAttribArray(position);
+            gl.vertexAttribPointer(position, 2, gl.FLOAT, false, 0, 0);
+            gl.bindBuffer(gl.ARRAY_BUFFER, this._intensityBuffer);
+            gl.enableVertexAttribArray(intensity);
+            gl.vertexAttribPointer(intensity, 1, gl.FLOAT, false, 0, 0);
+            gl.uniform2f(gl.getUniformLocation(program, 'u_offset'), offset.x + pad, offset.y + pad);
+            gl.uniform2f(gl.getUniformLocation(program, 'u_size'), padded.x, padded.y);
+            gl.uniform1f(gl.getUniformLocation(program, 'u_radius'), radius * scale);
+            gl.uniform1f(gl.getUniformLocation(program, 'u_max'), this._max);
+            gl.drawArrays(gl.POINTS, 0, n);
+            gl.disableVertexAttribArray(position);
+            gl.disableVertexAttribArray(intensity);
+            gl.disable(gl.BLEND);
+        }
+
+        // Map the density to colors
+        const program = this._colorizeProgram;
+        gl.bindFramebuffer(gl.FRAMEBUFFER, null);
+        gl.viewport(0, 0, this._canvas.width, this._canvas.height);
+        gl.clear(gl.COLOR_BUFFER_BIT);
+        gl.useProgram(program);
+        const vertex = gl.getAttribLocation(program, 'a_vertex');
+        gl.bindBuffer(gl.ARRAY_BUFFER, this._quadBuffer);
+        gl.enableVertexAttribArray(vertex);
+        gl.vertexAttribPointer(vertex, 2, gl.FLOAT, false, 0, 0);
+        gl.activeTexture(gl.TEXTURE0);
+        gl.bindTexture(gl.TEXTURE_2D, this._densityTexture);
+        gl.activeTexture(gl.TEXTURE1);
+        gl.bindTexture(gl.TEXTURE_2D, this._gradientTexture);
+        gl.uniform1i(gl.getUniformLocation(program, 'u_density'), 0);
+        gl.uniform1i(gl.getUniformLocation(program, 'u_gradient'), 1);
+        gl.uniform1f(gl.getUniformLocation(program, 'u_minOpacity'), this.options.minOpacity);
+        gl.uniform2f(gl.getUniformLocation(program, 'u_uvScale'), size.x / padded.x, size.y / padded.y);
+        // The texture rows run bottom up, i.e. the bottom padding comes first
+        gl.uniform2f(gl.getUniformLocation(program, 'u_uvOffset'), pad / padded.x, pad / padded.y);
+        gl.drawArrays(gl.TRIANGLE_STRIP, 0, 4);
+        gl.disableVertexAttribArray(vertex);
+    }
+});
+
+function _getOptions(props: HeatmapProps) {
+    const {radius, radiusUnits, max, minOpacity, gradient, opacity, pane} = props;
+    const options = {radius, radiusUnits, max, minOpacity, gradient, opacity, pane};
+    // Drop unset options, so that the defaults apply
+    Object.keys(options).forEach(key => options[key] === undefined && delete options[key]);
+    return options;
+}
+
+export const Heatmap = createLayerComponent<any, HeatmapProps>(
+    function createLeafletElement(props, context) {
+        const instance = new (HeatmapLayer as any)(_getOptions(props));
+        instance.setData(props.points, props.grid);
+        return createElementObject(instance, context)
+    },
+    function updateLeafletElement(instance, props, prevProps) {
+        if (props.points !== prevProps.points || props.grid !== prevProps.grid) {
+            instance.setData(props.points, props.grid);
+        }
+        if (props.radius !== prevProps.radius || props.radiusUnits !== prevProps.radiusUnits ||
+            props.max !== prevProps.max || props.minOpacity !== prevProps.minOpacity ||
+            props.gradient !== prevProps.gradient || props.opacity !== prevProps.opacity) {
+            const options = _getOptions(props);
+            // Options that were unset are restored to their defaults
+            (["max", "radius", "radiusUnits", "minOpacity", "gradient", "opacity"]).forEach(key => {
+                if (!(key in options)) options[key] = HeatmapLayer.prototype.options[key];
+            });
+            instance.setOptions(options);
+        }
+    }
+)
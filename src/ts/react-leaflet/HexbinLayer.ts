@@ -0,0 +1,507 @@
+import {createElementObject, createLayerComponent} from "@react-leaflet/core";
+import * as L from "leaflet";
+import chroma from 'chroma-js';
+import {LayerComponent} from "../react-leaflet-props";
+
+/**
+ * Bins computed server side, i.e. the (column, row) indices of the bins in the grid at the given zoom level, along with
+ * the aggregated values and point counts. See dash_leaflet.express.points_to_hexbins.
+ */
+export type HexbinData = {
+    zoom: number,
+    radius: number,
+    shape: "hexagon" | "square",
+    i: number[],
+    j: number[],
+    value: number[],
+    count: number[]
+}
+
+export type HexbinLayerProps = {
+    /**
+     * GeoJSON FeatureCollection of the points to aggregate (features that are not points are ignored), optionally
+     * pre-serialized via dash_leaflet.express.geojson_to_payload. [MUTABLE, DL]
+     */
+    data?: object | string;
+
+    /**
+     * Bins computed server side by dash_leaflet.express.points_to_hexbins, e.g. in a callback on the map zoom. Takes
+     * precedence over data. [MUTABLE, DL]
+     */
+    bins?: HexbinData;
+
+    /**
+     * Name of the feature property to aggregate (for the "sum" and "mean" aggregations). Features where the property
+     * is missing are skipped. [MUTABLE, DL]
+     */
+    property?: string;
+
+    /**
+     * Aggregation of the points in each bin, i.e. "count" (the default), "sum", or "mean" (of the property).
+     * [MUTABLE, DL]
+     */
+    aggregation?: "count" | "sum" | "mean";
+
+    /**
+     * Shape of the bins, i.e. "hexagon" (the default) or "square". [MUTABLE, DL]
+     */
+    shape?: "hexagon" | "square";
+
+    /**
+     * Radius of the bins in pixels (for squares, half the side length). The points are re-binned at each zoom level,
+     * so the bins have the same size on screen at all zoom levels. Default value is 20. [MUTABLE, DL]
+     */
+    radius?: number;
+
+    /**
+     * Chroma-js colorscale. Either a colorscale name, e.g. "YlOrRd" (the default), or a list of colors. [MUTABLE, DL]
+     */
+    colorscale?: string | string[];
+
+    /**
+     * Value that maps to the first color of the colorscale. If not set, the min value of the bins is used.
+     * [MUTABLE, DL]
+     */
+    min?: number;
+
+    /**
+     * Value that maps to the last color of the colorscale. If not set, the max value of the bins is used.
+     * [MUTABLE, DL]
+     */
+    max?: number;
+
+    /**
+     * Fill opacity of the bins. Default value is 0.7. [MUTABLE, DL]
+     */
+    fillOpacity?: number;
+
+    /**
+     * Outline color of the bins. If not set, no outline is drawn. [MUTABLE, DL]
+     */
+    color?: string;
+
+    /**
+     * If true (the default), the binning runs in a web worker. [DL]
+     */
+    worker?: boolean;
+} & LayerComponent;
+
+type Bins = {
+    zoom: number,
+    radius: number,
+    shape: string,
+    i: ArrayLike<number>,
+    j: ArrayLike<number>,
+    value: ArrayLike<number>,
+    count: ArrayLike<number>
+}
+
+/**
+ * Binning of the points in the pixel grid (spherical mercator, 256 px tiles) of a zoom level. Hexagons are pointy
+ * topped, with odd rows shifted half a column (as in d3-hexbin). The function is serialized (via toString) into a Blob
+ * worker, so it must be self-contained (see LabelWorker). When workers are not available, it's called on the main
+ * thread with a dummy scope, returning the binning function.
+ */
+function hexbinWorker(scope) {
+    const MAX_LATITUDE = 85.0511287798;
+    let points = null;
+
+    function binPoints(lat, lng, values, zoom, radius, shape, aggregation) {
+        const scale = 256 * Math.pow(2, zoom);
+        const hexagon = shape === 'hexagon';
+        const dx = hexagon ? radius * 2 * Math.sin(Math.PI / 3) : 2 * radius;
+        const dy = hexagon ? radius * 1.5 : 2 * radius;
+        const bins = new Map();
+        for (let k = 0; k < lat.length; k++) {
+            const value = (values && aggregation !== 'count') ? values[k] : 1;
+            if (value !== value) continue;
+            const clamped = Math.max(Math.min(lat[k], MAX_LATITUDE), -MAX_LATITUDE);
+            const sin = Math.sin(clamped * Math.PI / 180);
+            const x = scale * (lng[k] / 360 + 0.5);
+            const y = scale * (0.5 - 0.25 * Math.log((1 + sin) / (1 - sin)) / Math.PI);
+            let i, j;
+            if (hexagon) {
+                const py = y / dy;
+                j = Math.round(py);
+                const px = x / dx - (j & 1) / 2;
+                i = Math.round(px);
+                const py1 = py - j;
+                if (Math.abs(py1) * 3 > 1) {
+                    const px1 = px - i;
+                    const i2 = i + (px < i ? -1 : 1) / 2;
+                    const j2 = j + (py < j ? -1 : 1);
+                    const px2 = px - i2;
+                    const py2 = py - j2;
+                    // Compare the distances in pixels, as the grid units differ (dx vs dy)
+                    if ((px1 * px1 - px2 * px2) * dx * dx > (py2 * py2 - py1 * py1) * dy * dy) {
+                        i = i2 + ((j & 1) ? 1 : -1) / 2;
+                        j = j2;
+                    }
+                }
+            } else {
+                i = Math.floor(x / dx);
+                j = Math.floor(y / dy);
+            }
+            const key = (j + 1) * 4294967296 + (i + 1);
+            let bin = bins.get(key);
+            if (!bin) {
+                bin = [i, j, 0, 0];
+                bins.set(key, bin);
+            }
+            bin[2] += value;
+            bin[3] += 1;
+        }
+        const n = bins.size;
+        const result: any = {
+            zoom: zoom, radius: radius, shape: shape, i: new Float64Array(n), j: new Float64Array(n),
+            value: new Float64Array(n), count: new Float64Array(n)
+        };
+        let b = 0;
+        bins.forEach(function (bin) {
+            result.i[b] = bin[0];
+            result.j[b] = bin[1];
+            result.value[b] = aggregation === 'mean' ? bin[2] / bin[3] : bin[2];
+            result.count[b] = bin[3];
+            b++;
+        });
+        return result;
+    }
+
+    scope.onmessage = function (e) {
+        const message = e.data;
+        if (message.type === 'data') {
+            points = message;
+        } else if (message.type === 'bin' && points) {
+            const result = binPoints(points.lat, points.lng, points.values, message.zoom, message.radius,
+                message.shape, message.aggregation);
+            result.version = message.version;
+            scope.postMessage(result, [result.i.buffer, result.j.buffer, result.value.buffer, result.count.buffer]);
+        }
+    };
+    return binPoints;
+}
+
+const binPoints = hexbinWorker({});
+
+function createHexbinWorker(): Worker | null {
+    if (typeof Worker === 'undefined') {
+        return null;
+    }
+    try {
+        const blob = new Blob(['(' + hexbinWorker.toString() + ')(self)'], {type: 'application/javascript'});
+        const url = URL.createObjectURL(blob);
+        const worker = new Worker(url);
+        URL.revokeObjectURL(url);
+        return worker;
+    } catch (e) {
+        return null;
+    }
+}
+
+/**
+ * Extract the coordinates (and property values, NaN if missing) of the point features.
+ */
+function toArrays(data, property: string) {
+    if (typeof data === 'string') {
+        data = JSON.parse(data);
+    }
+    const features = (data && data.features) || [];
+    const lat = [], lng = [], values = [];
+    features.forEach(feature => {
+        const geometry = feature.geometry;
+        if (!geometry || geometry.type !== 'Point') return;
+        lat.push(geometry.coordinates[1]);
+        lng.push(geometry.coordinates[0]);
+        if (property !== undefined) {
+            const value = feature.properties ? feature.properties[property] : undefined;
+            values.push(value === undefined || value === null ? NaN : Number(value));
+        }
+    });
+    return {
+        lat: new Float64Array(lat),
+        lng: new Float64Array(lng),
+        values: property !== undefined ? new Float64Array(values) : null
+    };
+}
+
+/**
+ * Get the center of a bin, in pixel coordinates at the zoom level of the bins.
+ */
+function binCenter(bins: Bins, b: number): L.Point {
+    const i = bins.i[b], j = bins.j[b];
+    if (bins.shape === 'hexagon') {
+        const dx = bins.radius * 2 * Math.sin(Math.PI / 3);
+        return L.point((i + (j & 1) / 2) * dx, j * bins.radius * 1.5);
+    }
+    return L.point((i + 0.5) * 2 * bins.radius, (j + 0.5) * 2 * bins.radius);
+}
+
+/**
+ * Canvas layer drawing points aggregated into hexagonal (or square) bins. The points are re-binned (in a worker) when
+ * the zoom level changes, and the bins are cached per zoom level.
+ */
+export const HexbinCanvasLayer = L.Layer.extend({
+    options: {
+        radius: 20,
+        shape: 'hexagon',
+        aggregation: 'count',
+        property: undefined,
+        colorscale: 'YlOrRd',
+        min: undefined,
+        max: undefined,
+        fillOpacity: 0.7,
+        color: undefined,
+        worker: true,
+        pane: 'overlayPane'
+    },
+
+    initialize: function (options) {
+        L.setOptions(this, options);
+        this._frame = null;
+        this._cache = new Map<number, Bins>();
+        this._version = 0;
+        this._data = null;
+        this._serverBins = null;
+        this._points = toArrays(null, undefined);
+        this._bins = null;
+    },
+
+    setData: function (data, bins: HexbinData) {
+        this._data = data;
+        this._serverBins = bins || null;
+        this._points = toArrays(data, this.options.property);
+        this._invalidate();
+    },
+
+    setOptions: function (options) {
+        const previous = L.Util.extend({}, this.options);
+        L.setOptions(this, options);
+        if (this.options.property !== previous.property) {
+            this._points = toArrays(this._data, this.options.property);
+        }
+        if (this.options.property !== previous.property || this.options.aggregation !== previous.aggregation ||
+            this.options.radius !== previous.radius || this.options.shape !== previous.shape) {
+            this._invalidate();
+        } else {
+            this._setBins(this._bins);
+        }
+    },
+
+    onAdd: function (map: L.Map) {
+        this._canvas = L.DomUtil.create('canvas', 'leaflet-hexbin-layer leaflet-zoom-hide');
+        this._canvas.style.position = 'absolute';
+        this._canvas.style.pointerEvents = 'none';
+        this._ctx = this._canvas.getContext('2d');
+        this.getPane().appendChild(this._canvas);
+        this._worker = this.options.worker ? createHexbinWorker() : null;
+        if (this._worker) {
+            this._worker.onmessage = (e) => this._onBins(e.data);
+            // Fall back to binning on the main thread, e.g. if blob workers are blocked by a content security policy
+            this._worker.onerror = () => {
+                this._worker.terminate();
+                this._worker = null;
+                this._update();
+            };
+        }
+        map.on('resize', this._resize, this);
+        map.on('move viewreset', this._requestFrame, this);
+        map.on('zoomend', this._update, this);
+        map.on('click', this._onClick, this);
+        this._resize();
+        this._invalidate();
+    },
+
+    onRemove: function (map: L.Map) {
+        map.off('resize', this._resize, this);
+        map.off('move viewreset', this._requestFrame, this);
+        map.off('zoomend', this._update, this);
+        map.off('click', this._onClick, this);
+        if (this._worker) {
+            this._worker.terminate();
+            this._worker = null;
+        }
+        if (this._frame !== null) {
+            L.Util.cancelAnimFrame(this._frame);
+            this._frame = null;
+        }
+        L.DomUtil.remove(this._canvas);
+    },
+
+    /**
+     * Clear the cached bins (e.g. when the data changes), and send the data to the worker.
+     */
+    _invalidate: function () {
+        this._version += 1;
+        this._cache.clear();
+        if (this._worker && !this._serverBins) {
+            const {lat, lng, values} = this._points;
+            this._worker.postMessage({type: 'data', lat, lng, values});
+        }
+        this._update();
+    },
+
+    _update: function () {
+        if (!this._map) return;
+        if (this._serverBins) {
+            this._setBins(this._serverBins);
+            return;
+        }
+        const zoom = Math.round(this._map.getZoom());
+        const cached = this._cache.get(zoom);
+        if (cached) {
+            this._setBins(cached);
+            return;
+        }
+        const {radius, shape, aggregation} = this.options;
+        if (this._worker) {
+            this._worker.postMessage({type: 'bin', version: this._version, zoom, radius, shape, aggregation});
+            return;
+        }
+        const {lat, lng, values} = this._points;
+        this._onBins(Object.assign(binPoints(lat, lng, values, zoom, radius, shape, aggregation), {
+            version: this._version
+        }));
+    },
+
+    _onBins: function (bins) {
+        // Drop bins computed for stale data/options
+        if (bins.version !== this._version) return;
+        this._cache.set(bins.zoom, bins);
+        if (this._map && Math.round(this._map.getZoom()) === bins.zoom) {
+            this._setBins(bins);
+        }
+    },
+
+    _setBins: function (bins: Bins) {
+        this._bins = bins;
+        this._lookup = null;
+        this._colors = [];
+        if (bins) {
+            let min = Infinity, max = -Infinity;
+            for (let b = 0; b < bins.value.length; b++) {
+                min = Math.min(min, bins.value[b]);
+                max = Math.max(max, bins.value[b]);
+            }
+            min = (this.options.min === undefined || this.options.min === null) ? min : this.options.min;
+            max = (this.options.max === undefined || this.options.max === null) ? max : this.options.max;
+            const scale = chroma.scale(this.options.colorscale).domain([min, max > min ? max : min + 1]);
+            for (let b = 0; b < bins.value.length; b++) {
+                this._colors.push(scale(bins.value[b]).hex());
+            }
+        }
+        this._requestFrame();
+    },
+
+    _resize: function () {
+        const size = this._map.getSize();
+        const scale = window.devicePixelRatio || 1;
+        this._canvas.style.width = size.x + 'px';
+        this._canvas.style.height = size.y + 'px';
+        this._canvas.width = size.x * scale;
+        this._canvas.height = size.y * scale;
+        this._scale = scale;
+        this._requestFrame();
+    },
+
+    _requestFrame: function () {
+        if (this._frame === null && this._map) {
+            this._frame = L.Util.requestAnimFrame(this._draw, this);
+        }
+    },
+
+    /**
+     * Report clicks on a bin, i.e. fire a click event (on the layer) with the bin index, value, count, and center.
+     */
+    _onClick: function (e: L.LeafletMouseEvent) {
+        const bins: Bins = this._bins;
+        if (!bins) return;
+        if (!this._lookup) {
+            this._lookup = new Map<number, number>();
+            for (let b = 0; b < bins.i.length; b++) {
+                this._lookup.set((bins.j[b] + 1) * 4294967296 + (bins.i[b] + 1), b);
+            }
+        }
+        const {i, j} = binPoints([e.latlng.lat], [e.latlng.lng], null, bins.zoom, bins.radius, bins.shape, 'count');
+        const b = i.length > 0 ? this._lookup.get((j[0] + 1) * 4294967296 + (i[0] + 1)) : undefined;
+        if (b === undefined) return;
+        const center = this._map.unproject(binCenter(bins, b), bins.zoom);
+        this.fire('click', {
+            latlng: e.latlng,
+            bin: {index: b, value: bins.value[b], count: bins.count[b], center: [center.lat, center.lng]}
+        });
+    },
+
+    _draw: function () {
+        this._frame = null;
+        const map = this._map;
+        if (!map) return;
+        const topLeft = map.containerPointToLayerPoint([0, 0]);
+        L.DomUtil.setPosition(this._canvas, topLeft);
+        const ctx: CanvasRenderingContext2D = this._ctx;
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, this._canvas.width, this._canvas.height);
+        const bins: Bins = this._bins;
+        if (!bins || bins.i.length === 0) return;
+
+        // Draw in pixel coordinates of the current zoom level, i.e. the bin centers are scaled from their zoom level
+        const origin = topLeft.add(map.getPixelOrigin());
+        const factor = map.getZoomScale(map.getZoom(), bins.zoom);
+        const size = map.getSize();
+        const radius = bins.radius * factor;
+        ctx.setTransform(this._scale, 0, 0, this._scale, -origin.x * this._scale, -origin.y * this._scale);
+        ctx.globalAlpha = this.options.fillOpacity;
+        const corners = [];
+        for (let k = 0; k < (bins.shape === 'hexagon' ? 6 : 4); k++) {
+            const angle = bins.shape === 'hexagon' ? k * Math.PI / 3 : Math.PI / 4 + k * Math.PI / 2;
+            const r = bins.shape === 'hexagon' ? radius : radius * Math.SQRT2;
+            corners.push([Math.sin(angle) * r, -Math.cos(angle) * r]);
+        }
+        const color = this.options.color;
+        for (let b = 0; b < bins.i.length; b++) {
+            const center = binCenter(bins, b).multiplyBy(factor);
+            if (center.x < origin.x - radius || center.x > origin.x + size.x + radius ||
+                center.y < origin.y - radius || center.y > origin.y + size.y + radius) continue;
+            ctx.beginPath();
+            corners.forEach((corner, k) => k === 0 ? ctx.moveTo(center.x + corner[0], center.y + corner[1]) :
+                ctx.lineTo(center.x + corner[0], center.y + corner[1]));
+            ctx.closePath();
+            ctx.fillStyle = this._colors[b];
+            ctx.fill();
+            if (color) {
+                ctx.strokeStyle = color;
+                ctx.stroke();
+            }
+        }
+        ctx.globalAlpha = 1;
+    }
+});
+
+function _getOptions(props: HexbinLayerProps) {
+    const {radius, shape, aggregation, property, colorscale, min, max, fillOpacity, color, worker, pane} = props;
+    const options = {radius, shape, aggregation, property, colorscale, min, max, fillOpacity, color, worker, pane};
+    // Drop unset options, so that the defaults apply
+    Object.keys(options).forEach(key => options[key] === undefined && delete options[key]);
+    return options;
+}
+
+export const HexbinLayer = createLayerComponent<any, HexbinLayerProps>(
+    function createLeafletElement(props, context) {
+        const instance = new (HexbinCanvasLayer as any)(_getOptions(props));
+        instance.setData(props.data, props.bins);
+        return createElementObject(instance, context)
+    },
+    function updateLeafletElement(instance, props, prevProps) {
+        const keys = ["radius", "shape", "aggregation", "property", "colorscale", "min", "max", "fillOpacity", "color"];
+        if (keys.some(key => props[key] !== prevProps[key])) {
+            const options = _getOptions(props);
+            // Options that were unset are restored to their defaults
+            keys.forEach(key => {
+                if (!(key in options)) options[key] = HexbinCanvasLayer.prototype.options[key];
+            });
+            instance.setOptions(options);
+        }
+        if (props.data !== prevProps.data || props.bins !== prevProps.bins) {
+            instance.setData(props.data, props.bins);
+        }
+    }
+)
@@ -0,0 +1,140 @@
+import {createElementObject, createLayerComponent, extendContext} from "@react-leaflet/core";
+import * as L from "leaflet";
+import {LayerGroupProps} from "../props";
+
+export type MarkerLayerProps = {
+    /**
+     * Marker positions, i.e. a list of [lat, lon] pairs. [MUTABLE, DL]
+     */
+    positions: number[][];
+
+    /**
+     * Marker ids (same length as positions). Markers are matched by id when the arrays change, i.e. existing markers
+     * are moved/updated in place rather than recreated. If not set, markers are matched by index. [MUTABLE, DL]
+     */
+    ids?: (string | number)[];
+
+    /**
+     * Icon key of each marker (same length as positions), or a single key used for all markers. Keys refer to the
+     * entries of the iconRegistry. Markers with no (or an unknown) key get the default icon. [MUTABLE, DL]
+     */
+    icons?: string | string[];
+
+    /**
+     * Icons shared by the markers, keyed by icon key. Values are options passed to the L.divIcon constructor (if "html"
+     * is set) or to the L.icon constructor (otherwise). Each icon is created once, regardless of the number of markers
+     * using it. [MUTABLE, DL]
+     */
+    iconRegistry?: { [key: string]: object };
+
+    /**
+     * Marker titles (browser tooltips), same length as positions. [DL]
+     */
+    titles?: string[];
+
+    /**
+     * Z index offset applied to all markers. [DL]
+     */
+    zIndexOffset?: number;
+
+    /**
+     * Opacity of all markers. [MUTABLE, DL]
+     */
+    opacity?: number;
+} & LayerGroupProps;
+
+type MarkerEntry = {
+    marker: L.Marker,
+    position: number[],
+    icon: string
+}
+
+const markerIndex = new WeakMap<L.Marker, { index: number, id: string | number }>();
+
+/**
+ * Get the index and id of a marker of a MarkerLayer (as of the latest update).
+ */
+export function getMarkerIndex(marker: L.Marker): { index: number, id: string | number } | undefined {
+    return markerIndex.get(marker);
+}
+
+function createIcons(iconRegistry): { [key: string]: L.Icon | L.DivIcon } {
+    const icons = {};
+    Object.keys(iconRegistry || {}).forEach(key => {
+        const options = iconRegistry[key];
+        icons[key] = options.html !== undefined ? L.divIcon(options) : L.icon(options);
+    });
+    return icons;
+}
+
+function updateMarkers(instance, props) {
+    const {positions = [], ids, icons, titles} = props;
+    const entries: Map<string | number, MarkerEntry> = instance._markerEntries;
+    const registry = instance._icons;
+    const defaultIcon = instance._defaultIcon;
+    const seen = new Set<string | number>();
+    for (let i = 0; i < positions.length; i++) {
+        const id = ids ? ids[i] : i;
+        const key = Array.isArray(icons) ? icons[i] : icons;
+        const position = positions[i];
+        seen.add(id);
+        let entry = entries.get(id);
+        if (!entry) {
+            const options: L.MarkerOptions = {icon: registry[key] || defaultIcon};
+            if (titles) options.title = titles[i];
+            if (props.zIndexOffset !== undefined) options.zIndexOffset = props.zIndexOffset;
+            if (props.opacity !== undefined) options.opacity = props.opacity;
+            const marker = L.marker(position as L.LatLngTuple, options);
+            entry = {marker, position, icon: key};
+            entries.set(id, entry);
+            instance.addLayer(marker);
+        } else {
+            // Only touch the markers that actually changed
+            if (entry.position[0] !== position[0] || entry.position[1] !== position[1]) {
+                entry.marker.setLatLng(position as L.LatLngTuple);
+                entry.position = position;
+            }
+            if (entry.icon !== key) {
+                entry.marker.setIcon(registry[key] || defaultIcon);
+                entry.icon = key;
+            }
+        }
+        markerIndex.set(entry.marker, {index: i, id});
+    }
+    entries.forEach((entry, id) => {
+        if (!seen.has(id)) {
+            instance.removeLayer(entry.marker);
+            entries.delete(id);
+        }
+    });
+}
+
+function createLeafletElement(props, context) {
+    const instance = L.featureGroup() as any;
+    instance._markerEntries = new Map<string | number, MarkerEntry>();
+    instance._icons = createIcons(props.iconRegistry);
+    instance._defaultIcon = new L.Icon.Default();
+    updateMarkers(instance, props);
+    return createElementObject(
+        instance,
+        extendContext(context, {layerContainer: instance}),
+    )
+}
+
+function updateLeafletElement(instance, props, prevProps) {
+    if (props.iconRegistry !== prevProps.iconRegistry) {
+        // Reassign the icons of all markers (the icons themselves are shared)
+        instance._icons = createIcons(props.iconRegistry);
+        instance._markerEntries.forEach(entry => {
+            entry.marker.setIcon(instance._icons[entry.icon] || instance._defaultIcon);
+        });
+    }
+    if (props.positions !== prevProps.positions || props.ids !== prevProps.ids || props.icons !== prevProps.icons) {
+        updateMarkers(instance, props);
+    }
+    if (props.opacity !== prevProps.opacity) {
+        instance._markerEntries.forEach(entry => entry.marker.setOpacity(props.opacity));
+    }
+}
+
+export const MarkerLayer = createLayerComponent(createLeafletElement, updateLeafletElement)
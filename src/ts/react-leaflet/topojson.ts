@@ -0,0 +1,95 @@
+/**
+ * Minimal TopoJSON decoding (as done by topojson-client's feature function), i.e. the shared (and, if the topology is
+ * quantized, delta-encoded) arcs are resolved into the coordinates of each geometry. See
+ * dash_leaflet.express.geojson_to_topojson.
+ */
+
+function decodeArcs(topology): number[][][] {
+    const transform = topology.transform;
+    if (!transform) {
+        return topology.arcs;
+    }
+    const [kx, ky] = transform.scale;
+    const [dx, dy] = transform.translate;
+    return topology.arcs.map(arc => {
+        let x = 0, y = 0;
+        return arc.map(point => {
+            x += point[0];
+            y += point[1];
+            return [x * kx + dx, y * ky + dy];
+        });
+    });
+}
+
+/**
+ * Decode the objects of a topology into a GeoJSON FeatureCollection. If an object name is given, only that object is
+ * decoded, otherwise the features of all objects are concatenated.
+ */
+export function topojsonToGeoJSON(topology, object?: string) {
+    const arcs = decodeArcs(topology);
+    const transform = topology.transform;
+    const position = (point: number[]) => transform ? [
+        point[0] * transform.scale[0] + transform.translate[0],
+        point[1] * transform.scale[1] + transform.translate[1]
+    ] : point;
+
+    const line = (refs: number[]) => {
+        const coordinates = [];
+        refs.forEach((ref, k) => {
+            // Negative (one's complement) references denote reversed arcs
+            const arc = ref < 0 ? arcs[~ref].slice().reverse() : arcs[ref];
+            // Consecutive arcs share their end/start point
+            for (let i = k === 0 ? 0 : 1; i < arc.length; i++) {
+                coordinates.push(arc[i]);
+            }
+        });
+        return coordinates;
+    };
+
+    const ring = (refs: number[]) => {
+        const coordinates = line(refs);
+        // Collapsed rings are padded to remain valid
+        while (coordinates.length > 0 && coordinates.length < 4) {
+            coordinates.push(coordinates[0]);
+        }
+        return coordinates;
+    };
+
+    const geometry = (o) => {
+        switch (o.type) {
+            case "GeometryCollection":
+                return {type: o.type, geometries: o.geometries.map(geometry)};
+            case "Point":
+                return {type: o.type, coordinates: position(o.coordinates)};
+            case "MultiPoint":
+                return {type: o.type, coordinates: o.coordinates.map(position)};
+            case "LineString":
+                return {type: o.type, coordinates: line(o.arcs)};
+            case "MultiLineString":
+                return {type: o.type, coordinates: o.arcs.map(line)};
+            case "Polygon":
+                return {type: o.type, coordinates: o.arcs.map(ring)};
+            case "MultiPolygon":
+                return {type: o.type, coordinates: o.arcs.map(polygon => polygon.map(ring))};
+            default:
+                return null;
+        }
+    };
+
+    const feature = (o) => {
+        const result: any = {type: "Feature", properties: o.properties || {}, geometry: geometry(o)};
+        if (o.id !== undefined) {
+            result.id = o.id;
+        }
+        return result;
+    };
+
+    const features = [];
+    const names = object !== undefined ? [object] : Object.keys(topology.objects);
+    names.forEach(name => {
+        const o = topology.objects[name];
+        // The members of a top level geometry collection are features
+        (o.type === "GeometryCollection" ? o.geometries : [o]).forEach(g => features.push(feature(g)));
+    });
+    return {type: "FeatureCollection", features};
+}
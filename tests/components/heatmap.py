@@ -0,0 +1,21 @@
+import base64
+import math
+import struct
+
+from dash_leaflet import Heatmap, TileLayer
+from tests.stubs import app_stub
+
+# A (gaussian) density grid, encoded as by points_to_heatmap_grid (which requires numpy), i.e. the indices of the
+# non-empty cells as uint32 and their values as float32.
+shape = [64, 64]
+cells = {i * shape[1] + j: 100 * math.exp(-((i - 32) ** 2 + (j - 32) ** 2) / 200)
+         for i in range(shape[0]) for j in range(shape[1])}
+index = sorted(cells)
+grid = dict(bounds=[[54, 8], [58, 12]], shape=shape,
+            index=base64.b64encode(struct.pack(f"<{len(index)}I", *index)).decode(),
+            values=base64.b64encode(struct.pack(f"<{len(index)}f", *[cells[k] for k in index])).decode())
+app = app_stub(components=[TileLayer(), Heatmap(points=[[56, 10], [56.1, 10.2, 5]]),
+                           Heatmap(grid=grid, radius=5000, radiusUnits="meters")])
+
+if __name__ == "__main__":
+    app.run(port=9997)
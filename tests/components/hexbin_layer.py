@@ -0,0 +1,11 @@
+from dash_leaflet import HexbinLayer
+from dash_leaflet.express import dicts_to_geojson
+from tests.stubs import event_app_stub
+
+selector = ".leaflet-container"
+data = dicts_to_geojson([dict(lat=56, lon=10, value=1), dict(lat=56, lon=10, value=3)])
+component = HexbinLayer(data=data, property="value", aggregation="mean", id="hexbin_layer")
+app, _ = event_app_stub(components=[component])
+
+if __name__ == "__main__":
+    app.run(port=9997)
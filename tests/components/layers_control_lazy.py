@@ -0,0 +1,16 @@
+from dash_leaflet import LayersControl, TileLayer, BaseLayer, Overlay, GeoJSON
+from tests.stubs import event_app_stub
+
+points = dict(type="FeatureCollection", features=[
+    dict(type="Feature", geometry=dict(type="Point", coordinates=[10 + i / 10, 56]), properties={}) for i in range(10)
+])
+target_id = "layers_control"
+component = LayersControl(id=target_id, position="topright", lazyOverlays=True, unloadDelay=5000, children=[
+    BaseLayer(name="default", children=[TileLayer()], checked=True),
+    Overlay(name="points", children=[GeoJSON(data=points)], checked=True),
+    Overlay(name="hidden", children=[GeoJSON(data=points)]),
+])
+app, _ = event_app_stub(components=[component], target_prop="overlayStats")
+
+if __name__ == "__main__":
+    app.run(port=9997)
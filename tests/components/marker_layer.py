@@ -0,0 +1,10 @@
+from dash_leaflet import MarkerLayer
+from tests.stubs import event_app_stub
+
+selector = ".leaflet-marker-icon"
+component = MarkerLayer(positions=[[56, 10]], ids=["a"], icons=["html"], id="marker_layer",
+                        iconRegistry=dict(html=dict(html="This is <b> html <b/>")))
+app, _ = event_app_stub(components=[component])
+
+if __name__ == "__main__":
+    app.run(port=9997)
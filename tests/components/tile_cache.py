@@ -0,0 +1,9 @@
+from dash_leaflet import TileCache, TileLayer
+from dash_leaflet.express import mount_tile_cache
+from tests.stubs import app_stub
+
+app = app_stub(components=[TileLayer(), TileCache(id="tile_cache")])
+mount_tile_cache(app)  # serves the service worker at the default serviceWorkerUrl
+
+if __name__ == "__main__":
+    app.run(port=9997)
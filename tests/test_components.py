@@ -24,7 +24,8 @@ def import_selector(component: str):
 
 @pytest.mark.parametrize("component", ["map_container", "easy_button", "marker", "popup", "image_overlay", "video_overlay", "circle",
                                        "circle_marker", "polyline", "polygon", "rectangle", "svg_overlay",
-                                       "layer_group", "feature_group", "pane", "polyline_decorator", "div_marker", "geojson"])
+                                       "layer_group", "feature_group", "pane", "polyline_decorator", "div_marker", "marker_layer",
+                                       "hexbin_layer", "geojson"])
 def test_click_event(dash_duo, component):
     """
     Basic test that (1) a component renders and (2) that click events work.
@@ -39,7 +40,7 @@ def test_click_event(dash_duo, component):
     dash_duo.wait_for_contains_text("#log", "2", timeout=1)
 
 
-@pytest.mark.parametrize("component", ["tile_layer", "wms_tile_layer"])
+@pytest.mark.parametrize("component", ["tile_layer", "wms_tile_layer", "layers_control_lazy"])
 def test_load_event(dash_duo, component):
     """
     Basic test that (1) a component renders and (2) that the load event fires.
@@ -49,7 +50,8 @@ def test_load_event(dash_duo, component):
     dash_duo.wait_for_contains_text("#log", "1", timeout=5)
 
 
-@pytest.mark.parametrize("component", ["zoom_control", "attribution_control", "scale_control", "gesture_handling", "colorbar", "measure_control", "edit_control"])
+@pytest.mark.parametrize("component", ["zoom_control", "attribution_control", "scale_control", "gesture_handling", "colorbar", "measure_control", "edit_control",
+                                       "tile_cache", "heatmap"])
 def test_render(dash_duo, component):
     """
     Basic test that a component renders without errors.
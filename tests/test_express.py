@@ -0,0 +1,529 @@
+import pytest
+
+from dash_leaflet import express as dlx
+
+
+@pytest.fixture
+def np():
+    """
+    NumPy, which is an optional dependency, i.e. the tests using it are skipped if it's not installed.
+    """
+    return pytest.importorskip("numpy")
+
+
+def test_apply_geojson_delta():
+    """
+    Test that EditControl deltas are applied by leaflet id.
+    """
+    def feature(leaflet_id, color):
+        return {"type": "Feature", "properties": {"leafletId": leaflet_id, "color": color},
+                "geometry": {"type": "Point", "coordinates": [0, 0]}}
+
+    geojson = {"type": "FeatureCollection", "features": [feature(1, "red"), feature(2, "red")]}
+    delta = {"added": [feature(3, "blue")], "changed": [feature(1, "green")], "removed": [2], "n_deltas": 1}
+    result = dlx.apply_geojson_delta(geojson, delta)
+    assert [(f["properties"]["leafletId"], f["properties"]["color"]) for f in result["features"]] == \
+           [(1, "green"), (3, "blue")]
+
+
+def test_spatial_index_query(np):
+    """
+    Test that spatial index queries match a brute force scan, also for bounds crossing the antimeridian.
+    """
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-85, 85, 10000), rng.uniform(-180, 180, 10000)
+    index = dlx.SpatialIndex(lat, lon)
+    for (south, west), (north, east) in [[[0, 0], [10, 10]], [[-20, 170], [20, 200]], [[-20, -200], [20, -170]]]:
+        west_wrapped = (west + 180) % 360 - 180
+        east_wrapped = west_wrapped + east - west
+        in_lon = (((lon >= west_wrapped) & (lon <= east_wrapped)) |
+                  ((lon + 360 >= west_wrapped) & (lon + 360 <= east_wrapped)))
+        expected = np.nonzero(in_lon & (lat >= south) & (lat <= north))[0]
+        assert np.array_equal(index.query([[south, west], [north, east]]), expected)
+
+
+def test_spatial_index_max_count(np):
+    """
+    Test that the max_count cap is respected for both sampling methods.
+    """
+    rng = np.random.default_rng(0)
+    index = dlx.SpatialIndex(rng.uniform(-85, 85, 10000), rng.uniform(-180, 180, 10000))
+    everything = index.query([[-90, -180], [90, 180]])
+    assert everything.size == 10000
+    for sample in ["stride", "random"]:
+        subset = index.query([[-90, -180], [90, 180]], max_count=100, sample=sample, seed=0)
+        assert subset.size == 100
+        assert np.unique(subset).size == 100
+
+
+def test_geojson_to_mask(np):
+    """
+    Test point in polygon/circle masking of EditControl-style geojson.
+    """
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"type": "polygon"},
+         "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+                                                         [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]]}},
+        {"type": "Feature", "properties": {"type": "circle", "mRadius": 100000},
+         "geometry": {"type": "Point", "coordinates": [20, 0]}},
+        {"type": "Feature", "properties": {"type": "marker"},
+         "geometry": {"type": "Point", "coordinates": [30, 0]}},
+    ]}
+    lat = np.array([1, 5, 11, 0, 0, 0, 0])
+    lon = np.array([1, 5, 1, 20.5, 21, 30, 179])
+    mask = dlx.geojson_to_mask(geojson, lat, lon)
+    assert mask.tolist() == [True, False, False, True, False, False, False]
+
+
+def test_geojson_to_label_buffer(np):
+    """
+    Test that line features are encoded as a binary label source (one entry per line part).
+    """
+    import base64
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": "Main Street"},
+         "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1], [2, 1]]}},
+        {"type": "Feature", "properties": {},
+         "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}},
+        {"type": "Feature", "properties": {"name": "Ring Road"},
+         "geometry": {"type": "MultiLineString", "coordinates": [[[5, 5], [6, 6]], [[7, 7], [8, 8]]]}},
+    ]}
+    buffer = dlx.geojson_to_label_buffer(geojson)
+    assert buffer["labels"] == ["Main Street", "Ring Road", "Ring Road"]
+    offsets = np.frombuffer(base64.b64decode(buffer["offsets"]), dtype=np.uint32)
+    assert offsets.tolist() == [0, 3, 5, 7]
+    coordinates = np.frombuffer(base64.b64decode(buffer["coordinates"]), dtype=np.float32).reshape(-1, 2)
+    assert coordinates[3].tolist() == [5, 5]
+
+
+def test_raster_tiles(np):
+    """
+    Test that raster tiles are resampled, colored, cached, and served via the Flask route.
+    """
+    import zlib
+    from flask import Flask
+
+    server = Flask(__name__)
+    tiles = dlx.RasterTiles(server, cache_size=2)
+    data = np.tile(np.linspace(0, 1, 200, dtype=np.float32), (100, 1))
+    data[:, :10] = np.nan
+    url = tiles.add("gradient", data, bounds=[[0, 0], [40, 40]], colorscale=["#000000", "#ff0000"])
+    assert url == "/raster-tiles/gradient/{z}/{x}/{y}.png"
+    # The red channel increases from west to east, pixels west of the data (and NaNs) are transparent.
+    rgba = tiles.render("gradient", 3, 4, 3)  # lon 0 to 45, lat 0 to 41
+    row = rgba[128]
+    inside = row[:, 3] == 255
+    assert not inside[:8].any() and inside[16:220].all() and not inside[232:].any()
+    assert (np.diff(row[inside, 0].astype(int)) >= 0).all() and row[inside, 0][-1] > 0
+    assert not rgba[:2, :, 3].any() and rgba[-1, 128, 3] == 255  # north of the data
+    # Tiles are cached, and the PNG encodes the rendered pixels.
+    png = tiles.tile("gradient", 3, 4, 3)
+    assert tiles.tile("gradient", 3, 4, 3) is png and (tiles.hits, tiles.misses) == (1, 1)
+    data_start = png.index(b"IDAT") + 4
+    raw = zlib.decompress(png[data_start:data_start + int.from_bytes(png[data_start - 8:data_start - 4], "big")])
+    assert np.array_equal(np.frombuffer(raw, np.uint8).reshape(256, -1)[:, 1:].reshape(256, 256, 4), rgba)
+    # The route serves the registered arrays only.
+    client = server.test_client()
+    response = client.get("/raster-tiles/gradient/3/4/3.png")
+    assert response.status_code == 200 and response.mimetype == "image/png" and response.data == png
+    assert client.get("/raster-tiles/other/1/1/0.png").status_code == 404
+    assert client.get("/raster-tiles/gradient/1/2/0.png").status_code == 404
+
+
+def test_raster_tiles_overviews(np):
+    """
+    Test that low zoom tiles are rendered from overviews, and that lat/lon georeferencing matches the bounds.
+    """
+    from flask import Flask
+
+    tiles = dlx.RasterTiles(Flask(__name__))
+    rng = np.random.default_rng(0)
+    data = rng.uniform(0, 1, (400, 800)).astype(np.float32)
+    lat, lon = np.linspace(-89.775, 89.775, 400), np.linspace(-179.775, 179.775, 800)
+    tiles.add("bounds", data[::-1], bounds=[[-90, -180], [90, 180]], colorscale="fire")
+    tiles.add("coords", data, lat=lat, lon=lon, colorscale="fire")
+    for z, x, y in [(0, 0, 0), (3, 4, 2), (6, 33, 20)]:
+        assert np.array_equal(tiles.render("bounds", z, x, y), tiles.render("coords", z, x, y))
+    # At zoom 0, a pixel spans ~3 cells, i.e. the first overview level (2 x 2 cell means) is used.
+    assert [level.shape for level in tiles._layers["coords"].levels] == [(400, 800), (200, 400)]
+    assert dlx.colorcet_colorscale("fire", 3) == ["#000000", dlx.colorcet_colorscale("fire")[128], "#ffffff"]
+
+
+def test_raster_tiles_concurrent_overviews(np):
+    """
+    Test that overview levels are built once, when requested concurrently.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from flask import Flask
+
+    tiles = dlx.RasterTiles(Flask(__name__))
+    tiles.add("data", np.ones((512, 512), dtype=np.float32), bounds=[[0, 0], [10, 10]])
+    layer = tiles._layers["data"]
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda k: layer.level(np, 4), range(8)))
+    assert [level.shape[0] for level in layer.levels] == [512, 256, 128, 64, 32]
+
+
+def test_raster_tiles_prefixed_app(np):
+    """
+    Test that the advertised url of the tiles is served, when the Dash app is mounted under a path prefix.
+    """
+    from dash import Dash, html
+
+    app = Dash(__name__, url_base_pathname="/app/")
+    app.layout = html.Div()
+    tiles = dlx.RasterTiles(app)
+    url = tiles.add("data", np.ones((10, 10), dtype=np.float32), bounds=[[0, 0], [10, 10]])
+    assert url == "/app/raster-tiles/data/{z}/{x}/{y}.png"
+    response = app.server.test_client().get(url.format(z=0, x=0, y=0))
+    assert response.status_code == 200 and response.mimetype == "image/png"
+
+
+@pytest.fixture
+def tile_server():
+    """
+    A local stand-in tile server, responding (slowly) with the request path as content, and counting the requests.
+    """
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            time.sleep(0.1)
+            status = 404 if "missing" in self.path else 200
+            self.send_response(status)
+            self.send_header("Content-Type", "image/png")
+            self.end_headers()
+            self.wfile.write(self.path.encode() * 10)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+
+
+def test_tile_proxy(tile_server, tmp_path):
+    """
+    Test that tiles are proxied, cached on disk, and that concurrent requests for the same tile are coalesced.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from flask import Flask
+
+    upstream, requests = tile_server
+    server = Flask(__name__)
+    proxy = dlx.TileProxy(server, cache_dir=str(tmp_path))
+    url = proxy.url(upstream + "/{z}/{x}/{y}.png")
+    assert url.endswith("?z={z}&x={x}&y={y}")
+    client = server.test_client()
+    tile_url = url.replace("{z}", "1").replace("{x}", "0").replace("{y}", "1")
+    with ThreadPoolExecutor(8) as executor:
+        responses = list(executor.map(lambda _: client.get(tile_url), range(8)))
+    assert all(r.status_code == 200 and r.data == b"/1/0/1.png" * 10 for r in responses)
+    assert requests == ["/1/0/1.png"] and proxy.misses == 1 and proxy.hits + proxy.coalesced == 7
+    # Cached tiles survive a restart, and upstream errors are passed through (but not cached).
+    proxy = dlx.TileProxy(Flask(__name__), cache_dir=str(tmp_path))
+    proxy.url(upstream + "/{z}/{x}/{y}.png")
+    assert proxy.fetch(upstream + "/1/0/1.png") == (200, "image/png", b"/1/0/1.png" * 10)
+    assert proxy.fetch(upstream + "/missing.png")[0] == 404 and proxy.fetch(upstream + "/missing.png")[0] == 404
+    assert requests == ["/1/0/1.png", "/missing.png", "/missing.png"]
+
+
+def test_tile_proxy_eviction_and_wms(tile_server, tmp_path):
+    """
+    Test that the disk cache is bounded (evicting the least recently used tiles), and that WMS parameters are passed.
+    """
+    from flask import Flask
+
+    upstream, requests = tile_server
+    proxy = dlx.TileProxy(Flask(__name__), cache_dir=str(tmp_path), max_size=150)
+    for path in ["/a.png", "/b.png", "/a.png", "/c.png"]:  # 60 bytes each
+        proxy.fetch(upstream + path)
+    assert sorted(requests) == ["/a.png", "/b.png", "/c.png"]
+    assert len(list(tmp_path.iterdir())) == 2
+    proxy.fetch(upstream + "/a.png")  # still cached, as it was used more recently than b
+    proxy.fetch(upstream + "/b.png")  # evicted
+    assert requests.count("/a.png") == 1 and requests.count("/b.png") == 2
+    # WMS parameters (appended by the WMSTileLayer) are forwarded upstream.
+    key = proxy.url(upstream + "/wms").rsplit("/", 1)[1]
+    wms_url = proxy.upstream_url(key, {"service": "WMS", "bbox": "0,0,1,1"})
+    assert wms_url == upstream + "/wms?service=WMS&bbox=0%2C0%2C1%2C1"
+
+
+def test_tile_proxy_placeholder_validation(tile_server, tmp_path):
+    """
+    Test that placeholder values that could redirect the upstream request (e.g. to another host) are rejected.
+    """
+    from flask import Flask
+
+    upstream, requests = tile_server
+    server = Flask(__name__)
+    proxy = dlx.TileProxy(server, cache_dir=str(tmp_path))
+    url = proxy.url(upstream + "/{s}/{z}/{x}/{y}{r}.png")
+    client = server.test_client()
+    for args in [dict(s="169.254.169.254/latest/meta-data?", z=1, x=0, y=0), dict(s="a", z="../../admin", x=0, y=0),
+                 dict(s="a", z=1, x="0?", y=0), dict(s="a", z=1, x=0, y=0, r="/x"), dict(s="a", z=1, x=0)]:
+        assert client.get(url.split("?")[0], query_string=args).status_code == 400
+    assert requests == [] and not list(tmp_path.iterdir())
+    response = client.get(url.split("?")[0], query_string=dict(s="a", z=1, x=0, y=1, r="@2x"))
+    assert response.status_code == 200 and requests == ["/a/1/0/1@2x.png"]
+
+
+def test_tile_proxy_prefixed_app(tile_server, tmp_path):
+    """
+    Test that the advertised (proxy) url of the tiles is served, when the Dash app is mounted under a path prefix.
+    """
+    from dash import Dash, html
+
+    upstream, requests = tile_server
+    app = Dash(__name__, url_base_pathname="/app/")
+    app.layout = html.Div()
+    proxy = dlx.TileProxy(app, cache_dir=str(tmp_path))
+    url = proxy.url(upstream + "/{z}/{x}/{y}.png")
+    assert url.startswith("/app/tile-proxy/")
+    response = app.server.test_client().get(url.format(z=1, x=0, y=1))
+    assert response.status_code == 200 and response.mimetype == "image/png" and response.data == b"/1/0/1.png" * 10
+
+
+def test_mount_tile_cache():
+    """
+    Test that the tile cache service worker is served from the root, with the headers required to control the app.
+    """
+    from flask import Flask
+
+    server = Flask(__name__)
+    assert dlx.mount_tile_cache(server) == "/dash-leaflet-tile-cache.js"
+    response = server.test_client().get("/dash-leaflet-tile-cache.js")
+    assert response.status_code == 200 and response.mimetype == "application/javascript"
+    assert response.headers["Service-Worker-Allowed"] == "/" and b"addEventListener('fetch'" in response.data
+
+
+def test_mount_tile_cache_prefixed_app():
+    """
+    Test that the service worker is served at the returned url, when the Dash app is mounted under a path prefix.
+    """
+    from dash import Dash, html
+
+    app = Dash(__name__, url_base_pathname="/app/")
+    app.layout = html.Div()
+    url = dlx.mount_tile_cache(app)
+    assert url == "/app/dash-leaflet-tile-cache.js"
+    response = app.server.test_client().get(url)
+    assert response.status_code == 200 and response.mimetype == "application/javascript"
+
+
+def test_points_to_heatmap_grid(np):
+    """
+    Test that points are binned into a sparse density grid, with the first row being the southernmost.
+    """
+    import base64
+    lat, lon = np.array([0.1, 0.2, 0.9, 0.9]), np.array([0.1, 0.1, 0.9, 0.9])
+    grid = dlx.points_to_heatmap_grid(lat, lon, weights=[1, 1, 2, 3], bins=2, bounds=[[0, 0], [1, 1]])
+    assert grid["shape"] == [2, 2] and grid["bounds"] == [[0, 0], [1, 1]]
+    index = np.frombuffer(base64.b64decode(grid["index"]), dtype=np.uint32)
+    values = np.frombuffer(base64.b64decode(grid["values"]), dtype=np.float32)
+    assert index.tolist() == [0, 3] and values.tolist() == [2, 5]
+
+
+def test_points_to_hexbins(np):
+    """
+    Test that points are aggregated into the hexagon containing them, and that the aggregations are consistent.
+    """
+    rng = np.random.default_rng(42)
+    lat, lon, values = rng.uniform(50, 60, 5000), rng.uniform(0, 20, 5000), rng.uniform(0, 1, 5000)
+    counts = dlx.points_to_hexbins(lat, lon, zoom=6, radius=10)
+    sums = dlx.points_to_hexbins(lat, lon, zoom=6, values=values, aggregation="sum", radius=10)
+    means = dlx.points_to_hexbins(lat, lon, zoom=6, values=values, aggregation="mean", radius=10)
+    assert sum(counts["count"]) == 5000 and counts["value"] == counts["count"]
+    assert np.isclose(sum(sums["value"]), values.sum())
+    assert np.allclose(np.array(means["value"]) * means["count"], sums["value"])
+    # Each point is within the radius of the center of its hexagon
+    scale = 256 * 2 ** 6
+    x, y = dlx._lng_x(lon) * scale, dlx._lat_y(np, lat) * scale
+    i, j = dlx._hexbin_indices(np, x, y, 10 * np.sqrt(3), 15)
+    cx, cy = (i + (j & 1) / 2) * 10 * np.sqrt(3), j * 15
+    assert np.all(np.hypot(x - cx, y - cy) <= 10 + 1e-9)
+    # Squares are aligned with the pixel grid
+    squares = dlx.points_to_hexbins([0.0], [0.0], zoom=0, shape="square", radius=8)
+    assert squares["i"] == [8] and squares["j"] == [8]
+
+
+def test_geojson_to_topojson():
+    """
+    Test that the border of adjacent polygons is encoded as a single (shared) arc, and that arcs are delta-encoded.
+    """
+    def square(x):
+        return {"type": "Feature", "properties": {"x": x},
+                "geometry": {"type": "Polygon", "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]]}}
+
+    topology = dlx.geojson_to_topojson({"type": "FeatureCollection", "features": [square(0), square(1)]},
+                                       quantization=3)
+    assert topology["transform"] == {"scale": [1, 0.5], "translate": [0, 0]}
+    left, right = topology["objects"]["data"]["geometries"]
+    assert len(topology["arcs"]) == 3 and left["properties"] == {"x": 0}
+    assert left["arcs"] == [[0, 1]] and right["arcs"] == [[2, ~0]]
+    assert topology["arcs"][0] == [[1, 0], [0, 2]]
+    assert topology["arcs"][1] == [[1, 2], [-1, 0], [0, -2], [1, 0]]
+
+
+def test_geojson_to_payload():
+    """
+    Test that the payload holds the GeoJSON serialized with trimmed coordinates (properties are kept as is).
+    """
+    import json
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"value": 0.123456789},
+         "geometry": {"type": "Polygon", "coordinates": [[[0.123456789, 1], [2, 3.987654321], [0.123456789, 1]]]}}]}
+    payload = dlx.geojson_to_payload(geojson, precision=3)
+    feature = json.loads(payload.json)["features"][0]
+    assert feature["geometry"]["coordinates"] == [[[0.123, 1], [2, 3.988], [0.123, 1]]]
+    assert feature["properties"] == {"value": 0.123456789}
+    assert geojson["features"][0]["geometry"]["coordinates"][0][0] == [0.123456789, 1]
+    assert json.loads(dlx.geojson_to_payload(geojson, precision=None).json) == geojson
+
+
+def test_encoder_cache(monkeypatch, tmp_path):
+    """
+    Test that encoder results are memoized by content hash (or explicit key), returned as copies, and shared via the
+    disk cache.
+    """
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [0.123456789, 1]}}]}
+    cache = dlx.EncoderCache(max_entries=2, cache_dir=str(tmp_path))
+    monkeypatch.setattr(dlx, "encoder_cache", cache)
+    topology = dlx.geojson_to_topojson(geojson)
+    assert dlx.geojson_to_topojson({**geojson}) == topology
+    assert dlx.geojson_to_topojson(geojson, name="points") != topology
+    assert (cache.hits, cache.misses) == (1, 2)
+    # Modifying a result doesn't affect the cache
+    topology["objects"].clear()
+    assert "data" in dlx.geojson_to_topojson(geojson)["objects"]
+    # Payloads are memoized by explicit key only, which replaces the content hash
+    assert dlx.geojson_to_payload(geojson) is not dlx.geojson_to_payload(geojson)
+    payload = dlx.geojson_to_payload(geojson, precision=3, cache_key="points")
+    assert dlx.geojson_to_payload({"type": "FeatureCollection", "features": []}, precision=3,
+                                  cache_key="points") is payload
+    assert (cache.hits, cache.misses) == (3, 3)
+    # Results evicted from memory (or computed by other processes) are read from disk
+    other = dlx.EncoderCache(cache_dir=str(tmp_path))
+    monkeypatch.setattr(dlx, "encoder_cache", other)
+    assert dlx.geojson_to_payload(geojson, precision=3, cache_key="points").json == payload.json
+    assert dlx.geojson_to_topojson(geojson) == dlx.geojson_to_topojson({**geojson})
+    assert (other.hits, other.misses, other.disk_hits) == (3, 0, 2)
+    other.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def _supercluster_reference(coordinates, radius, extent, min_zoom, max_zoom):
+    """
+    Brute force transcription of Supercluster.load (with minPoints 2), returning the (x, y, id, parent, num) rows of
+    each zoom level.
+    """
+    import math
+
+    import numpy as np
+
+    def f32(value):
+        return float(np.float32(value))
+
+    def project(lon, lat):
+        sin = math.sin(lat * math.pi / 180)
+        y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+        return f32(lon / 360 + 0.5), f32(min(max(y, 0), 1))
+
+    level = [dict(zip("xy", project(*c)), zoom=math.inf, id=i, parent=-1, num=1) for i, c in enumerate(coordinates)]
+    levels = {max_zoom + 1: level}
+    for z in range(max_zoom, min_zoom - 1, -1):
+        r, nxt = radius / (extent * 2 ** z), []
+        for i, p in enumerate(level):
+            if p["zoom"] <= z:
+                continue
+            p["zoom"] = z
+            neighbors = [q for q in level if (f32(q["x"]) - p["x"]) ** 2 + (f32(q["y"]) - p["y"]) ** 2 <= r * r]
+            neighbors = [q for q in neighbors if q["zoom"] > z]
+            if not neighbors:
+                nxt.append(dict(p))
+                continue
+            num = p["num"] + sum(q["num"] for q in neighbors)
+            wx, wy = p["x"] * p["num"], p["y"] * p["num"]
+            cluster_id = (i << 5) + (z + 1) + len(coordinates)
+            for q in neighbors:
+                q["zoom"], q["parent"] = z, cluster_id
+                wx, wy = wx + q["x"] * q["num"], wy + q["y"] * q["num"]
+            p["parent"] = cluster_id
+            nxt.append(dict(x=wx / num, y=wy / num, zoom=math.inf, id=cluster_id, parent=-1, num=num))
+        levels[z] = level = nxt
+    return {z: [(p["x"], p["y"], p["id"], p["parent"], p["num"]) for p in rows] for z, rows in levels.items()}
+
+
+def _decode_supercluster_index(encoded):
+    """
+    Decode a serialized cluster index into its header and the KDBush header, ids, coordinates, and (id, parent, num)
+    rows of each zoom level.
+    """
+    import base64
+    import json
+    import struct
+
+    import numpy as np
+
+    buffer = base64.b64decode(encoded)
+    assert buffer[:4] == b"DLSC"
+    header_length = struct.unpack("<I", buffer[4:8])[0]
+    header = json.loads(buffer[8:8 + header_length])
+    data = buffer[8 + header_length + (8 - (8 + header_length) % 8) % 8:]
+    levels = {}
+    for tree in header["trees"]:
+        n, blob = tree["numItems"], data[tree["offset"]:]
+        magic, version, node_size, num_items = struct.unpack("<BBHI", blob[:8])
+        ids = np.frombuffer(blob, np.uint16 if n < 65536 else np.uint32, n, 8)
+        coords = np.frombuffer(blob, np.float32, 2 * n, 8 + ids.nbytes + (8 - ids.nbytes % 8) % 8).reshape(-1, 2)
+        columns = np.frombuffer(blob, np.uint32, 3 * n, tree["treeLength"]).reshape(3, n).astype(np.int64)
+        columns[1][columns[1] == 0xFFFFFFFF] = -1
+        levels[tree["zoom"]] = dict(kdbush=(magic, version, node_size, num_items), ids=ids, coords=coords,
+                                    rows=list(zip(*columns.tolist())))
+    return header, levels
+
+
+def test_geojson_to_supercluster_index(np):
+    """
+    Test that the cluster index matches a (brute force) reference of Supercluster, and that it round trips.
+    """
+    rng = np.random.default_rng(0)
+    coordinates = np.concatenate([rng.normal([10, 50], [2, 1], (300, 2)), np.tile([[12, 51]], (20, 1))]).tolist()
+    features = [{"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": c}}
+                for c in coordinates]
+    encoded = dlx.geojson_to_supercluster_index({"type": "FeatureCollection", "features": features}, max_zoom=8,
+                                                node_size=16)
+    header, levels = _decode_supercluster_index(encoded)
+    assert header["numPoints"] == 320 and header["options"]["maxZoom"] == 8 and not header["aggregates"]
+    # The hash of the (float32) coordinates, against which the index is verified client side.
+    words = np.array(coordinates, dtype=np.float32).view(np.uint32).ravel().tolist()
+    expected = sum((w ^ (w >> 15)) * ((2 * k + 1) * 0x9E3779B1) for k, w in enumerate(words)) % 2 ** 32
+    assert header["coordinatesHash"] == expected
+    moved = features[:-1] + [{**features[-1], "geometry": {"type": "Point", "coordinates": [12, 51.001]}}]
+    header_moved, _ = _decode_supercluster_index(
+        dlx.geojson_to_supercluster_index({"type": "FeatureCollection", "features": moved}, max_zoom=8, node_size=16))
+    assert header_moved["numPoints"] == 320 and header_moved["coordinatesHash"] != header["coordinatesHash"]
+    reference = _supercluster_reference(coordinates, 40, 512, 0, 8)
+    assert sorted(levels) == sorted(reference) == list(range(10))
+    # The same clusters (and parents) at each zoom level, i.e. fewer points as the zoom decreases.
+    for z, level in levels.items():
+        assert level["rows"] == [row[2:] for row in reference[z]]
+    cluster_counts = [sum(num > 1 for _, _, num in levels[z]["rows"]) for z in range(10)]
+    assert cluster_counts == [sum(row[4] > 1 for row in reference[z]) for z in range(10)]
+    assert cluster_counts[9] == 0 and all(count > 0 for count in cluster_counts[:9])
+    assert [len(levels[z]["rows"]) for z in range(10)] == [len(reference[z]) for z in range(10)]
+    # The KDBush trees (v4, float32) hold all points (as a permutation), at float32 precision.
+    for z, level in levels.items():
+        n = len(reference[z])
+        assert level["kdbush"] == (0xDB, (1 << 4) + 7, 16, n)
+        assert sorted(level["ids"].tolist()) == list(range(n))
+        xy = np.array([row[:2] for row in reference[z]], dtype=np.float32)
+        assert np.array_equal(level["coords"], xy[level["ids"]])